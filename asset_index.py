@@ -0,0 +1,129 @@
+import os
+import threading
+
+from ingest import file_sha1
+import instrument
+
+# ================= DUPLICATE ASSET INDEX =================
+# รูปเดียวกันมักมาจากหลายทาง (import เด็ค, ดาวน์โหลดจากแท็บค้นหา, รูปในเครื่อง, วางจาก clipboard) คนละ path
+# จับกลุ่มรูปที่ซ้ำกัน:
+#   - ซ้ำจริง   : sha1 ของเนื้อไฟล์เท่ากัน
+#   - รูปเล็ก/รูปเต็มของการ์ด id เดียวกันใน cache (ถ้าให้ cache มา) ที่ยืนยันด้วย near_duplicate ว่าเป็นรูปเดียวกันที่ย่อขนาด
+#   - เกือบซ้ำ : dHash 64 bit ต่างกันไม่เกิน NEAR_DISTANCE bit แล้วยืนยันด้วยรูปสี THUMB_SIZE ต่างกันเฉลี่ยไม่เกิน NEAR_MAX_DIFF
+#               เปิดเฉพาะเมื่อขอ (near=True) ห้ามใช้แทนรูปหรือนับว่าเป็นรูปเดียวกัน: การ์ดคนละใบที่ภาพ+กรอบเดียวกัน
+#               ต่างแค่ชื่อ/ข้อความ (หรือคนละภาษา/คนละ reprint) ที่ 16x16 แทบไม่ต่างกัน
+#   - ตัวแทนกลุ่ม = รูปที่ความละเอียดสูงสุด (รูป preview ไม่มีทางแทนรูปเต็ม) เท่ากันเลือกไฟล์ใหญ่กว่า (บีบอัดน้อยกว่า)
+# dedupe() (export ประมวลผล + ฝังลง PDF ครั้งเดียวต่อกลุ่ม) และป้าย ×N ใน GUI ใช้เฉพาะสองแบบแรก (ตรงกับที่ export จริง)
+# ลายเซ็นของแต่ละไฟล์คำนวณครั้งเดียวต่อ (path, size, mtime) ไฟล์นี้ไม่ใช้ PyQt6
+
+HASH_SIZE = 8
+THUMB_SIZE = 16
+NEAR_DISTANCE = 6
+NEAR_MAX_DIFF = 4.0 # ค่าเฉลี่ยต่างกันต่อ channel (0-255) รูปเดียวกันที่ encode ใหม่ต่างกัน ~1-2
+BANDS = NEAR_DISTANCE + 1 # แบ่ง hash เป็นท่อน: ต่างกัน <= NEAR_DISTANCE bit ต้องมีอย่างน้อยหนึ่งท่อนตรงกัน
+
+
+def image_signature(path):
+    # คืน dict (sha1, dhash, ขนาดพิกเซล, ขนาดไฟล์, รูปย่อสี) หรือ None ถ้าเปิดไม่ได้
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            img.draft('RGB', (64, 64)) # JPEG: decode แบบย่อตั้งแต่ขั้น DCT
+            rgb = img.convert('RGB')
+    except Exception as e:
+        instrument.error('assets.signature', e)
+        return None
+    gray = rgb.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR).tobytes()
+    dhash = 0
+    for row in range(HASH_SIZE):
+        line = gray[row * (HASH_SIZE + 1):(row + 1) * (HASH_SIZE + 1)]
+        for col in range(HASH_SIZE):
+            dhash = (dhash << 1) | (line[col] > line[col + 1])
+    thumb = rgb.resize((THUMB_SIZE, THUMB_SIZE), Image.Resampling.BILINEAR).tobytes()
+    return {'sha1': file_sha1(path), 'dhash': dhash, 'pixels': width * height, 'aspect': width / height,
+            'bytes': os.path.getsize(path), 'thumb': thumb}
+
+
+def near_duplicate(a, b):
+    if (a['dhash'] ^ b['dhash']).bit_count() > NEAR_DISTANCE: return False
+    if abs(a['aspect'] - b['aspect']) > 0.03: return False
+    diff = sum(abs(x - y) for x, y in zip(a['thumb'], b['thumb']))
+    return diff / len(a['thumb']) <= NEAR_MAX_DIFF
+
+
+class AssetIndex:
+    def __init__(self, cache=None):
+        self.cache = cache # image_cache.CardImageCache: รู้ว่า path ไหนเป็นรูปของการ์ด id ไหน
+        self._signatures = {} # (path, size, mtime_ns) -> signature
+        self._lock = threading.Lock()
+
+    def signature(self, path):
+        try: st = os.stat(path)
+        except OSError: return None
+        memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if memo in self._signatures: return self._signatures[memo]
+        sig = image_signature(path)
+        with self._lock: self._signatures[memo] = sig
+        return sig
+
+    @instrument.timed('assets.group')
+    def canonical(self, paths, is_cancelled=None, near=False):
+        # คืน {path: path ตัวแทนกลุ่ม} ทุก path ที่เปิดได้ (ไม่ซ้ำกับใคร = ตัวเอง)
+        # near=True: รวมรูปที่แค่ "เกือบซ้ำ" ด้วย (รูปที่คล้ายกัน ไม่ใช่รูปเดียวกันเสมอไป)
+        sigs = {}
+        for path in dict.fromkeys(p for p in paths if p):
+            if is_cancelled and is_cancelled(): return {}
+            sig = self.signature(path)
+            if sig: sigs[path] = sig
+        parent = {p: p for p in sigs}
+        def find(p):
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            return p
+        def union(a, b):
+            ra, rb = find(a), find(b)
+            if ra != rb: parent[rb] = ra
+
+        # ซ้ำจริง: sha1 เดียวกัน
+        by_sha = {}
+        for path, sig in sigs.items(): union(by_sha.setdefault(sig['sha1'], path), path)
+        firsts = list(by_sha.values())
+        # รูปเล็ก/รูปเต็มของการ์ด id เดียวกัน: ยืนยันว่าเป็นรูปเดียวกันจริง (ไฟล์ใน cache อาจถูกแทนด้วยรูปอื่น)
+        if self.cache:
+            by_card = {}
+            for path in firsts:
+                found = self.cache.variant_of(path)
+                if found: by_card.setdefault(found[0], []).append(path)
+            for members in by_card.values():
+                for other in members[1:]:
+                    if near_duplicate(sigs[members[0]], sigs[other]): union(members[0], other)
+        if not near: firsts = []
+        # เกือบซ้ำ: เทียบเฉพาะคู่ที่มีท่อนของ dHash ตรงกัน (ไม่ต้องเทียบทุกคู่)
+        bits = HASH_SIZE * HASH_SIZE
+        width = -(-bits // BANDS)
+        buckets = {}
+        for path in firsts:
+            h = sigs[path]['dhash']
+            for band in range(BANDS):
+                key = (band, (h >> (band * width)) & ((1 << width) - 1))
+                for other in buckets.get(key, ()):
+                    if find(other) != find(path) and near_duplicate(sigs[path], sigs[other]): union(other, path)
+                buckets.setdefault(key, []).append(path)
+
+        groups = {}
+        for path in sigs: groups.setdefault(find(path), []).append(path)
+        result = {}
+        for members in groups.values():
+            best = max(members, key=lambda p: (sigs[p]['pixels'], sigs[p]['bytes'], p))
+            for path in members: result[path] = best
+        return result
+
+    def dedupe(self, images_data, is_cancelled=None):
+        # images_data ที่ทุกช่องชี้ไปที่ตัวแทนกลุ่ม: export ประมวลผลและฝังรูปละครั้ง (เฉพาะรูปที่เหมือนกันจริง)
+        mapping = self.canonical(images_data.values(), is_cancelled)
+        merged = len(mapping) - len(set(mapping.values()))
+        if merged: instrument.count('assets.merged', merged)
+        return {idx: mapping.get(path, path) for idx, path in images_data.items()}
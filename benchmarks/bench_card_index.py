@@ -0,0 +1,98 @@
+"""Local card index benchmark: 10k queries against a ~13k-card dataset.
+
+    python benchmarks/bench_card_index.py [--dump cardinfo.json] [--queries 10000]
+
+Without --dump a synthetic dataset with YGO-like names is generated.
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card_index import CardIndex, load_dump
+
+WORDS = ("blue eyes white dragon dark magician girl elemental hero neos cyber "
+         "end red ash blossom joyous spring raigeki pot of greed desires extravagance "
+         "sky striker ace raye kagari shizuku dragonmaid tinkhec ghost ogre snow rabbit "
+         "infinite impermanence called by the grave crossout designator kashtira fenrir "
+         "tearlaments kitkallos branded fusion albaz ecclesia swordsoul mo ye chixiao "
+         "salamangreat gazelle heatleo trickstar candina lycorissica").split()
+
+
+def synthetic_cards(count, seed=7):
+    rnd = random.Random(seed)
+    cards, seen = [], set()
+    while len(cards) < count:
+        name = " ".join(w.capitalize() for w in rnd.sample(WORDS, rnd.randint(2, 5)))
+        if name in seen: continue
+        seen.add(name)
+        cid = 10000000 + len(cards) * 7
+        url = f"https://images.ygoprodeck.com/images/cards/{cid}.jpg"
+        cards.append({'id': cid, 'name': name, 'type': 'Effect Monster',
+                      'card_images': [{'id': cid, 'image_url': url,
+                                       'image_url_small': url.replace('/cards/', '/cards_small/')}]})
+    return cards
+
+
+def typo(word, rnd):
+    if len(word) < 4: return word
+    i = rnd.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def make_queries(cards, n, seed=11):
+    rnd = random.Random(seed)
+    queries = []
+    for i in range(n):
+        card = rnd.choice(cards)
+        words = card['name'].lower().split()
+        kind = i % 4
+        if kind == 0:   # prefix ของคำแรก
+            queries.append(('prefix', words[0][:rnd.randint(2, len(words[0]))]))
+        elif kind == 1: # หลายคำ คำสุดท้ายพิมพ์ไม่จบ
+            queries.append(('prefix', " ".join(words[:2])[:-1]))
+        elif kind == 2: # พิมพ์ผิด
+            queries.append(('fuzzy', " ".join(typo(w, rnd) for w in words[:3])))
+        else:
+            queries.append(('id', str(card['id'])))
+    return queries
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dump")
+    ap.add_argument("--cards", type=int, default=13000)
+    ap.add_argument("--queries", type=int, default=10000)
+    args = ap.parse_args()
+
+    cards = load_dump(args.dump) if args.dump else synthetic_cards(args.cards)
+    folder = tempfile.mkdtemp()
+    try:
+        index = CardIndex(os.path.join(folder, "cards.db"))
+        t0 = time.perf_counter()
+        index.rebuild(cards)
+        size_mb = os.path.getsize(index.path) / 1e6
+        print(f"built {len(cards)} cards in {time.perf_counter() - t0:.2f}s, {size_mb:.1f} MB on disk")
+
+        timings = {}
+        for kind, q in make_queries(cards, args.queries):
+            t = time.perf_counter()
+            index.search(q)
+            timings.setdefault(kind, []).append((time.perf_counter() - t) * 1000)
+        everything = [ms for values in timings.values() for ms in values]
+        for kind, values in sorted(timings.items()) + [('all', everything)]:
+            values.sort()
+            print(f"  {kind:<7} n={len(values):>5}  mean {statistics.mean(values):6.2f} ms  "
+                  f"p50 {values[len(values) // 2]:6.2f} ms  p99 {values[int(len(values) * 0.99)]:6.2f} ms")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Export benchmark: 200-card synthetic deck, legacy loop vs export_engine.
+
+Modes: legacy (old per-slot loop + FPDF), engine (fpdf_build_pdf: parallel
+image pipeline, FPDF in memory), stream (export_pdf, StreamingPDFWriter).
+fpdf is only needed here; the app writes PDFs with pdf_writer.
+
+    python benchmarks/bench_export.py [--cards 200] [--unique 70]
+
+Each mode runs in its own subprocess so peak RSS is measured separately.
+All modes resize every card at the 'print' settings (300 DPI, quality 100,
+4:4:4) with JPEG passthrough off. The synthetic sources are YGOPRODeck-sized,
+so passthrough would otherwise skip the pipeline being compared.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import resource
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import export_engine
+import layout_engine
+
+CONFIG = {
+    'card_w': 59, 'card_h': 86, 'gap': 4,
+    'margin_top': 15, 'margin_left': 12,
+    'paper_w': 210, 'paper_h': 297
+}
+MODES = ("legacy", "engine", "stream")
+PROFILE = 'print' # ค่าเดียวกับ pipeline เดิมก่อนมี profile (ตัวเลขเทียบกับรอบก่อนๆ ได้)
+SOURCE_SIZE = (813, 1185)  # ขนาดรูปเต็มจาก YGOPRODeck
+
+
+def make_deck(folder, cards, unique):
+    rnd = random.Random(1234)
+    paths = []
+    for i in range(unique):
+        path = os.path.join(folder, f"src_{i}.jpg")
+        color = (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256))
+        img = Image.effect_noise(SOURCE_SIZE, 64).convert('RGB')
+        img.paste(color, (40, 40, 300, 300))
+        img.save(path, quality=90)
+        paths.append(path)
+    return {i: paths[i % unique] for i in range(cards)}
+
+
+def legacy_build_pdf(images_data, config, temp_dir):
+    # ก็อปมาจาก generate_pdf เดิม: ประมวลผลทีละช่องบน thread เดียว
+    from fpdf import FPDF
+    pdf = FPDF('P', 'mm', (config['paper_w'], config['paper_h']))
+    pdf.set_auto_page_break(False)
+    pdf.set_compression(False)
+    size = export_engine.card_pixel_size(config)
+    grid = layout_engine.compute_grid(config)
+    for p in range(layout_engine.page_count(images_data, grid)):
+        pdf.add_page()
+        for s in range(9):
+            g_idx = (p * 9) + s
+            pos = layout_engine.slot_position(config, grid, s)
+            if g_idx in images_data:
+                out = export_engine.process_image(images_data[g_idx], os.path.join(temp_dir, f"{g_idx}.jpg"), size)
+                if out:
+                    pdf.image(out, x=pos['x'], y=pos['y'], w=config['card_w'], h=config['card_h'])
+            pdf.set_line_width(0.1)
+            pdf.set_draw_color(200, 200, 200)
+            pdf.rect(pos['x'], pos['y'], config['card_w'], config['card_h'])
+    return pdf
+
+
+def fpdf_build_pdf(images_data, config, temp_dir, profile=export_engine.DEFAULT_PROFILE, workers=None):
+    # export แบบ FPDF เดิม (ก่อนมี StreamingPDFWriter): ทุกรูปอยู่ใน RAM จนถึง output()
+    from fpdf import FPDF
+    prof = export_engine.get_profile(profile)
+    processed = export_engine.process_unique_images(images_data, config, temp_dir, prof, workers)
+    grid = layout_engine.compute_grid(config)
+    slots = layout_engine.per_page(grid)
+
+    pdf = FPDF('P', 'mm', (config['paper_w'], config['paper_h']))
+    pdf.set_auto_page_break(False)
+    pdf.set_compression(prof['compress'])
+    for p in range(layout_engine.page_count(images_data, grid)):
+        pdf.add_page()
+        for s in range(slots):
+            pos = layout_engine.slot_position(config, grid, s)
+            hq_path = processed.get(images_data.get((p * slots) + s))
+            if hq_path:
+                pdf.image(hq_path, x=pos['x'], y=pos['y'], w=pos['w'], h=pos['h'])
+            pdf.set_line_width(0.1)
+            pdf.set_draw_color(200, 200, 200)
+            pdf.rect(pos['x'], pos['y'], pos['w'], pos['h'])
+    return pdf
+
+
+def peak_rss_mb():
+    # ru_maxrss เป็น KB บน Linux; รวม worker process ของ pool ด้วย
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round((own + children) / 1024, 1)
+
+
+def run_mode(mode, deck_dir, cards, unique):
+    with open(os.path.join(deck_dir, "deck.json")) as f:
+        images_data = {int(k): v for k, v in json.load(f).items()}
+    # วัด resize pipeline เสมอ (รันใน process ของ mode นี้เท่านั้น)
+    export_engine.can_passthrough = lambda path, size: False
+    work = tempfile.mkdtemp()
+    try:
+        out = os.path.join(work, "out.pdf")
+        t0 = time.perf_counter()
+        if mode == "stream":
+            export_engine.export_pdf(images_data, CONFIG, out, work, PROFILE)
+        elif mode == "engine":
+            fpdf_build_pdf(images_data, CONFIG, work, PROFILE).output(out)
+        else:
+            legacy_build_pdf(images_data, CONFIG, work).output(out)
+        elapsed = time.perf_counter() - t0
+        result = {'mode': mode, 'cards': cards, 'unique': unique,
+                  'seconds': round(elapsed, 2), 'peak_rss_mb': peak_rss_mb(),
+                  'pdf_mb': round(os.path.getsize(out) / 1e6, 1)}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    print(json.dumps(result))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cards", type=int, default=200)
+    ap.add_argument("--unique", type=int, default=70)
+    ap.add_argument("--mode", choices=MODES)
+    ap.add_argument("--deck-dir")
+    args = ap.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.deck_dir, args.cards, args.unique)
+        return
+
+    deck_dir = tempfile.mkdtemp()
+    try:
+        images_data = make_deck(deck_dir, args.cards, args.unique)
+        with open(os.path.join(deck_dir, "deck.json"), "w") as f:
+            json.dump(images_data, f)
+        print(f"{args.cards} cards / {args.unique} unique images, {os.cpu_count()} CPUs")
+        for mode in MODES:
+            out = subprocess.run([sys.executable, __file__, "--mode", mode, "--deck-dir", deck_dir,
+                                  "--cards", str(args.cards), "--unique", str(args.unique)],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"  {mode:<7} {r['seconds']:>7.2f} s   peak RSS {r['peak_rss_mb']:>7.1f} MB   pdf {r['pdf_mb']} MB")
+    finally:
+        shutil.rmtree(deck_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
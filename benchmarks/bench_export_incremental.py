@@ -0,0 +1,63 @@
+"""Incremental re-export: cold export, unchanged re-export, then one-card edit.
+
+    python benchmarks/bench_export_incremental.py [--cards 900] [--unique 300] [--profile draft]
+
+Uses a throw-away ExportCache. The "no cache" line is the old behaviour:
+every export reprocesses every card and rebuilds every page.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import export_engine
+from export_cache import ExportCache
+from bench_export import CONFIG, make_deck
+
+
+def timed_export(images_data, profile, cache):
+    work = tempfile.mkdtemp()
+    try:
+        t0 = time.perf_counter()
+        export_engine.export_pdf(images_data, CONFIG, os.path.join(work, "out.pdf"), work, profile, cache=cache)
+        return time.perf_counter() - t0
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cards", type=int, default=900)
+    ap.add_argument("--unique", type=int, default=300)
+    ap.add_argument("--profile", default="draft", choices=export_engine.EXPORT_PROFILES)
+    args = ap.parse_args()
+
+    deck_dir, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        images_data = make_deck(deck_dir, args.cards, args.unique)
+        edited = os.path.join(deck_dir, "edited.jpg")
+        Image.effect_noise((813, 1185), 32).convert('RGB').save(edited, quality=90)
+        cache = ExportCache(cache_dir)
+        print(f"{args.cards} cards / {args.unique} unique, profile {args.profile}")
+
+        print(f"  no cache        {timed_export(images_data, args.profile, None):7.2f} s")
+        runs = [("cold", images_data), ("unchanged", images_data),
+                ("one-card edit", {**images_data, args.cards // 2: edited})]
+        for label, data in runs:
+            seconds = timed_export(data, args.profile, cache)
+            s = cache.stats
+            print(f"  {label:<15} {seconds:7.2f} s   images {s['images_hit']} hit / {s['images_miss']} miss"
+                  f"   pages {s['pages_hit']} hit / {s['pages_miss']} miss")
+    finally:
+        shutil.rmtree(deck_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Peak memory of PDF export vs page count: FPDF in memory vs StreamingPDFWriter.
+
+    python benchmarks/bench_export_memory.py [--pages 1 10 56]
+
+Every card uses a different image (worst case: nothing can be shared), so
+FPDF has to hold one 300-DPI JPEG per card until output(). Each run is a
+separate subprocess; peak RSS should stay flat for the streaming writer.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_export import CONFIG, make_deck, peak_rss_mb, fpdf_build_pdf
+
+import export_engine
+import layout_engine
+
+
+def run_one(mode, deck_dir):
+    with open(os.path.join(deck_dir, "deck.json")) as f:
+        images_data = {int(k): v for k, v in json.load(f).items()}
+    work = tempfile.mkdtemp()
+    try:
+        out = os.path.join(work, "out.pdf")
+        t0 = time.perf_counter()
+        if mode == "stream":
+            export_engine.export_pdf(images_data, CONFIG, out, work, workers=1)
+        else:
+            fpdf_build_pdf(images_data, CONFIG, work, workers=1).output(out)
+        print(json.dumps({'seconds': round(time.perf_counter() - t0, 2), 'peak_rss_mb': peak_rss_mb(),
+                          'pdf_mb': round(os.path.getsize(out) / 1e6, 1)}))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, nargs='+', default=[1, 10, 56])
+    ap.add_argument("--mode", choices=["fpdf", "stream"])
+    ap.add_argument("--deck-dir")
+    args = ap.parse_args()
+
+    if args.mode:
+        run_one(args.mode, args.deck_dir)
+        return
+
+    print(f"{'pages':>5} {'cards':>5}  {'mode':<6} {'seconds':>8} {'peak RSS':>10} {'pdf':>8}")
+    for pages in args.pages:
+        cards = pages * layout_engine.per_page(layout_engine.compute_grid(CONFIG))
+        deck_dir = tempfile.mkdtemp()
+        try:
+            images_data = make_deck(deck_dir, cards, cards)
+            with open(os.path.join(deck_dir, "deck.json"), "w") as f:
+                json.dump(images_data, f)
+            for mode in ("fpdf", "stream"):
+                out = subprocess.run([sys.executable, __file__, "--mode", mode, "--deck-dir", deck_dir],
+                                     capture_output=True, text=True, check=True).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{pages:>5} {cards:>5}  {mode:<6} {r['seconds']:>7.2f}s {r['peak_rss_mb']:>7.1f} MB {r['pdf_mb']:>6.1f} MB")
+        finally:
+            shutil.rmtree(deck_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
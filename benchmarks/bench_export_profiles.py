@@ -0,0 +1,64 @@
+"""Export profiles: time and PDF size for draft / standard / print.
+
+    python benchmarks/bench_export_profiles.py [--cards 200] [--unique 70]
+
+Sources are YGOPRODeck-sized JPEGs (813x1185), so standard and print embed
+them byte-for-byte (passthrough). Draft is 150 DPI, so it resizes them.
+"legacy" is the old pipeline: resize + quality 100 for every card, with no
+passthrough.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export_engine
+from bench_export import CONFIG, make_deck
+
+LEGACY = {'dpi': 300, 'quality': 100, 'subsampling': 0, 'compress': False}
+
+
+def run(images_data, profile, passthrough=True):
+    work = tempfile.mkdtemp()
+    try:
+        out = os.path.join(work, "out.pdf")
+        if not passthrough:
+            original = export_engine.can_passthrough
+            export_engine.can_passthrough = lambda path, size: False
+        t0 = time.perf_counter()
+        try:
+            export_engine.export_pdf(images_data, CONFIG, out, work, profile, workers=1)
+        finally:
+            if not passthrough: export_engine.can_passthrough = original
+        elapsed = time.perf_counter() - t0
+        size = export_engine.card_pixel_size(CONFIG, export_engine.get_profile(profile)['dpi'])
+        passed = sum(export_engine.can_passthrough(p, size) for p in set(images_data.values())) if passthrough else 0
+        return elapsed, os.path.getsize(out) / 1e6, passed
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cards", type=int, default=200)
+    ap.add_argument("--unique", type=int, default=70)
+    args = ap.parse_args()
+
+    deck_dir = tempfile.mkdtemp()
+    try:
+        images_data = make_deck(deck_dir, args.cards, args.unique)
+        print(f"{args.cards} cards / {args.unique} unique images (single worker)")
+        runs = [("legacy", LEGACY, False)] + [(name, name, True) for name in export_engine.EXPORT_PROFILES]
+        for label, profile, passthrough in runs:
+            seconds, mb, passed = run(images_data, profile, passthrough)
+            print(f"  {label:<9} {seconds:>6.2f} s   pdf {mb:>6.1f} MB   passthrough {passed}/{args.unique}")
+    finally:
+        shutil.rmtree(deck_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Deck import against the local stand-in server: bare session vs HttpScheduler.
+
+    python benchmarks/bench_http.py [--cards 120] [--latency 30-80] [--error-rate 0.05] [--drop-rate 0.02]
+                                    [--truncate-rate 0.05]
+
+"bare" is the old behaviour: one pooled requests.Session, no rate limit and
+no retries. Every request that gets a 429, a 5xx or a dropped connection
+loses its card. "scheduler" goes through http_scheduler.HttpScheduler.
+Image bodies cut off halfway are resumed with a Range request, and no
+truncated file is left in the cache; the script checks every cached file
+at the end.
+Server-side counters show how close each one gets to the rate cap.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ygo_api
+import http_scheduler
+from image_cache import CardImageCache, _complete_jpeg
+from deck_import import download_deck
+from fake_ygoprodeck import FakeYGOProDeck, FIRST_ID, parse_range
+
+
+class BareHttp:
+    # requests.Session เปล่าๆ แบบเดิม (ไม่มี rate limit / retry)
+    def __init__(self):
+        self.session = ygo_api.make_session()
+
+    def get(self, url, params=None, timeout=10, label=None, **kwargs):
+        return self.session.get(url, params=params, timeout=timeout, **kwargs)
+
+
+def run(label, http, args):
+    fake = FakeYGOProDeck(args.cards, parse_range(args.latency), args.error_rate, args.drop_rate, args.rate_cap,
+                          truncate_rate=args.truncate_rate).start()
+    ygo_api.API_URL = fake.api_url
+    cache_dir = tempfile.mkdtemp()
+    try:
+        ids = [str(FIRST_ID + i) for i in range(args.cards)] * 3
+        failed = []
+        t0 = time.perf_counter()
+        paths = download_deck(ids, CardImageCache(cache_dir), on_failed=lambda cid, reason: failed.append(reason),
+                              http=http)
+        elapsed = time.perf_counter() - t0
+        s = fake.stats
+        ok = len(set(p for p in paths if p))
+        broken = [p for p in set(paths) if p and not _complete_jpeg(p)]
+        print(f"  {label:<9} {elapsed:6.2f} s   {ok}/{args.cards} cards   failed {len(failed)}   "
+              f"server: {s['requests']} req, peak {s['peak_per_second']}/s, 429 {s['throttled']}, "
+              f"5xx {s['errors']}, dropped {s['dropped']}, cut {s['truncated']}, resumed {s['ranged']}")
+        if broken: print(f"            {len(broken)} truncated files in the cache!")
+        reasons = {}
+        for r in failed:
+            kind = r.split(' (')[0].split(':')[0]
+            reasons[kind] = reasons.get(kind, 0) + 1
+        if reasons: print(f"            failures: {reasons}")
+    finally:
+        fake.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cards", type=int, default=120)
+    ap.add_argument("--latency", default="30-80", help="ms, or min-max ms")
+    ap.add_argument("--error-rate", type=float, default=0.05)
+    ap.add_argument("--drop-rate", type=float, default=0.02)
+    ap.add_argument("--rate-cap", type=int, default=20)
+    ap.add_argument("--truncate-rate", type=float, default=0.05)
+    args = ap.parse_args()
+    print(f"{args.cards} unique cards x3, latency {args.latency} ms, {args.error_rate:.0%} 5xx, "
+          f"{args.drop_rate:.0%} dropped, {args.truncate_rate:.0%} cut off, cap {args.rate_cap}/s")
+
+    run("bare", BareHttp(), args)
+    scheduler = http_scheduler.HttpScheduler(rate=args.rate_cap * 0.9)
+    run("scheduler", scheduler, args)
+    print(f"            scheduler stats: {scheduler.stats}")
+
+
+if __name__ == "__main__":
+    main()
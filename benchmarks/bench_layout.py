@@ -0,0 +1,111 @@
+"""Bulk placement benchmark: old per-file placement vs CardLayout batch insert.
+
+    python benchmarks/bench_layout.py [--cards 10000] [--gui-cards 2000]
+
+The model part runs the old dict algorithm (scan the current page, open a
+new page when full, max(keys) on every update) against CardLayout.insert_many.
+The GUI part (QT_QPA_PLATFORM=offscreen) times CardPrinterApp placing the
+same files one by one the old way vs add_images(), counting preview refreshes.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from layout_model import CardLayout
+
+PER_PAGE = 9
+
+
+def legacy_place(paths):
+    images_data, current_page, max_page, refreshes = {}, 0, 0, 0
+    for path in paths:
+        while True:
+            start = current_page * PER_PAGE
+            free = next((start + i for i in range(PER_PAGE) if start + i not in images_data), None)
+            if free is not None: break
+            max_page += 1 # add_new_page
+            current_page = max_page
+            refreshes += 1
+        images_data[free] = path
+        refreshes += 1
+        max_page = max(max_page, max(images_data.keys()) // PER_PAGE) # update_ui_state
+    return images_data, refreshes
+
+
+def bench_model(cards):
+    paths = [f"card_{i}.jpg" for i in range(cards)]
+    t0 = time.perf_counter()
+    old, refreshes = legacy_place(paths)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    layout = CardLayout()
+    layout.insert_many(paths)
+    t_new = time.perf_counter() - t0
+    assert dict(layout.items()) == old
+    print(f"model  {cards} cards: legacy {t_old * 1000:8.1f} ms ({refreshes} refreshes)   "
+          f"CardLayout {t_new * 1000:8.1f} ms (1 refresh)")
+
+
+def bench_gui(cards):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import tempfile
+    from PIL import Image
+    from PyQt6.QtWidgets import QApplication
+    import card_printer
+
+    folder = tempfile.mkdtemp()
+    paths = []
+    for i in range(50):
+        path = os.path.join(folder, f"{i}.jpg")
+        Image.new('RGB', (400, 580), (i * 5, 80, 120)).save(path)
+        paths.append(path)
+    files = [paths[i % len(paths)] for i in range(cards)]
+
+    app = QApplication.instance() or QApplication([])
+    results = {}
+    for mode in ("legacy", "batch"):
+        window = card_printer.CardPrinterApp()
+        window.show()
+        app.processEvents()
+        refreshes = [0]
+        original = window.preview_area.refresh_content
+        def counted():
+            refreshes[0] += 1
+            original()
+        window.preview_area.refresh_content = counted
+
+        t0 = time.perf_counter()
+        if mode == "legacy":
+            for f in files:
+                # add_image_to_next_free_slot เดิม: สแกนหน้าปัจจุบัน + update_single_slot ทีละใบ
+                while True:
+                    start = window.current_page * window.slots_per_page
+                    free = next((i for i in range(window.slots_per_page) if start + i not in window.images_data), None)
+                    if free is not None: break
+                    window.add_new_page()
+                window.update_single_slot(free, f)
+                window.update_ui_state()
+        else:
+            window.add_images(files)
+        app.processEvents()
+        results[mode] = (time.perf_counter() - t0, refreshes[0])
+        window.close()
+    for mode, (seconds, count) in results.items():
+        print(f"gui    {cards} cards: {mode:<7} {seconds * 1000:8.1f} ms, {count} refreshes")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cards", type=int, default=10000)
+    ap.add_argument("--gui-cards", type=int, default=2000, help="0 to skip the Qt part")
+    args = ap.parse_args()
+    bench_model(args.cards)
+    if args.gui_cards: bench_gui(args.gui_cards)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Cold start: time from launch to the first paint of the preview area.
+
+    python benchmarks/bench_startup.py [--runs 5]
+    python benchmarks/bench_startup.py --exe dist/card_printer/card_printer.exe
+
+Starts the app with CARD_PRINT_STARTUP_PROBE set. The app writes its own
+timings (imports done, window built, first paint) to a JSON file and then
+quits. "wall" is measured here, from process launch until that file
+appears, so it also covers interpreter start-up and, for a --onefile
+build, unpacking into the temp folder. Each run uses a fresh cache
+directory so runs do not warm each other's caches. The OS file cache is
+not flushed, so only the first run is a true cold start.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(cmd, timeout):
+    work = tempfile.mkdtemp()
+    probe = os.path.join(work, "probe.json")
+    env = dict(os.environ, CARD_PRINT_STARTUP_PROBE=probe, CARD_PRINT_CACHE_DIR=os.path.join(work, "cache"))
+    try:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        while not os.path.exists(probe):
+            if proc.poll() is not None:
+                raise RuntimeError(f"exited with {proc.returncode}: {proc.stderr.read().decode(errors='replace')[-500:]}")
+            if time.perf_counter() - t0 > timeout:
+                proc.kill()
+                raise RuntimeError("no first paint before timeout")
+            time.sleep(0.005)
+        wall = (time.perf_counter() - t0) * 1000
+        proc.wait(timeout)
+        with open(probe) as f: marks = json.load(f)
+        return {'wall': round(wall, 1), **marks}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--exe", help="frozen build to launch instead of the script")
+    ap.add_argument("--timeout", type=float, default=60)
+    ap.add_argument("--json", help="also write every run to this file")
+    args = ap.parse_args()
+
+    cmd = [os.path.abspath(args.exe)] if args.exe else [sys.executable, os.path.join(ROOT, "card_printer.py")]
+    print(f"{' '.join(cmd)}  x{args.runs}")
+    runs = []
+    for i in range(args.runs):
+        r = run_once(cmd, args.timeout)
+        runs.append(r)
+        print(f"  run {i + 1}: wall {r['wall']:7.1f} ms   imports {r['imports']:6.1f}   "
+              f"window {r['window']:6.1f}   first paint {r['first_paint']:6.1f} ms")
+    for key in ('wall', 'imports', 'window', 'first_paint'):
+        values = [r[key] for r in runs]
+        print(f"  {key:<12} median {statistics.median(values):7.1f} ms   min {min(values):7.1f}   max {max(values):7.1f}")
+    if args.json:
+        with open(args.json, 'w') as f: json.dump({'cmd': cmd, 'runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""Offline benchmark suite with a stored baseline.
+
+    python benchmarks/bench_suite.py                       # run everything, compare with baseline.json
+    python benchmarks/bench_suite.py --only export_10 paint --repeat 3
+    python benchmarks/bench_suite.py --save-baseline       # accept the current numbers
+    python benchmarks/bench_suite.py --out results.json    # also keep this run
+
+Scenarios (each runs in its own process, with a fresh cache directory):
+  deck_import   download_deck on the shared executor's BULK lane, as the
+                GUI's import does. It fetches small previews and then full
+                images from benchmarks/fake_ygoprodeck.py, with latency,
+                5xx errors and the site's rate cap.
+  search        SearchService latency: API cold, repeat query (memory
+                cache) and the local CardIndex. Also the offscreen search
+                tab, from Enter until the first page of results is listed.
+  export_N      export_pdf at N = 1, 10 and 100 pages, with no export
+                cache. Half of the sources are YGOPRODeck-size JPEGs, which
+                are embedded as they are. The other half are large PNG
+                scans, which go through decode/resize/encode. Reports wall time,
+                per-image process_image cost (from instrument spans) and
+                peak RSS of the main process and of the pool workers.
+  paint         CardSlot.paintEvent under QT_QPA_PLATFORM=offscreen:
+                cold (empty pixmap cache, decode + scale) and warm.
+
+Everything runs locally; nothing touches the network. Metric names say
+which way is better: "*_per_s" is higher-better and everything else is
+lower-better. A metric regresses when it is worse than the baseline by
+more than --tolerance (relative) and by more than the noise floor for its
+unit. The exit status is 1 on a regression, so this can gate CI. The
+baseline is only meaningful on the machine that recorded it.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+SCENARIOS = ("deck_import", "search", "export_1", "export_10", "export_100", "paint")
+SCAN_SIZE = (1240, 1800) # รูปสแกนจากผู้ใช้ (~530 DPI) ต้องผ่าน process_image จริง
+# ต่ำกว่านี้ถือว่าเป็น noise ไม่นับว่าช้าลง (ตามหน่วยท้ายชื่อ metric)
+NOISE_FLOOR = {'_s': 0.05, '_ms': 2.0, '_mb': 8.0, '_per_s': 1.0}
+
+
+# ================= SCENARIOS (รันใน child process) =================
+
+def bench_deck_import():
+    import ygo_api
+    import http_scheduler
+    from image_cache import CardImageCache
+    from deck_import import download_deck, upgrade_images, PREVIEW_VARIANT
+    from task_executor import TaskExecutor, BULK
+    from fake_ygoprodeck import FakeYGOProDeck, FIRST_ID
+
+    unique, copies = 40, 3
+    with FakeYGOProDeck(unique, latency=(0.02, 0.05), error_rate=0.02) as fake:
+        ygo_api.API_URL = fake.api_url
+        http = http_scheduler.HttpScheduler()
+        cache = CardImageCache(os.path.join(os.environ['CARD_PRINT_CACHE_DIR'], "images"))
+        executor = TaskExecutor()
+        ids = [str(FIRST_ID + i) for i in range(unique) for _ in range(copies)]
+        failed = []
+        t0 = time.perf_counter()
+        previews = download_deck(ids, cache, http=http, pool=executor.lane(BULK), variant=PREVIEW_VARIANT,
+                                 on_failed=lambda cid, reason: failed.append(cid))
+        t_preview = time.perf_counter() - t0
+        upgrade_images([p for p in previews if p], cache, http=http, pool=executor.lane(BULK),
+                       on_failed=lambda path, reason: failed.append(path))
+        t_full = time.perf_counter() - t0
+        executor.shutdown()
+        return {'preview_s': t_preview, 'full_s': t_full, 'cards_per_s': len(ids) / t_preview,
+                'failed': len(failed), 'requests': fake.stats['requests']}
+
+
+def bench_search():
+    import ygo_api
+    import http_scheduler
+    from card_index import CardIndex
+    from search_service import SearchService
+    from task_executor import TaskExecutor, INTERACTIVE
+    from fake_ygoprodeck import FakeYGOProDeck, WORDS
+
+    queries = [w.lower() for w in WORDS[:12]]
+    with FakeYGOProDeck(2000, latency=(0.03, 0.06)) as fake:
+        ygo_api.API_URL = fake.api_url
+        http = http_scheduler.configure() # แท็บค้นหาใน GUI ใช้ scheduler กลาง
+        executor = TaskExecutor()
+        service = SearchService(None, http=http, pool=executor.lane(INTERACTIVE))
+
+        def latency(fn):
+            times = []
+            for q in queries:
+                t0 = time.perf_counter()
+                fn(q)
+                times.append((time.perf_counter() - t0) * 1000)
+            return statistics.median(times), max(times)
+
+        api_p50, api_max = latency(lambda q: service.search(q).result())
+        cached_p50, _ = latency(lambda q: service.search(q).result())
+        index = CardIndex(os.path.join(os.environ['CARD_PRINT_CACHE_DIR'], "bench.db"))
+        index.rebuild([fake.card_json(c) for c in fake.cards])
+        index_p50, index_max = latency(lambda q: index.search(q, 500))
+        fuzzy_p50, _ = latency(lambda q: index.search(q[:-1] + "x", 500)) # พิมพ์ผิดตัวสุดท้าย
+
+        app, window = _qt_window()
+        window.card_index = CardIndex(os.path.join(os.environ['CARD_PRINT_CACHE_DIR'], "empty.db"))
+        tab = window.ensure_search_tab()
+        times = []
+        for q in queries[:6]:
+            tab.inp_search.setText(q + " " + q[:2]) # คำใหม่ทุกครั้ง ไม่ได้จาก cache
+            t0 = time.perf_counter()
+            tab.search_now()
+            _pump(app, lambda: tab.list_widget.count() > 0 or tab.lbl_status.text().startswith(("No", "Search failed")))
+            times.append((time.perf_counter() - t0) * 1000)
+        window.close()
+        executor.shutdown()
+        return {'api_p50_ms': api_p50, 'api_max_ms': api_max, 'cached_p50_ms': cached_p50,
+                'index_p50_ms': index_p50, 'index_max_ms': index_max, 'fuzzy_p50_ms': fuzzy_p50,
+                'tab_results_p50_ms': statistics.median(times)}
+
+
+def bench_export(pages):
+    import instrument
+    import export_engine
+    import layout_engine
+    from bench_export import CONFIG
+
+    work = tempfile.mkdtemp()
+    try:
+        per_page = layout_engine.per_page(layout_engine.compute_grid(CONFIG))
+        images_data = make_sources(work, pages * per_page, min(120, pages * per_page))
+        output = os.path.join(work, "out.pdf")
+        instrument.enable()
+        t0 = time.perf_counter()
+        export_engine.export_pdf(images_data, CONFIG, output, work)
+        elapsed = time.perf_counter() - t0
+        spans = instrument.snapshot()['spans']
+        images = spans.get('export.decode', {'count': 0})['count'] or 1
+        per_image = sum(spans.get(k, {'total': 0.0})['total'] for k in ('export.decode', 'export.resize', 'export.encode'))
+        return {'total_s': elapsed, 'images_s': spans['export.images']['total'],
+                'pages_s': sum(s['total'] for n, s in spans.items() if n == 'export.page'),
+                'process_image_ms': per_image / images * 1000, 'pages_per_s': pages / elapsed,
+                'peak_rss_mb': _peak_rss(resource.RUSAGE_SELF),
+                'worker_peak_rss_mb': _peak_rss(resource.RUSAGE_CHILDREN),
+                'pdf_mb': os.path.getsize(output) / 1e6}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def make_sources(folder, cards, unique):
+    from PIL import Image
+    from bench_export import make_deck
+    deck = make_deck(folder, cards, unique)
+    scans = {}
+    for path in sorted(set(deck.values()))[::2]:
+        with Image.open(path) as img: img.resize(SCAN_SIZE).save(path[:-4] + ".png", compress_level=1)
+        scans[path] = path[:-4] + ".png"
+    return {i: scans.get(p, p) for i, p in deck.items()}
+
+
+def bench_paint():
+    from bench_export import make_deck
+
+    work = tempfile.mkdtemp()
+    try:
+        app, window = _qt_window()
+        paths = list(make_deck(work, window.slots_per_page, window.slots_per_page).values())
+        window.add_images(paths)
+        _pump(app, lambda: False, 0.2)
+        slots = window.preview_area.slots
+        cold = []
+        for _ in range(5):
+            window.pixmap_cache._items.clear()
+            window.pixmap_cache._bytes = 0
+            for slot in slots:
+                t0 = time.perf_counter()
+                slot.repaint()
+                cold.append((time.perf_counter() - t0) * 1000)
+        warm = []
+        for _ in range(30):
+            for slot in slots:
+                t0 = time.perf_counter()
+                slot.repaint()
+                warm.append((time.perf_counter() - t0) * 1000)
+        page = []
+        for _ in range(30):
+            t0 = time.perf_counter()
+            window.preview_area.repaint()
+            page.append((time.perf_counter() - t0) * 1000)
+        window.close()
+        return {'slot_cold_ms': statistics.median(cold), 'slot_warm_ms': statistics.median(warm),
+                'page_warm_ms': statistics.median(page)}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def _qt_window():
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import card_printer
+    window = card_printer.CardPrinterApp()
+    window.resize(1300, 850)
+    window.show()
+    _pump(app, lambda: False, 0.1)
+    return app, window
+
+
+def _pump(app, done, timeout=15.0):
+    end = time.perf_counter() + timeout
+    while not done() and time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def _peak_rss(who):
+    return resource.getrusage(who).ru_maxrss / 1024 # Linux: KB
+
+
+def run_scenario(name):
+    if name.startswith("export_"): return bench_export(int(name.split("_")[1]))
+    return globals()[f"bench_{name}"]()
+
+
+# ================= RUNNER / BASELINE =================
+
+def run_child(name):
+    work = tempfile.mkdtemp()
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", CARD_PRINT_CACHE_DIR=work)
+    env.pop("CARD_PRINT_TRACE", None)
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name], env=env, cwd=ROOT,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{name} failed:\n{proc.stderr[-2000:]}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def noise_floor(metric):
+    for suffix, floor in sorted(NOISE_FLOOR.items(), key=lambda kv: -len(kv[0])):
+        if metric.endswith(suffix): return floor
+    return 0.0
+
+
+def compare(results, baseline, tolerance):
+    # คืน [(scenario, metric, ค่าเดิม, ค่าใหม่, ต่างกันกี่ %, ช้าลงไหม)]
+    rows = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(scenario, {}).get(metric)
+            if old is None: continue
+            worse = (old - value) if higher_is_better(metric) else (value - old)
+            change = (value - old) / old * 100 if old else 0.0
+            regressed = worse > abs(old) * tolerance and worse > noise_floor(metric)
+            rows.append((scenario, metric, old, value, change, regressed))
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", nargs='+', choices=SCENARIOS, help="run just these scenarios")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per scenario; the median of each metric is kept")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before it counts (0.25 = 25%%)")
+    ap.add_argument("--out", help="write this run's results (JSON) here")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child)))
+        return 0
+
+    results = {}
+    for name in args.only or SCENARIOS:
+        runs = [run_child(name) for _ in range(args.repeat)]
+        results[name] = {k: round(statistics.median(r[k] for r in runs), 4) for k in runs[0]}
+        print(f"{name:<12} " + "  ".join(f"{k} {v:g}" for k, v in results[name].items()), flush=True)
+
+    report = {'meta': {'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'commit': git_commit(),
+                       'python': platform.python_version(), 'platform': platform.platform(),
+                       'cpus': os.cpu_count(), 'repeat': args.repeat},
+              'results': results}
+    if args.out:
+        with open(args.out, 'w') as f: json.dump(report, f, indent=2)
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f: baseline = json.load(f)['results']
+        rows = compare(results, baseline, args.tolerance)
+        regressions = [r for r in rows if r[5]]
+        print(f"\nvs {os.path.relpath(args.baseline)} (tolerance {args.tolerance:.0%}):")
+        for scenario, metric, old, new, change, regressed in rows:
+            print(f"  {scenario + '.' + metric:<36} {old:>10g} -> {new:<10g} {change:+7.1f}%"
+                  f"{'   REGRESSION' if regressed else ''}")
+        print(f"{len(regressions)} regression(s)")
+        status = 1 if regressions else 0
+    if args.save_baseline:
+        saved = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f: saved = json.load(f)['results'] # --only: เก็บ scenario อื่นไว้ตามเดิม
+        report['results'] = {**saved, **results}
+        with open(args.baseline, 'w') as f: json.dump(report, f, indent=2)
+        print(f"baseline written to {os.path.relpath(args.baseline)}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
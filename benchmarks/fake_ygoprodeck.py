@@ -0,0 +1,237 @@
+"""Local stand-in for the YGOPRODeck API and image host.
+
+    python benchmarks/fake_ygoprodeck.py [--port 8765] [--latency 30-80] [--error-rate 0.05] [--rate-cap 20]
+                                         [--truncate-rate 0.1]
+
+Serves /api/v7/cardinfo.php (id=a,b,c / fname=...) and
+/images/cards{,_small}/<id>.jpg for a synthetic card pool. The server can
+inject latency, random 5xx errors and dropped connections. It can also
+cut image bodies off halfway. Images honour "Range: bytes=N-" with a 206
+reply, as a CDN would. Like the real site, it answers 429 with
+Retry-After when more than rate-cap requests arrive within one second.
+Point the app at it with:
+
+    YGOPRODECK_API_URL=http://127.0.0.1:8765/api/v7/cardinfo.php
+"""
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from PIL import Image
+
+WORDS = ("Dark", "Blue-Eyes", "Magician", "Dragon", "Knight", "Elemental", "HERO", "Cyber", "Red-Eyes",
+         "Black", "White", "Shadow", "Chaos", "Soldier", "Girl", "Beast", "Lord", "Wizard", "Storm", "Angel")
+FIRST_ID = 10000000
+
+
+def make_cards(count, seed=7):
+    rnd = random.Random(seed)
+    cards = []
+    for i in range(count):
+        name = " ".join(rnd.sample(WORDS, 3)) + f" {i}"
+        cards.append({'id': FIRST_ID + i, 'name': name, 'type': "Effect Monster", 'desc': "stand-in card"})
+    return cards
+
+
+def jpeg_bytes(size, seed):
+    img = Image.effect_noise(size, 40).convert('RGB')
+    img.paste((seed * 37 % 256, seed * 91 % 256, 120), (10, 10, size[0] // 2, size[1] // 3))
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', quality=85)
+    return buf.getvalue()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # client ปิดสายเอง (connection reset) เป็นเรื่องปกติของการทดสอบนี้
+        if not isinstance(sys.exc_info()[1], ConnectionError): super().handle_error(request, client_address)
+
+
+class FakeYGOProDeck:
+    def __init__(self, cards=500, latency=(0.0, 0.0), error_rate=0.0, drop_rate=0.0, rate_cap=20,
+                 port=0, seed=7, truncate_rate=0.0):
+        self.cards = make_cards(cards, seed)
+        self.by_id = {c['id']: c for c in self.cards}
+        self.latency, self.error_rate, self.drop_rate, self.rate_cap = latency, error_rate, drop_rate, rate_cap
+        self.truncate_rate = truncate_rate
+        self.rnd = random.Random(seed)
+        # รูปไม่กี่แบบวนใช้ (สร้าง JPEG ทุก request ช้าเกินไป)
+        self.full = [jpeg_bytes((813, 1185), s) for s in range(4)]
+        self.small = [jpeg_bytes((168, 246), s) for s in range(4)]
+        self.stats = {'requests': 0, 'errors': 0, 'dropped': 0, 'throttled': 0, 'truncated': 0, 'ranged': 0,
+                      'peak_per_second': 0}
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.server = QuietServer(("127.0.0.1", port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/api/v7/cardinfo.php"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def card_json(self, card):
+        cid = card['id']
+        return {**card, 'card_images': [{'id': cid, 'image_url': f"{self.base_url}/images/cards/{cid}.jpg",
+                                         'image_url_small': f"{self.base_url}/images/cards_small/{cid}.jpg",
+                                         'image_url_cropped': f"{self.base_url}/images/cards_cropped/{cid}.jpg"}]}
+
+    def _admit(self):
+        # คืน 'ok' / 'throttle' / 'error' / 'drop'
+        with self._lock:
+            now = time.monotonic()
+            self.stats['requests'] += 1
+            self._recent.append(now)
+            while self._recent and self._recent[0] <= now - 1.0: self._recent.popleft()
+            self.stats['peak_per_second'] = max(self.stats['peak_per_second'], len(self._recent))
+            if self.rate_cap and len(self._recent) > self.rate_cap:
+                self.stats['throttled'] += 1
+                return 'throttle'
+            roll = self.rnd.random()
+            if roll < self.drop_rate:
+                self.stats['dropped'] += 1
+                return 'drop'
+            if roll < self.drop_rate + self.error_rate:
+                self.stats['errors'] += 1
+                return 'error'
+            return 'ok'
+
+    def _cut_body(self):
+        with self._lock:
+            if self.rnd.random() >= self.truncate_rate: return False
+            self.stats['truncated'] += 1
+            return True
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, content_type="application/json", headers=()):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers: self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                lo, hi = fake.latency
+                if hi: time.sleep(fake.rnd.uniform(lo, hi))
+                verdict = fake._admit()
+                if verdict == 'drop':
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if verdict == 'throttle':
+                    return self.send(429, b'{"error": "rate limit"}', headers=[("Retry-After", "1")])
+                if verdict == 'error':
+                    return self.send(503, b'{"error": "try again"}')
+                url = urlparse(self.path)
+                if url.path.endswith("/cardinfo.php"): return self.api(parse_qs(url.query))
+                if url.path.startswith("/images/"):
+                    folder, name = url.path.split("/")[-2:]
+                    cid = int(name.split(".")[0]) if name.split(".")[0].isdigit() else -1
+                    if cid not in fake.by_id: return self.send(404, b"not found", "text/plain")
+                    images = fake.small if folder == "cards_small" else fake.full
+                    return self.image(images[cid % len(images)])
+                self.send(404, b"not found", "text/plain")
+
+            def image(self, body):
+                status, headers, start = 200, [("Accept-Ranges", "bytes")], 0
+                ranged = self.headers.get("Range", "")
+                if ranged.startswith("bytes=") and ranged[6:].rstrip("-").isdigit():
+                    start = int(ranged[6:].rstrip("-"))
+                    if start >= len(body):
+                        return self.send(416, b"", "image/jpeg", [("Content-Range", f"bytes */{len(body)}")])
+                    with fake._lock: fake.stats['ranged'] += 1
+                    status = 206
+                    headers.append(("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"))
+                part = body[start:]
+                if not fake._cut_body(): return self.send(status, part, "image/jpeg", headers)
+                # ส่ง header ครบแต่ body ครึ่งเดียวแล้วตัดสาย
+                self.send_response(status)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(part)))
+                for k, v in headers: self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(part[:len(part) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                self.connection.shutdown(2)
+
+            def api(self, query):
+                if 'id' in query:
+                    ids = [int(i) for i in query['id'][0].split(",") if i.strip().isdigit()]
+                    if any(i not in fake.by_id for i in ids) or not ids:
+                        return self.send(400, b'{"error": "No card matching your query was found in the database."}')
+                    found = [fake.by_id[i] for i in ids]
+                elif 'fname' in query:
+                    needle = query['fname'][0].lower()
+                    found = [c for c in fake.cards if needle in c['name'].lower()]
+                    if not found:
+                        return self.send(400, b'{"error": "No card matching your query was found in the database."}')
+                else:
+                    found = fake.cards
+                self.send(200, json.dumps({'data': [fake.card_json(c) for c in found]}).encode())
+
+        return Handler
+
+
+def parse_range(text):
+    lo, _, hi = text.partition("-")
+    return float(lo) / 1000, float(hi or lo) / 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--cards", type=int, default=500)
+    ap.add_argument("--latency", default="0", help="ms, or min-max ms")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--drop-rate", type=float, default=0.0)
+    ap.add_argument("--rate-cap", type=int, default=20, help="requests per second before 429 (0 = off)")
+    ap.add_argument("--truncate-rate", type=float, default=0.0, help="image bodies cut off halfway")
+    args = ap.parse_args()
+    fake = FakeYGOProDeck(args.cards, parse_range(args.latency), args.error_rate, args.drop_rate,
+                          args.rate_cap, args.port, truncate_rate=args.truncate_rate)
+    print(f"YGOPRODECK_API_URL={fake.api_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(fake.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import difflib
+import argparse
+import threading
+import unicodedata
+
+from image_cache import default_cache_dir
+import ygo_api
+import http_scheduler
+
+# ================= LOCAL CARD INDEX (OFFLINE SEARCH) =================
+# สร้างจาก JSON ของ cardinfo.php (ดาวน์โหลดหรือไฟล์ fixture) เก็บเป็น SQLite:
+#   cards  : ข้อมูลการ์ดแบบย่อ (เฉพาะที่ UI ใช้)
+#   names  : FTS5 สำหรับค้นหาแบบ prefix
+#   grams  : trigram ของชื่อ สำหรับค้นหาแบบพิมพ์ผิด (fuzzy)
+#   images : id ของ alternate art -> id การ์ด
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY, name TEXT NOT NULL, norm TEXT NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS images (image_id INTEGER PRIMARY KEY, card_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS grams (gram TEXT NOT NULL, card_id INTEGER NOT NULL, PRIMARY KEY (gram, card_id)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(norm, content='cards', content_rowid='id', prefix='2 3');
+"""
+
+IMAGE_KEYS = ('id', 'image_url', 'image_url_small', 'image_url_cropped')
+FUZZY_CANDIDATES = 60
+
+
+def default_index_path():
+    return os.path.join(default_cache_dir(), "cards.db")
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def trigrams(norm):
+    padded = f" {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def compact_card(card):
+    return {
+        'id': card.get('id'),
+        'name': card.get('name', ''),
+        'type': card.get('type', ''),
+        'card_images': [{k: img[k] for k in IMAGE_KEYS if k in img} for img in card.get('card_images', [])],
+    }
+
+
+class CardIndex:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local() # sqlite connection ใช้ข้าม thread ไม่ได้
+
+    @classmethod
+    def open_default(cls):
+        # คืน None ถ้ายังไม่เคยสร้าง index -> UI จะใช้ API ออนไลน์แทน
+        path = default_index_path()
+        if not os.path.exists(path): return None
+        index = cls(path)
+        return index if index.count() else None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # --- Build ---
+    def rebuild(self, cards):
+        conn = self._conn()
+        with conn:
+            for table in ('cards', 'images', 'grams', 'meta'):
+                conn.execute(f"DELETE FROM {table}")
+            for card in cards:
+                if card.get('id') is None: continue
+                data = compact_card(card)
+                norm = normalize(data['name'])
+                conn.execute("INSERT OR REPLACE INTO cards VALUES (?,?,?,?)",
+                             (data['id'], data['name'], norm, json.dumps(data, separators=(',', ':'))))
+                for img in data['card_images']:
+                    if img.get('id') is not None:
+                        conn.execute("INSERT OR IGNORE INTO images VALUES (?,?)", (img['id'], data['id']))
+                conn.executemany("INSERT OR IGNORE INTO grams VALUES (?,?)",
+                                 [(g, data['id']) for g in trigrams(norm)])
+            conn.execute("INSERT INTO names(names) VALUES ('rebuild')")
+            conn.execute("INSERT INTO meta VALUES ('built_at', ?)", (str(int(time.time())),))
+        conn.execute("VACUUM")
+        return self.count()
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    # --- Lookup ---
+    def card(self, card_id):
+        row = self._conn().execute(
+            "SELECT c.data FROM images i JOIN cards c ON c.id = i.card_id WHERE i.image_id = ? "
+            "UNION ALL SELECT data FROM cards WHERE id = ? LIMIT 1", (card_id, card_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, query, limit=30):
+        query = query.strip()
+        if query.isdigit():
+            card = self.card(int(query))
+            if card: return [card]
+        norm = normalize(query)
+        if not norm: return []
+        return self.search_prefix(norm, limit) or self.search_fuzzy(norm, limit)
+
+    def search_prefix(self, norm, limit=30):
+        match = " ".join(f'"{token}"*' for token in norm.split())
+        rows = self._conn().execute(
+            "SELECT c.data FROM names JOIN cards c ON c.id = names.rowid WHERE names MATCH ? "
+            "ORDER BY c.norm = ? DESC, c.norm LIKE ? DESC, length(c.norm) LIMIT ?",
+            (match, norm, norm.replace('%', '') + '%', limit)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def search_fuzzy(self, norm, limit=30):
+        grams = list(trigrams(norm))
+        marks = ",".join("?" * len(grams))
+        rows = self._conn().execute(
+            f"SELECT c.norm, c.data, g.hits FROM (SELECT card_id, COUNT(*) AS hits FROM grams "
+            f"WHERE gram IN ({marks}) GROUP BY card_id ORDER BY hits DESC LIMIT ?) g "
+            f"JOIN cards c ON c.id = g.card_id", (*grams, FUZZY_CANDIDATES)).fetchall()
+        min_hits = max(1, len(grams) // 3)
+        matcher = difflib.SequenceMatcher(None)
+        matcher.set_seq2(norm) # seq2 ถูก preprocess ครั้งเดียว ใช้ซ้ำกับทุก candidate
+        scored = []
+        for name_norm, data, hits in rows:
+            if hits < min_hits: continue
+            # เทียบกับส่วนต้นของชื่อที่ยาวพอๆ กับคำค้น เพื่อให้ชื่อยาวไม่เสียเปรียบ
+            matcher.set_seq1(name_norm[:len(norm) + 3])
+            ratio = matcher.ratio()
+            scored.append((hits / len(grams) + ratio, data))
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return [json.loads(data) for _, data in scored[:limit]]
+
+
+def load_dump(source=None, timeout=120):
+    if source:
+        with open(source, 'r', encoding='utf-8') as f: payload = json.load(f)
+    else:
+        r = http_scheduler.default().get(ygo_api.API_URL, timeout=timeout, deadline=timeout * 2, label="card database")
+        r.raise_for_status()
+        payload = r.json()
+    return payload.get('data', []) if isinstance(payload, dict) else payload
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build or query the local YGO card index.")
+    ap.add_argument("--db", default=default_index_path())
+    sub = ap.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh", help="download cardinfo.php (or read --from) and rebuild the index")
+    refresh.add_argument("--from", dest="source", help="cardinfo.php JSON dump to import instead of downloading")
+    search = sub.add_parser("search", help="query the index")
+    search.add_argument("query")
+    args = ap.parse_args(argv)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    index = CardIndex(args.db)
+    if args.command == "refresh":
+        t0 = time.perf_counter()
+        count = index.rebuild(load_dump(args.source))
+        print(f"Indexed {count} cards into {args.db} in {time.perf_counter() - t0:.1f}s")
+    else:
+        t0 = time.perf_counter()
+        results = index.search(args.query)
+        ms = (time.perf_counter() - t0) * 1000
+        for card in results: print(f"{card['id']:>10}  {card['name']}")
+        print(f"{len(results)} results in {ms:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,78 +3,303 @@ import os
 import time
 import tempfile
 import shutil
-import requests
-from threading import Thread
+import multiprocessing
+
+_T0 = time.perf_counter() # จุดเริ่มนับเวลาเปิดโปรแกรม (startup probe)
+
+# มี argument = โหมด command line (card_printer_cli.py) ไม่ต้องโหลด PyQt6 เลย
+if __name__ == "__main__" and len(sys.argv) > 1:
+    multiprocessing.freeze_support()
+    from card_printer_cli import main
+    sys.exit(main(sys.argv[1:]))
 
-# ใช้ PIL (Pillow) สำหรับจัดการรูปภาพ
-from PIL import Image
+from threading import Thread
+from collections import OrderedDict, Counter
+from functools import partial
+from concurrent.futures import wait as futures_wait
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QSlider, QPushButton, QFileDialog, 
                              QFrame, QMessageBox, QComboBox, QSpinBox, QTabWidget,
-                             QLineEdit, QListWidget, QListWidgetItem, QProgressBar, QMenu)
+                             QLineEdit, QListWidget, QListWidgetItem, QProgressBar, QMenu,
+                             QCheckBox, QListView, QInputDialog)
 # เอา QKeySequence ออกจาก QtCore
-from PyQt6.QtCore import Qt, QRectF, QSize, pyqtSignal, QThread, QMimeData, QPoint 
+from PyQt6.QtCore import (Qt, QRectF, QSize, pyqtSignal, QMimeData, QPoint, QTimer, QObject, QEvent, QBuffer, QByteArray,
+                          QAbstractListModel, QModelIndex)
 # ย้าย QKeySequence มาใส่ใน QtGui และเพิ่ม QDrag
 from PyQt6.QtGui import (QPainter, QColor, QPen, QPixmap, QFont, QDragEnterEvent, 
-                         QDropEvent, QIcon, QAction, QKeySequence, QDrag) 
-from fpdf import FPDF
+                         QDropEvent, QIcon, QAction, QKeySequence, QDrag, QImageReader,
+                         QTransform, QImage) 
+from PyQt6 import sip
+
+import export_engine
+import layout_engine
+from layout_model import CardLayout, EditHistory
+from image_cache import CardImageCache, fetch_image_data, default_cache_dir
+from card_index import CardIndex
+from deck_import import parse_ydk, download_deck, upgrade_images, PREVIEW_VARIANT
+import ingest
+from export_cache import ExportCache
+from asset_index import AssetIndex
+import search_service
+from search_service import SearchService
+from task_executor import TaskExecutor, CancelToken, INTERACTIVE, NORMAL, BULK
+import instrument
+
+# ================= BACKGROUND TASKS =================
+# งานเบื้องหลังทั้งหมดรันใน TaskExecutor ตัวเดียวของโปรแกรม (task_executor.py) ผลส่งกลับ GUI thread ผ่าน TaskBridge
+
+class TaskBridge(QObject):
+    # ส่ง callback จาก thread ของ executor กลับมารันใน GUI thread
+    # close() ตอนปิดหน้าต่าง: งานที่เสร็จหลังจากนั้น (หรือหลัง object ถูกลบ) ไม่ส่งอะไรกลับมาอีก
+    invoke = pyqtSignal(object, tuple)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.closed = False
+        self.invoke.connect(self._run)
+    def _run(self, fn, args):
+        if not self.closed: fn(*args) # ที่ค้างอยู่ในคิว event ตั้งแต่ก่อน close()
+    def wrap(self, fn):
+        def emit(*args):
+            if self.closed or sip.isdeleted(self): return
+            try: self.invoke.emit(fn, args)
+            except RuntimeError: pass # ถูกลบระหว่างเช็คกับ emit
+        return emit
+    def close(self):
+        self.closed = True
+        self.invoke.disconnect()
+
+def run_export(images_data, config, output, profile, cache, on_progress, is_cancelled, prepare=None, assets=None):
+    # prepare(images_data) -> images_data ที่พร้อม export (โหลดรูปเต็มแทนรูป preview ก่อน)
+    if prepare: images_data = prepare(images_data)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        export_engine.export_pdf(images_data, config, output, temp_dir, profile,
+                                 on_progress=on_progress, is_cancelled=is_cancelled, cache=cache, assets=assets)
+        return output
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def run_ingest(paths):
+    # ตรวจ + ทำ proxy ของรูปจากผู้ใช้ใน process pool (ดู ingest.py)
+    try: return ingest.ingest_many(paths)
+    except Exception as e: return [(p, None, str(e)) for p in paths]
+
+def fetch_thumbnail(cache, card_id, url):
+    # ผ่าน http_scheduler ตัวกลาง (rate limit ร่วมกับ import / search)
+    # คืน (path, bytes) รูปที่เพิ่งโหลด decode จาก bytes ได้เลย
+    try: return fetch_image_data(cache, card_id, 'small', url, timeout=5)
+    except Exception as e: # ถูกบันทึกใน http_scheduler.default().failed_items() แล้ว
+        instrument.error('search.thumbnail', e)
+        return None
+
+# ================= PIXMAP CACHE =================
+
+class PixmapCache:
+    # เก็บรูปที่ decode + ย่อขนาดพอดีช่องแล้ว ใช้ร่วมกันทุกช่อง (LRU ตามงบหน่วยความจำ)
+    # ชั้นที่ 1: ต้นฉบับที่ decode แบบย่อไว้ (สูงไม่เกิน SOURCE_MAX_H) -> ลากสไลเดอร์ไม่ต้อง decode ไฟล์ใหม่
+    # ชั้นที่ 2: pixmap ที่ย่อพอดีขนาดช่องปัจจุบัน
+    SOURCE_MAX_H = ingest.PROXY_SIZE[1]
+    MAX_BUFFERS = 8
+
+    def __init__(self, budget_bytes=64 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._buffers = OrderedDict() # path -> bytes ของรูปที่เพิ่งโหลดมา (decode ครั้งแรกจาก memory)
+
+    def prime(self, path, data):
+        self._buffers[path] = data
+        while len(self._buffers) > self.MAX_BUFFERS: self._buffers.popitem(last=False)
+
+    def get(self, image_key, size, dpr=1.0, rotated=False):
+        w, h = max(1, int(size.width() * dpr)), max(1, int(size.height() * dpr))
+        key = ('pixmap', image_key, w, h, rotated)
+        pixmap = self._lookup(key)
+        if pixmap is not None:
+            instrument.count('pixmap_cache.hit')
+            return pixmap
+        instrument.count('pixmap_cache.miss')
+
+        # การ์ดที่วางแนวนอน: ย่อแบบแนวตั้งก่อนแล้วหมุนตามเข็ม 90° (ตรงกับตอน export)
+        src_w, src_h = (h, w) if rotated else (w, h)
+        source = self._source(image_key, src_h)
+        if source is None: return None
+        if source.width() != src_w or source.height() != src_h:
+            source = source.scaled(src_w, src_h, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+        if rotated: source = source.transformed(QTransform().rotate(90))
+        pixmap = QPixmap.fromImage(source)
+        pixmap.setDevicePixelRatio(dpr)
+        self._store(key, pixmap, pixmap.width() * pixmap.height() * 4)
+        return pixmap
+
+    def _source(self, image_key, want_h):
+        key = ('source', image_key)
+        image = self._lookup(key)
+        if image is not None and image.height() >= min(want_h, self.SOURCE_MAX_H):
+            return image
+        # ให้ decoder ย่อรูปตอนอ่านเลย (JPEG ย่อได้ตั้งแต่ขั้น DCT) แทนการโหลดเต็ม 300 DPI แล้วค่อยย่อ
+        data = self._buffers.pop(image_key[0], None)
+        if data is not None:
+            buffer = QBuffer()
+            buffer.setData(QByteArray(data))
+            reader = QImageReader(buffer)
+        else:
+            reader = QImageReader(image_key[0])
+        reader.setAutoTransform(True)
+        full = reader.size()
+        target_h = max(want_h, self.SOURCE_MAX_H)
+        if full.isValid() and full.height() > target_h:
+            reader.setScaledSize(QSize(max(1, full.width() * target_h // full.height()), target_h))
+        with instrument.span('preview.decode', path=os.path.basename(image_key[0])):
+            image = reader.read()
+        if image.isNull(): return None
+        if image.height() <= self.SOURCE_MAX_H:
+            self._store(key, image, image.sizeInBytes())
+        return image
+
+    def _lookup(self, key):
+        entry = self._items.get(key)
+        if entry is None: return None
+        self._items.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, item, cost):
+        old = self._items.pop(key, None)
+        if old is not None: self._bytes -= old[1]
+        self._items[key] = (item, cost)
+        self._bytes += cost
+        while self._bytes > self.budget_bytes and len(self._items) > 1:
+            _, (_, old_cost) = self._items.popitem(last=False)
+            self._bytes -= old_cost
+
+# ================= PAGE OVERVIEW =================
+# แถบรูปย่อทุกหน้า (QListView + model): view ขอ data() เฉพาะแถวที่มองเห็น จึงวาดเฉพาะหน้าที่เห็นอยู่
+#   - รูปย่อวาดใน executor จาก proxy / รูปเล็กใน cache (ดู CardPrinterApp.thumb_source) ไม่ใช่รูปเต็ม
+#   - signature ของหน้า = layout + path ในช่องของหน้านั้น วาดใหม่เมื่อ signature เปลี่ยนเท่านั้น
+#   - เก็บรูปย่อไว้ไม่เกิน MAX_THUMBS (LRU) หน่วยความจำไม่โตตามจำนวนหน้า
+
+LAYOUT_KEYS = ('paper_w', 'paper_h', 'card_w', 'card_h', 'gap', 'margin_top', 'margin_left')
+
+def render_page_thumbnail(sources, config, grid, width):
+    # sources = [(ช่องในหน้า, path)] คืน QImage (QImage/QPainter ใช้นอก GUI thread ได้ ต่างจาก QPixmap)
+    scale = width / config['paper_w']
+    image = QImage(width, max(1, round(config['paper_h'] * scale)), QImage.Format.Format_RGB32)
+    image.fill(QColor("white"))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+    for slot, path in sources:
+        pos = layout_engine.slot_position(config, grid, slot)
+        rect = QRectF(pos['x'] * scale, pos['y'] * scale, pos['w'] * scale, pos['h'] * scale)
+        w, h = max(1, round(rect.width())), max(1, round(rect.height()))
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        # decoder ย่อให้ตอนอ่าน (แนวนอน: อ่านแบบแนวตั้งแล้วหมุน เหมือนช่อง preview)
+        reader.setScaledSize(QSize(h, w) if grid.rotated else QSize(w, h))
+        card = reader.read()
+        if card.isNull():
+            painter.fillRect(rect, QColor("#d1d5db"))
+            continue
+        if grid.rotated: card = card.transformed(QTransform().rotate(90))
+        painter.drawImage(rect, card)
+    painter.end()
+    return image
+
+
+class PageOverviewModel(QAbstractListModel):
+    THUMB_W = 110
+    MAX_THUMBS = 60
 
-# ================= WORKER THREADS (API & Download) =================
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self._pages = 0
+        self._thumbs = OrderedDict() # page -> (signature, QIcon)
+        self._pending = {} # page -> signature ที่กำลังวาด (หน้าละงานเดียว)
+        self._placeholder = None
+        self.token = CancelToken()
 
-class APIWorker(QThread):
-    search_finished = pyqtSignal(list)
-    def __init__(self, query):
-        super().__init__()
-        self.query = query
-    def run(self):
-        try:
-            url = "https://db.ygoprodeck.com/api/v7/cardinfo.php"
-            params = {"fname": self.query}
-            r = requests.get(url, params=params, timeout=10)
-            if r.status_code == 200: self.search_finished.emit(r.json().get("data", []))
-            else: self.search_finished.emit([])
-        except: self.search_finished.emit([])
-
-class ImageDownloadWorker(QThread):
-    download_finished = pyqtSignal(str)
-    download_error = pyqtSignal(str)
-    def __init__(self, url, temp_dir, name):
-        super().__init__()
-        self.url, self.temp_dir, self.name = url, temp_dir, name
-    def run(self):
-        try:
-            r = requests.get(self.url, timeout=15)
-            if r.status_code == 200:
-                safe = "".join([c for c in self.name if c.isalnum()]) or "card"
-                path = os.path.join(self.temp_dir, f"{safe}.jpg")
-                with open(path, 'wb') as f: f.write(r.content)
-                self.download_finished.emit(path)
-            else: self.download_error.emit(str(r.status_code))
-        except Exception as e: self.download_error.emit(str(e))
-
-class DeckImportWorker(QThread):
-    progress_update = pyqtSignal(int, int)
-    image_ready = pyqtSignal(str)
-    finished_import = pyqtSignal()
-    def __init__(self, id_list, temp_dir):
-        super().__init__()
-        self.id_list, self.temp_dir = id_list, temp_dir
-    def run(self):
-        total = len(self.id_list)
-        for i, cid in enumerate(self.id_list):
-            try:
-                r = requests.get(f"https://db.ygoprodeck.com/api/v7/cardinfo.php?id={cid}", timeout=5)
-                if r.status_code == 200:
-                    img_url = r.json()["data"][0]["card_images"][0]["image_url"]
-                    ir = requests.get(img_url, timeout=10)
-                    if ir.status_code == 200:
-                        path = os.path.join(self.temp_dir, f"{cid}.jpg")
-                        with open(path, 'wb') as f: f.write(ir.content)
-                        self.image_ready.emit(path)
-            except: pass
-            self.progress_update.emit(i+1, total)
-        self.finished_import.emit()
+    def thumb_size(self):
+        cfg = self.app.config
+        return QSize(self.THUMB_W, max(1, round(self.THUMB_W * cfg['paper_h'] / cfg['paper_w'])))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._pages
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        page = index.row()
+        if role == Qt.ItemDataRole.DisplayRole: return f"{page + 1}"
+        if role == Qt.ItemDataRole.DecorationRole: return self.thumbnail(page)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            filled = sum(1 for p in self.signature(page)[2] if p)
+            return f"Page {page + 1}: {filled}/{self.app.slots_per_page} cards"
+        return None
+
+    def signature(self, page):
+        app = self.app
+        per_page = app.slots_per_page
+        base = page * per_page
+        return (tuple(app.config[k] for k in LAYOUT_KEYS), app.grid,
+                tuple(app.images_data.get(base + i) for i in range(per_page)))
+
+    def thumbnail(self, page):
+        sig = self.signature(page)
+        entry = self._thumbs.get(page)
+        if entry:
+            self._thumbs.move_to_end(page)
+            if entry[0] == sig: return entry[1]
+        if page not in self._pending:
+            self._pending[page] = sig
+            self.app.run_task(self.render, sig, dict(self.app.config), self.app.grid, token=self.token,
+                              on_done=partial(self.on_rendered, page, sig))
+        return entry[1] if entry else self.placeholder() # ระหว่างวาดใหม่ แสดงรูปเดิมไปก่อน
+
+    def placeholder(self):
+        size = self.thumb_size()
+        if self._placeholder is None or self._placeholder[0] != size:
+            pixmap = QPixmap(size)
+            pixmap.fill(QColor("#e5e7eb"))
+            self._placeholder = (size, self.icon(pixmap))
+        return self._placeholder[1]
+
+    @staticmethod
+    def icon(pixmap):
+        # หน้าที่เลือกอยู่ไม่ต้องย้อมสีทับรูป (ไฮไลต์ด้วยพื้นหลังของ item แทน)
+        icon = QIcon(pixmap)
+        icon.addPixmap(pixmap, QIcon.Mode.Selected)
+        return icon
+
+    def render(self, sig, config, grid):
+        # thread ของ executor
+        sources = [(i, self.app.thumb_source(p)) for i, p in enumerate(sig[2]) if p]
+        return render_page_thumbnail(sources, config, grid, self.THUMB_W)
+
+    def on_rendered(self, page, sig, future):
+        if self._pending.get(page) == sig: del self._pending[page]
+        if future.cancelled(): return
+        if future.exception():
+            instrument.error('overview.render', future.exception())
+            return
+        self._thumbs[page] = (sig, self.icon(QPixmap.fromImage(future.result())))
+        self._thumbs.move_to_end(page)
+        while len(self._thumbs) > self.MAX_THUMBS: self._thumbs.popitem(last=False)
+        # แจ้ง view: ถ้า signature เปลี่ยนระหว่างวาด data() จะสั่งวาดใหม่เอง
+        if page < self._pages: self.dataChanged.emit(self.index(page), self.index(page), [Qt.ItemDataRole.DecorationRole])
+
+    def refresh(self, pages):
+        # เรียกหลัง images_data / layout เปลี่ยน: ถูกมากเพราะ view ถาม data() เฉพาะแถวที่มองเห็น
+        if pages > self._pages:
+            self.beginInsertRows(QModelIndex(), self._pages, pages - 1)
+            self._pages = pages
+            self.endInsertRows()
+        elif pages < self._pages:
+            self.beginRemoveRows(QModelIndex(), pages, self._pages - 1)
+            self._pages = pages
+            self.endRemoveRows()
+            for page in [p for p in self._thumbs if p >= pages]: del self._thumbs[page]
+        if self._pages:
+            self.dataChanged.emit(self.index(0), self.index(self._pages - 1), [Qt.ItemDataRole.DecorationRole])
 
 # ================= UI WIDGETS =================
 
@@ -84,6 +309,8 @@ class CardSlot(QWidget):
         self.slot_index = slot_index
         self.parent_preview = parent_preview
         self.image_path = None
+        self.image_key = None # (path, mtime) ใช้เป็น key ของ PixmapCache
+        self.low_res = False # ใช้รูป preview อยู่ (รูปเต็มยังไม่มา)
         self.drag_start_pos = None # สำหรับจำจุดเริ่มลาก
         
         # เพิ่ม Focus Policy เพื่อให้รับ Keyboard Event ได้
@@ -133,15 +360,25 @@ class CardSlot(QWidget):
     def on_click_add(self):
         self.setFocus()
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Images (*.png *.jpg *.jpeg *.webp)")
-        if file_path: self.parent_preview.app.update_single_slot(self.slot_index, file_path)
+        if file_path: self.parent_preview.app.ingest_images([file_path], self.global_index())
 
     def remove_image(self):
         self.parent_preview.app.update_single_slot(self.slot_index, None)
         self.setFocus()
 
+    def global_index(self):
+        app = self.parent_preview.app
+        return app.current_page * app.slots_per_page + self.slot_index
+
     def update_image(self, path):
         self.image_path = path
-        if path and os.path.exists(path):
+        # stat ไฟล์ครั้งเดียวตอนเปลี่ยนรูป ไม่ต้องทำทุกครั้งที่ paint (รูปที่ผ่าน ingest แล้ววาดจาก proxy)
+        self.low_res = self.parent_preview.app.asset_tier(path) == 'preview'
+        self.setToolTip("Low-res preview: full resolution is downloaded before export" if self.low_res else "")
+        source = self.parent_preview.app.preview_source(path) if path else None
+        try: self.image_key = (source, os.path.getmtime(source)) if source else None
+        except OSError: self.image_key = None
+        if self.image_key:
             self.btn_add.hide()
             self.btn_remove.show()
         else:
@@ -154,6 +391,8 @@ class CardSlot(QWidget):
         if event.button() == Qt.MouseButton.LeftButton:
             self.setFocus() # คลิกซ้ายเพื่อเลือก (Focus)
             self.drag_start_pos = event.pos() # จำตำแหน่งคลิก
+            # Ctrl+คลิก = เพิ่ม/เอาออกจากกลุ่ม, Shift+คลิก = เลือกช่วง (ข้ามหน้าได้)
+            self.parent_preview.app.select_slot(self.global_index(), event.modifiers())
         super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
@@ -170,7 +409,10 @@ class CardSlot(QWidget):
         mime = QMimeData()
         
         # ส่งข้อมูล Index ของตัวเองไป (รูปแบบ: "swap:เลขIndex")
-        mime.setText(f"swap:{self.slot_index}")
+        # เลือกไว้หลายช่องและช่องนี้อยู่ในกลุ่ม = ย้ายทั้งกลุ่ม ("move:")
+        app = self.parent_preview.app
+        group = len(app.selection) > 1 and self.global_index() in app.selection
+        mime.setText("move:" if group else f"swap:{self.slot_index}")
         drag.setMimeData(mime)
 
         # สร้างภาพ Ghost ติดเมาส์
@@ -191,7 +433,7 @@ class CardSlot(QWidget):
     def dragEnterEvent(self, event: QDragEnterEvent):
         m = event.mimeData()
         # รับทั้งไฟล์จากข้างนอก และคำสั่ง swap จากข้างใน
-        if m.hasUrls() or (m.hasText() and m.text().startswith("swap:")):
+        if m.hasUrls() or (m.hasText() and m.text().startswith(("swap:", "move:"))):
             event.accept()
         else:
             event.ignore()
@@ -208,13 +450,19 @@ class CardSlot(QWidget):
                 self.parent_preview.app.swap_slots(source_idx, target_idx)
                 event.accept()
                 self.setFocus()
-            except: pass
+            except Exception as e: instrument.error('slot.drop', e)
+
+        # กรณี 1.5: ย้ายกลุ่มที่เลือก มาเริ่มที่ช่องนี้
+        elif m.hasText() and m.text() == "move:":
+            self.parent_preview.app.move_selection(self.global_index())
+            event.accept()
+            self.setFocus()
 
         # กรณี 2: ลากไฟล์มาจาก Windows Explorer
         elif m.hasUrls():
             file_path = m.urls()[0].toLocalFile()
             if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp')):
-                self.parent_preview.app.update_single_slot(self.slot_index, file_path)
+                self.parent_preview.app.ingest_images([file_path], self.global_index())
                 event.accept()
                 self.setFocus()
 
@@ -242,6 +490,24 @@ class CardSlot(QWidget):
         action_del.triggered.connect(self.remove_image)
         action_del.setEnabled(bool(self.image_path))
 
+        # คำสั่งกับกลุ่มที่เลือก (ช่องนี้ไม่ได้อยู่ในกลุ่ม = ทำกับช่องนี้ช่องเดียว)
+        app = self.parent_preview.app
+        idx = self.global_index()
+        count = len(app.selected_slots(idx))
+        menu.addSeparator()
+        if app.selection and idx not in app.selection:
+            action_move = menu.addAction(f"Move {len(app.selection)} selected here")
+            action_move.triggered.connect(lambda: app.move_selection(idx))
+        action_dup = menu.addAction(f"Duplicate {count} card(s) (Ctrl+D)" if count > 1 else "Duplicate (Ctrl+D)")
+        action_dup.triggered.connect(lambda: app.duplicate_selection(idx))
+        action_dup.setEnabled(bool(self.image_path) or count > 1)
+        if count > 1:
+            action_del_sel = menu.addAction(f"Delete {count} selected")
+            action_del_sel.triggered.connect(lambda: app.delete_selection(idx))
+        action_fill = menu.addAction("Fill copies...")
+        action_fill.triggered.connect(lambda: app.fill_copies(idx))
+        action_fill.setEnabled(bool(self.image_path))
+
         menu.exec(event.globalPos())
 
     # --- Keyboard Events (Ctrl+C, Ctrl+V, Delete) ---
@@ -251,7 +517,9 @@ class CardSlot(QWidget):
         elif event.matches(QKeySequence.StandardKey.Paste):
             self.paste_image()
         elif event.key() == Qt.Key.Key_Delete:
-            self.remove_image()
+            app = self.parent_preview.app
+            if len(app.selection) > 1 and self.global_index() in app.selection: app.delete_selection()
+            else: self.remove_image()
         else:
             super().keyPressEvent(event)
 
@@ -281,9 +549,10 @@ class CardSlot(QWidget):
                 path = text
         
         if path:
-            self.parent_preview.app.update_single_slot(self.slot_index, path)
+            self.parent_preview.app.ingest_images([path], self.global_index())
 
     # --- Drawing ---
+    @instrument.timed('paint.slot')
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -295,22 +564,46 @@ class CardSlot(QWidget):
             painter.setBrush(Qt.BrushStyle.NoBrush)
             painter.drawRect(rect.adjusted(1,1,-1,-1))
 
-        if self.image_path and os.path.exists(self.image_path):
-            # วาดรูป
-            painter.drawPixmap(rect, QPixmap(self.image_path))
+        selected = self.global_index() in self.parent_preview.app.selection
+
+        if self.image_key:
+            # วาดรูป (ดึงจาก cache ที่ย่อไว้พอดีขนาดช่องแล้ว)
+            app = self.parent_preview.app
+            pixmap = app.pixmap_cache.get(self.image_key, rect.size(), self.devicePixelRatioF(), app.grid.rotated)
+            if pixmap: painter.drawPixmap(rect, pixmap)
             
             # เส้นขอบบางๆ
             painter.setPen(QPen(QColor(0,0,0,50), 1))
             painter.drawRect(rect.adjusted(0,0,-1,-1))
             
             # ป้ายเลขมุมขวาล่าง
-            num = (self.parent_preview.app.current_page * 9) + self.slot_index + 1
+            num = (self.parent_preview.app.current_page * self.parent_preview.app.slots_per_page) + self.slot_index + 1
             painter.setBrush(QColor(0, 0, 0, 180))
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawRoundedRect(QRectF(rect.width()-35, rect.height()-22, 35, 22), 4, 4)
             painter.setPen(QColor("white"))
             painter.setFont(QFont("Arial", 9, QFont.Weight.Bold))
             painter.drawText(QRectF(rect.width()-35, rect.height()-22, 35, 22), Qt.AlignmentFlag.AlignCenter, f"#{num}")
+
+            # ป้าย ×N มุมซ้ายบน: รูปนี้ (หรือไฟล์เนื้อเดียวกัน / รูปเล็ก-เต็มของการ์ดเดียวกัน) อยู่ในหลายช่อง ฝังลง PDF ครั้งเดียว
+            copies = app.duplicate_count(self.image_path)
+            if copies > 1:
+                painter.setBrush(QColor(13, 148, 136, 210))
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.drawRoundedRect(QRectF(0, 0, 38, 22), 4, 4)
+                painter.setPen(QColor("white"))
+                painter.drawText(QRectF(0, 0, 38, 22), Qt.AlignmentFlag.AlignCenter, f"×{copies}")
+
+            # ป้าย LOW มุมซ้ายล่าง: ยังเป็นรูป preview
+            if self.low_res:
+                painter.setBrush(QColor(217, 119, 6, 200))
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.drawRoundedRect(QRectF(0, rect.height()-22, 38, 22), 4, 4)
+                painter.setPen(QColor("white"))
+                painter.drawText(QRectF(0, rect.height()-22, 38, 22), Qt.AlignmentFlag.AlignCenter, "LOW")
+
+            # อยู่ในกลุ่มที่เลือก: ทับสีชมพูจางๆ
+            if selected: painter.fillRect(rect, QColor(236, 72, 153, 60))
         else:
             # วาดเส้นประ
             painter.setPen(QPen(QColor("#798b8d"), 2, Qt.PenStyle.DashLine))
@@ -321,18 +614,40 @@ class CardSlot(QWidget):
             painter.setPen(QColor("#1e1f1f"))
             painter.setFont(QFont("Arial", 16, QFont.Weight.Bold))
             text_rect = QRectF(0, 5, rect.width(), 30)
-            num = (self.parent_preview.app.current_page * 9) + self.slot_index + 1
+            num = (self.parent_preview.app.current_page * self.parent_preview.app.slots_per_page) + self.slot_index + 1
             painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, f"#{num}")
 
+        if selected:
+            painter.setPen(QPen(QColor("#ec4899"), 3))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRect(rect.adjusted(4,4,-4,-4))
+
 # --- Search Tab ---
 class YGOSearchTab(QWidget):
+    DEBOUNCE_MS = 300
+    MIN_TYPED_QUERY = 3 # พิมพ์ไม่ถึงนี้ยังไม่ค้นอัตโนมัติ (กด Enter ได้เสมอ)
+
     def __init__(self, main_app):
         super().__init__()
         self.main_app = main_app
-        self.temp_dir = main_app.temp_dir
-        self.download_threads = [] 
+        self.cache = main_app.image_cache
+        self.service = main_app.search_service
+        self.pending = None # (query, future) ที่กำลังรอผล
+        self.results = []
+        self.thumb_token = CancelToken() # ยกเลิกรูปเล็กของผลค้นหาเก่าที่ยังรอคิว
+        self.search_generation = 0
+        self.placeholder_icon = self.make_placeholder_icon()
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(self.DEBOUNCE_MS)
+        self.debounce.timeout.connect(self.start_search)
         self.init_ui()
 
+    def make_placeholder_icon(self):
+        pixmap = QPixmap(60, 87)
+        pixmap.fill(QColor("#374151"))
+        return QIcon(pixmap)
+
     def init_ui(self):
         layout = QVBoxLayout(self)
         
@@ -340,12 +655,13 @@ class YGOSearchTab(QWidget):
         self.inp_search = QLineEdit()
         self.inp_search.setPlaceholderText("Enter card name...")
         self.inp_search.setStyleSheet("padding: 8px; border-radius: 4px; background: #111; color: white; border: 1px solid #555;")
-        self.inp_search.returnPressed.connect(self.start_search)
+        self.inp_search.returnPressed.connect(self.search_now)
+        self.inp_search.textChanged.connect(self.on_text_changed)
         
         self.btn_search = QPushButton("🔍")
         self.btn_search.setFixedSize(40, 35)
         self.btn_search.setStyleSheet("background-color: #ec4899; border-radius: 4px;")
-        self.btn_search.clicked.connect(self.start_search)
+        self.btn_search.clicked.connect(self.search_now)
         
         search_layout.addWidget(self.inp_search)
         search_layout.addWidget(self.btn_search)
@@ -359,60 +675,124 @@ class YGOSearchTab(QWidget):
         self.list_widget.setIconSize(QSize(60, 87))
         self.list_widget.setStyleSheet("QListWidget { background-color: #222; border: none; } QListWidget::item { padding: 5px; } QListWidget::item:selected { background-color: #ec4899; }")
         self.list_widget.itemClicked.connect(self.on_item_clicked)
+        # เลื่อนลงสุดแล้วโหลดหน้าถัดไป
+        self.list_widget.verticalScrollBar().valueChanged.connect(self.on_scroll)
         layout.addWidget(self.list_widget)
 
+    def on_text_changed(self, text):
+        text = text.strip()
+        if len(text) >= self.MIN_TYPED_QUERY or (text.isdigit() and len(text) >= 5):
+            self.debounce.start()
+        else:
+            self.debounce.stop()
+
+    def search_now(self):
+        self.debounce.stop()
+        self.start_search()
+
     def start_search(self):
         query = self.inp_search.text().strip()
         if not query: return
+        if self.pending:
+            # คำค้นเก่ายังไม่เสร็จ: ไม่รอผลแล้ว (ถ้ายังไม่เริ่มจะถูกถอดจากคิว)
+            self.service.cancel(*self.pending)
+            self.pending = None
+        self.cancel_thumbnails()
+        self.search_generation += 1
         self.list_widget.clear()
-        self.btn_search.setEnabled(False)
+
+        # เคยค้นแล้ว: ได้ผลจาก memory ทันที
+        cards = self.service.cached(query)
+        if cards is not None:
+            self.show_results(cards)
+            return
+
         self.lbl_status.setText(f"Searching '{query}'...")
-        
-        self.worker = APIWorker(query)
-        self.worker.search_finished.connect(self.on_search_finished)
-        self.worker.start()
+        future = self.service.search(query)
+        self.pending = (query, future)
+        generation = self.search_generation
+        future.add_done_callback(self.main_app.bridge.wrap(lambda f: self.on_search_finished(generation, f)))
+
+    def cancel_thumbnails(self):
+        self.thumb_token.cancel()
+        self.thumb_token = CancelToken()
+
+    def on_search_finished(self, generation, future):
+        if generation != self.search_generation or future.cancelled(): return # ผลของการค้นหาเก่า
+        self.pending = None
+        error = future.exception()
+        if error:
+            self.lbl_status.setText(f"Search failed: {error}")
+            return
+        self.show_results(future.result())
 
-    def on_search_finished(self, cards):
-        self.btn_search.setEnabled(True)
-        self.lbl_status.setText("")
+    def show_results(self, cards):
+        self.results = cards
+        self.list_widget.clear()
         if not cards:
             self.lbl_status.setText("No cards found.")
             return
+        self.show_next_page()
 
-        for card in cards[:30]:
+    def on_scroll(self, value):
+        if value >= self.list_widget.verticalScrollBar().maximum() and self.list_widget.count() < len(self.results):
+            self.show_next_page()
+
+    def show_next_page(self):
+        shown = self.list_widget.count()
+        number = shown // search_service.PAGE_SIZE
+        for card in search_service.page(self.results, number):
             name = card.get("name", "Unknown")
             images = card.get("card_images", [])
+            item = QListWidgetItem(name)
             if images:
                 img_url_small = images[0].get("image_url_small")
                 img_url_big = images[0].get("image_url")
-                item = QListWidgetItem(name)
+                img_id = images[0].get("id", card.get("id"))
                 item.setData(Qt.ItemDataRole.UserRole, img_url_big) 
-                try:
-                    data = requests.get(img_url_small, timeout=2).content
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(data)
-                    item.setIcon(QIcon(pixmap))
-                except: pass
-                self.list_widget.addItem(item)
+                item.setData(Qt.ItemDataRole.UserRole + 1, img_id)
+                # แสดงรายการทันที รูปเล็กค่อยตามมาจาก background
+                cached = self.cache.get(img_id, 'small')
+                item.setIcon(QIcon(cached) if cached else self.placeholder_icon)
+                if not cached and img_url_small:
+                    self.main_app.run_task(fetch_thumbnail, self.cache, img_id, img_url_small, token=self.thumb_token,
+                                           on_done=partial(self.on_thumbnail_ready, self.search_generation,
+                                                           self.list_widget.count()))
+            else:
+                item.setFlags(Qt.ItemFlag.NoItemFlags) # ไม่มีรูปให้ดาวน์โหลด
+            self.list_widget.addItem(item)
+        self.lbl_status.setText(f"{self.list_widget.count()} of {len(self.results)} cards")
+
+    def on_thumbnail_ready(self, generation, row, future):
+        if generation != self.search_generation or future.cancelled() or future.exception() or not future.result(): return
+        item = self.list_widget.item(row)
+        if not item: return
+        path, data = future.result()
+        pixmap = QPixmap()
+        if data is not None and pixmap.loadFromData(data): item.setIcon(QIcon(pixmap))
+        else: item.setIcon(QIcon(path))
 
     def on_item_clicked(self, item):
         big_url = item.data(Qt.ItemDataRole.UserRole)
+        img_id = item.data(Qt.ItemDataRole.UserRole + 1)
         name = item.text()
         self.lbl_status.setText(f"Downloading: {name}...")
         self.list_widget.setEnabled(False)
         
-        downloader = ImageDownloadWorker(big_url, self.temp_dir, name)
-        downloader.download_finished.connect(self.on_download_success)
-        downloader.download_error.connect(self.on_download_error)
-        self.download_threads.append(downloader)
-        downloader.start()
-
-    def on_download_success(self, file_path):
+        # ผู้ใช้กดรออยู่: แซงคิว import / รูปเล็ก
+        self.main_app.run_task(fetch_image_data, self.cache, img_id, 'full', big_url, 15, priority=INTERACTIVE,
+                               on_done=self.on_download_done)
+
+    def on_download_done(self, future):
+        if future.cancelled(): return
+        if future.exception():
+            self.on_download_error(str(future.exception()))
+            return
+        file_path, data = future.result()
+        if data is not None: self.main_app.pixmap_cache.prime(file_path, data)
         self.lbl_status.setText("Download Complete!")
         self.list_widget.setEnabled(True)
-        success = self.main_app.add_image_to_next_free_slot(file_path)
-        if not success:
-             QMessageBox.warning(self, "Page Full", "No empty slots on this page.")
+        self.main_app.add_image_to_next_free_slot(file_path) # ช่องเต็มจะเพิ่มหน้าใหม่ให้เอง วางได้เสมอ
 
     def on_download_error(self, error_msg):
         self.lbl_status.setText(f"Error: {error_msg}")
@@ -426,33 +806,114 @@ class CardPrinterApp(QMainWindow):
         self.setGeometry(100, 100, 1300, 850)
         self.setStyleSheet("background-color: #1e1e1e; color: white;")
 
-        self.temp_dir = tempfile.mkdtemp()
-        self.images_data = {} 
+        self.tasks = TaskExecutor() # thread pool เดียวของทั้งโปรแกรม
+        self.bridge = TaskBridge(self)
+        self.image_cache = CardImageCache()
+        self.pixmap_cache = PixmapCache()
+        self.export_cache = ExportCache() # export ซ้ำทำใหม่เฉพาะหน้าที่เปลี่ยน
+        self.asset_index = AssetIndex(self.image_cache) # รูปซ้ำคนละ path (ดู asset_index.py)
+        self.asset_groups = {} # path -> path ตัวแทนกลุ่ม จากการตรวจรอบล่าสุด
+        self.duplicate_counts = {} # path -> จำนวนช่องที่ใช้รูปกลุ่มเดียวกัน
+        self.duplicate_token = None
+        self.card_index = CardIndex.open_default()
+        self.search_service = None # สร้างพร้อมแท็บค้นหาตอนเปิดแท็บครั้งแรก
+        self.images_data = CardLayout()
+        self.history = EditHistory() # undo/redo เก็บเป็น diff ของช่องที่เปลี่ยน (layout_model.py)
+        self.selection = set() # global index ที่เลือกไว้ (ข้ามหน้าได้)
+        self.selection_anchor = None # ช่องที่คลิกล่าสุด สำหรับ Shift+คลิก
+        self.pending_images = [] # รูปจาก import ที่รอวางเป็น batch 
+        self.image_meta = {} # path -> ข้อมูลจาก ingest (ขนาด, mode, sha1, proxy)
+        self.ingest_futures = set()
         self.current_page = 0 
         self.max_page_reached = 0
-        self.import_worker = None
-        
-        self.config = {
-            'card_w': 59, 'card_h': 86, 'gap': 4, 
-            'margin_top': 15, 'margin_left': 12,
-            'paper_w': 210, 'paper_h': 297
-        }
-        
-        self.card_presets = {
-            "Custom": (0, 0),
-            "Vanguard/YGO (59x86)": (59, 86),
-            "Pokemon/MTG (63x88)": (63, 88),
-        }
-        self.paper_presets = {
-            "A4": (210, 297), "A3": (297, 420), "Letter": (215.9, 279.4)
-        }
+        self.import_token = None
+        self.import_group = None # ทุก batch ของ import เดียวกันรวมเป็น undo ครั้งเดียว
+        self.upgrade_future, self.upgrade_token = None, None
+        self.pending_upgrades = {} # path รูปเล็ก -> path รูปเต็ม ที่รอเปลี่ยนเป็น batch
+        self.export_future, self.export_token = None, None
+        
+        self.config = dict(export_engine.DEFAULT_CONFIG)
+        self.grid = layout_engine.compute_grid(self.config)
+        
+        self.card_presets = {"Custom": (0, 0), **export_engine.CARD_PRESETS}
+        self.paper_presets = dict(export_engine.PAPER_PRESETS)
         self.controls = {} 
+
+        # แก้ไข layout: undo/redo + คำสั่งกับช่องที่เลือก
+        self.action_undo = QAction("Undo", self)
+        self.action_undo.setShortcut(QKeySequence.StandardKey.Undo)
+        self.action_undo.triggered.connect(self.undo)
+        self.action_redo = QAction("Redo", self)
+        self.action_redo.setShortcuts([QKeySequence("Ctrl+Y"), QKeySequence("Ctrl+Shift+Z")])
+        self.action_redo.triggered.connect(self.redo)
+        self.action_select_all = QAction("Select all cards", self)
+        self.action_select_all.setShortcut(QKeySequence("Ctrl+A"))
+        self.action_select_all.triggered.connect(self.select_all)
+        self.action_duplicate = QAction("Duplicate selected", self)
+        self.action_duplicate.setShortcut(QKeySequence("Ctrl+D"))
+        self.action_duplicate.triggered.connect(lambda: self.duplicate_selection())
+        self.action_clear_selection = QAction("Clear selection", self)
+        self.action_clear_selection.setShortcut(QKeySequence("Esc"))
+        self.action_clear_selection.triggered.connect(self.clear_selection)
+        for action in [self.action_undo, self.action_redo, self.action_select_all, self.action_duplicate,
+                       self.action_clear_selection]:
+            self.addAction(action)
+
         self.init_ui()
 
+        # Ctrl+Shift+P: เริ่ม/หยุดเก็บ profile (ดู instrument.py) หยุดแล้วเขียน trace + สรุปผล
+        self.action_profile = QAction("Toggle profiling", self)
+        self.action_profile.setShortcut(QKeySequence("Ctrl+Shift+P"))
+        self.action_profile.triggered.connect(self.toggle_profiling)
+        self.addAction(self.action_profile)
+
     def closeEvent(self, event):
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        # ปิดโปรแกรมระหว่าง export: หยุดและลบไฟล์ชั่วคราวก่อน
+        # ปิดโปรแกรมระหว่าง import: หยุดโหลดรูปที่เหลือ
+        # หยุด timer ทุกตัวก่อนปิด executor (timer ที่ยิงหลังจากนี้จะส่งงานเข้า executor ที่ปิดแล้ว)
+        for timer in [self.task_timer, self.duplicate_timer]: timer.stop()
+        if self.tab_search: self.tab_search.debounce.stop()
+        self.pending_images.clear() # singleShot ของ batch ที่ยังไม่ถึงเวลา ยิงมาแล้วไม่มีอะไรให้ทำ
+        self.pending_upgrades.clear()
+        if self.import_token: self.import_token.cancel()
+        if self.upgrade_token: self.upgrade_token.cancel()
+        if self.export_token: self.export_token.cancel()
+        if self.search_service: self.search_service.shutdown()
+        if self.duplicate_token: self.duplicate_token.cancel()
+        self.page_overview.token.cancel()
+        self.bridge.close() # งานที่ค้าง/ถูกยกเลิกไม่เรียก callback กลับมาที่หน้าต่างที่กำลังปิด
+        self.tasks.shutdown()
+        futures_wait([f for f in [self.export_future, *self.ingest_futures] if f])
+        trace = os.environ.get(instrument.TRACE_ENV)
+        if trace and instrument.enabled():
+            instrument.dump_trace(trace)
+            with open(trace + ".txt", 'w', encoding='utf-8') as f: f.write(instrument.report())
         super().closeEvent(event)
 
+    def toggle_profiling(self):
+        if not instrument.enabled():
+            instrument.reset()
+            instrument.enable()
+            self.setWindowTitle(self.windowTitle() + " [profiling]")
+            return
+        instrument.enable(False)
+        self.setWindowTitle(self.windowTitle().removesuffix(" [profiling]"))
+        folder = os.path.join(default_cache_dir(), "traces")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        instrument.dump_trace(path)
+        text = instrument.report()
+        with open(path[:-5] + ".txt", 'w', encoding='utf-8') as f: f.write(text)
+        box = QMessageBox(QMessageBox.Icon.Information, "Profile", f"Trace saved to:\n{path}", parent=self)
+        box.setDetailedText(text)
+        box.exec()
+
+    def run_task(self, fn, *args, priority=NORMAL, token=None, on_done=None, **kwargs):
+        # on_done(future) ถูกเรียกใน GUI thread
+        future = self.tasks.submit(fn, *args, priority=priority, token=token, **kwargs)
+        if on_done: future.add_done_callback(self.bridge.wrap(on_done))
+        return future
+
     def init_ui(self):
         main_layout = QHBoxLayout()
         
@@ -473,20 +934,51 @@ class CardPrinterApp(QMainWindow):
         self.setup_settings_tab()
         self.tabs.addTab(self.tab_settings, "⚙️ Settings")
 
-        self.tab_search = YGOSearchTab(self)
-        self.tabs.addTab(self.tab_search, "🐉 Search")
+        # แท็บค้นหาสร้างตอนเปิดดูครั้งแรก หน้าต่างแรกขึ้นเร็วขึ้น
+        self.tab_search = None
+        self.search_page = QWidget()
+        QVBoxLayout(self.search_page).setContentsMargins(0, 0, 0, 0)
+        self.tabs.addTab(self.search_page, "🐉 Search")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         left_layout.addWidget(self.tabs)
         main_layout.addWidget(left_container)
 
         # Right Panel
         self.preview_area = PreviewWidget(self)
+
+        # แถบรูปย่อทุกหน้า คลิกเพื่อกระโดดไปหน้านั้น
+        self.page_overview = PageOverviewModel(self)
+        self.page_view = QListView()
+        self.page_view.setModel(self.page_overview)
+        self.page_view.setViewMode(QListView.ViewMode.IconMode)
+        self.page_view.setFlow(QListView.Flow.TopToBottom)
+        self.page_view.setWrapping(False)
+        self.page_view.setMovement(QListView.Movement.Static)
+        self.page_view.setUniformItemSizes(True)
+        self.page_view.setSpacing(6)
+        self.page_view.setFixedWidth(PageOverviewModel.THUMB_W + 40)
+        self.page_view.setStyleSheet("QListView { background-color: #181818; border: none; color: #aaa; }"
+                                     "QListView::item:selected { background-color: #ec4899; color: white; }")
+        self.page_view.selectionModel().currentChanged.connect(lambda index, _: self.jump_to_page(index.row()))
         
         container = QWidget()
         container.setLayout(main_layout)
         main_layout.addWidget(self.preview_area)
+        main_layout.addWidget(self.page_view)
         self.setCentralWidget(container)
         self.update_ui_state()
+        self.apply_layout_change()
+
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.search_page: self.ensure_search_tab()
+
+    def ensure_search_tab(self):
+        if self.tab_search is None:
+            self.search_service = SearchService(self.card_index, pool=self.tasks.lane(INTERACTIVE))
+            self.tab_search = YGOSearchTab(self)
+            self.search_page.layout().addWidget(self.tab_search)
+        return self.tab_search
 
     def setup_settings_tab(self):
         layout = QVBoxLayout(self.tab_settings)
@@ -522,6 +1014,17 @@ class CardPrinterApp(QMainWindow):
         self.create_control_row(layout, "Gap (mm)", 'gap', 0, 20)
         self.create_control_row(layout, "Margin Top", 'margin_top', 0, 100)
         self.create_control_row(layout, "Margin Left", 'margin_left', 0, 100)
+
+        grid_row = QHBoxLayout()
+        self.chk_rotate = QCheckBox("Rotate to fit more")
+        self.chk_rotate.setStyleSheet("color: #d1d5db;")
+        self.chk_rotate.toggled.connect(self.toggle_rotate)
+        self.lbl_grid = QLabel("")
+        self.lbl_grid.setStyleSheet("color: #0ea5e9; font-size: 11px;")
+        grid_row.addWidget(self.chk_rotate)
+        grid_row.addStretch()
+        grid_row.addWidget(self.lbl_grid)
+        layout.addLayout(grid_row)
         
         layout.addSpacing(15)
         
@@ -572,15 +1075,70 @@ class CardPrinterApp(QMainWindow):
         nav_layout.addWidget(self.lbl_page)
         nav_layout.addWidget(self.btn_next)
         page_layout.addLayout(nav_layout)
+
+        edit_layout = QHBoxLayout()
+        self.btn_undo = QPushButton("↶ Undo")
+        self.btn_undo.clicked.connect(self.undo)
+        self.btn_redo = QPushButton("Redo ↷")
+        self.btn_redo.clicked.connect(self.redo)
+        for btn in [self.btn_undo, self.btn_redo]:
+            btn.setStyleSheet("background-color: #4b5563; padding: 5px;")
+            edit_layout.addWidget(btn)
+        page_layout.addLayout(edit_layout)
         layout.addWidget(page_group)
         
         layout.addSpacing(10)
 
+        profile_row = QHBoxLayout()
+        profile_row.addWidget(QLabel("Export Quality:", styleSheet="color: #aaa;"))
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(export_engine.EXPORT_PROFILES.keys())
+        self.profile_combo.setCurrentText(export_engine.DEFAULT_PROFILE)
+        self.profile_combo.setStyleSheet(self.combo_style())
+        for i, (name, prof) in enumerate(export_engine.EXPORT_PROFILES.items()):
+            self.profile_combo.setItemData(i, f"{prof['dpi']} DPI, JPEG quality {prof['quality']}", Qt.ItemDataRole.ToolTipRole)
+        profile_row.addWidget(self.profile_combo, 1)
+        layout.addLayout(profile_row)
+
         self.btn_export = QPushButton("📄 Export PDF")
         self.btn_export.setStyleSheet("background-color: #8b5cf6; color: white; padding: 15px; font-weight: bold; font-size: 16px; border-radius: 8px;")
         self.btn_export.clicked.connect(self.generate_pdf)
         layout.addWidget(self.btn_export)
 
+        self.export_pbar = QProgressBar()
+        self.export_pbar.setStyleSheet("QProgressBar { border: 1px solid #555; border-radius: 5px; text-align: center; } QProgressBar::chunk { background-color: #8b5cf6; }")
+        self.export_pbar.hide()
+        layout.addWidget(self.export_pbar)
+
+        # งานเบื้องหลัง (TaskExecutor.stats) อัปเดตทุกวินาที
+        self.lbl_tasks = QLabel("")
+        self.lbl_tasks.setStyleSheet("color: #6b7280; font-size: 11px;")
+        layout.addWidget(self.lbl_tasks)
+        self.task_timer = QTimer(self)
+        self.task_timer.timeout.connect(self.update_task_counters)
+        self.task_timer.start(1000)
+
+        # ตรวจรูปซ้ำหลัง layout เปลี่ยน (รวบการแก้ติดๆ กันเป็นรอบเดียว)
+        self.duplicate_timer = QTimer(self)
+        self.duplicate_timer.setSingleShot(True)
+        self.duplicate_timer.setInterval(500)
+        self.duplicate_timer.timeout.connect(self.start_duplicate_scan)
+
+    def update_task_counters(self):
+        st = self.tasks.stats()
+        lines = []
+        if st['running'] or st['queued']:
+            lines.append(f"Tasks: {st['running']} running · {st['queued']} queued · {st['completed']} done")
+        if self.asset_groups and self.images_data:
+            unique = len({self.asset_groups.get(p, p) for p in self.images_data.values()})
+            if unique < len(self.images_data):
+                lines.append(f"{len(self.images_data)} cards · {unique} unique images")
+        low = sum(1 for p in self.images_data.values() if self.asset_tier(p) == 'preview')
+        if low:
+            when = "downloading" if self.upgrade_future and not self.upgrade_future.done() else "fetched at export"
+            lines.append(f"{low} slot(s) low-res preview · full resolution {when}")
+        self.lbl_tasks.setText("\n".join(lines))
+
     def combo_style(self):
         return """
             QComboBox { background-color: #374151; border: 1px solid #4b5563; border-radius: 4px; padding: 5px; color: white; }
@@ -625,7 +1183,29 @@ class CardPrinterApp(QMainWindow):
 
     def update_config(self, key, value):
         self.config[key] = value
+        self.apply_layout_change()
+
+    @property
+    def slots_per_page(self):
+        return layout_engine.per_page(self.grid)
+
+    def apply_layout_change(self):
+        # คำนวณ grid ใหม่ทุกครั้งที่ config เปลี่ยน ถ้าจำนวนช่องต่อหน้าเปลี่ยน การ์ดจะไหลไปหน้าอื่นตาม index เดิม
+        grid = layout_engine.compute_grid(self.config)
+        self.lbl_grid.setText(f"{grid.cols} × {grid.rows} = {grid.cols * grid.rows} cards / page"
+                              + (" (rotated)" if grid.rotated else ""))
+        if grid != self.grid:
+            self.grid = grid
+            self.max_page_reached = 0
+            self.current_page = min(self.current_page, self.last_page())
+            self.preview_area.rebuild_slots()
+            self.update_ui_state()
+            self.preview_area.refresh_content()
         self.preview_area.refresh_layout()
+        self.refresh_overview()
+
+    def last_page(self):
+        return max(0, self.images_data.max_index()) // self.slots_per_page
 
     def apply_card_preset(self, text):
         if text == "Custom": return
@@ -637,7 +1217,11 @@ class CardPrinterApp(QMainWindow):
         w, h = self.paper_presets[text]
         self.config['paper_w'] = w
         self.config['paper_h'] = h
-        self.preview_area.refresh_layout()
+        self.apply_layout_change()
+
+    def toggle_rotate(self, checked):
+        self.config['rotate'] = checked
+        self.apply_layout_change()
 
     # --- YDK Import Logic ---
     def import_ydk_file(self):
@@ -645,14 +1229,8 @@ class CardPrinterApp(QMainWindow):
         if not path: return
 
         # Parse ID from file
-        ids = []
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for line in lines:
-                    line = line.strip()
-                    if line.isdigit():
-                        ids.append(line)
+            ids = parse_ydk(path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Read failed: {e}")
             return
@@ -666,72 +1244,280 @@ class CardPrinterApp(QMainWindow):
         self.pbar.show()
         self.pbar.setValue(0)
         
-        self.import_worker = DeckImportWorker(ids, self.temp_dir)
-        self.import_worker.progress_update.connect(self.on_import_progress)
-        self.import_worker.image_ready.connect(self.add_image_to_next_free_slot)
-        self.import_worker.finished_import.connect(self.on_import_finished)
-        self.import_worker.start()
+        # รูปทั้งเด็คเป็นงาน BULK: ผลค้นหา / การ์ดที่ผู้ใช้กดเลือกได้คิวก่อนเสมอ
+        # โหลดรูปเล็กก่อน (เด็คขึ้นจอในไม่กี่วินาที) รูปเต็มตามมาทีหลังใน start_full_res
+        self.cancel_full_res()
+        self.import_token = self.import_group = token = CancelToken()
+        failed = []
+        def run():
+            download_deck(ids, self.image_cache, self.card_index, on_image=self.bridge.wrap(self.queue_image),
+                          on_progress=self.bridge.wrap(self.on_import_progress),
+                          on_failed=lambda cid, reason: failed.append((cid, reason)),
+                          is_cancelled=token, pool=self.tasks.lane(BULK, token), variant=PREVIEW_VARIANT)
+            return failed
+        self.run_task(run, token=token, on_done=self.on_import_finished)
 
     def on_import_progress(self, current, total):
         perc = int((current / total) * 100)
         self.pbar.setValue(perc)
         self.pbar.setFormat(f"Downloading... {current}/{total}")
 
-    def on_import_finished(self):
+    def on_import_finished(self, future):
+        self.import_token = None
         self.btn_ydk.setEnabled(True)
         self.pbar.hide()
-        QMessageBox.information(self, "Success", "Deck imported successfully!")
+        if future.cancelled(): return
+        self.flush_pending_images() # ใบที่โหลดมาแล้วก่อนพัง ยังวางตามปกติ
+        error = future.exception()
+        if error:
+            # exception ที่หลุดจาก slot ของ TaskBridge = PyQt6 ปิดโปรแกรมทันที
+            instrument.error('deck.import', error)
+            QMessageBox.critical(self, "Import failed", f"Deck import failed: {error}")
+            return
+        failed = future.result()
+        self.start_full_res()
+        if not failed:
+            QMessageBox.information(self, "Success", "Deck imported successfully!")
+            return
+        lines = [f"{cid}: {reason}" for cid, reason in failed[:15]]
+        if len(failed) > 15: lines.append(f"... and {len(failed) - 15} more")
+        QMessageBox.warning(self, "Imported with errors",
+                            f"{len(failed)} card(s) could not be downloaded:\n" + "\n".join(lines))
+
+    # --- Full resolution (รูป preview -> รูปเต็ม ใน background) ---
+    def asset_tier(self, path):
+        found = self.image_cache.variant_of(path) if path else None
+        return 'preview' if found and found[1] == PREVIEW_VARIANT else 'full'
+
+    def start_full_res(self):
+        paths = [p for p in set(self.images_data.values()) if self.asset_tier(p) == 'preview']
+        if not paths: return
+        self.cancel_full_res()
+        self.upgrade_token = token = CancelToken()
+        self.upgrade_future = self.run_task(upgrade_images, paths, self.image_cache, self.card_index,
+                                            on_upgrade=self.bridge.wrap(self.queue_upgrade), is_cancelled=token,
+                                            pool=self.tasks.lane(BULK, token), token=token)
+
+    def cancel_full_res(self):
+        if self.upgrade_token: self.upgrade_token.cancel()
+        self.upgrade_future, self.upgrade_token = None, None
+
+    def queue_upgrade(self, small, full):
+        # รูปเต็มมาทีละใบ: เปลี่ยนเป็น batch ทุก 200ms วาดหน้าใหม่ครั้งเดียว
+        self.pending_upgrades[small] = full
+        if len(self.pending_upgrades) == 1:
+            QTimer.singleShot(200, self.flush_upgrades)
+
+    def flush_upgrades(self):
+        mapping, self.pending_upgrades = self.pending_upgrades, {}
+        self.history.replace_paths(mapping) # ไม่ใช่การแก้ของผู้ใช้ ไม่เข้า undo แต่ undo แล้วต้องได้รูปเต็ม
+        if self.images_data.replace_paths(mapping): self.preview_area.refresh_content()
 
     # --- Common Logic ---
     def add_image_to_next_free_slot(self, file_path):
-        start_idx = self.current_page * 9
-        for i in range(9):
-            idx = start_idx + i
-            if idx not in self.images_data:
-                self.update_single_slot(i, file_path)
-                return True
-        
-        # ถ้าหน้าเต็ม ให้เปิดหน้าใหม่แล้วใส่เลย
-        self.add_new_page()
-        return self.add_image_to_next_free_slot(file_path)
+        return bool(self.add_images([file_path]))
+
+    def add_images(self, paths, label=None, group=None):
+        # วางทีละหลายรูปในช่องว่างถัดไป (เริ่มจากหน้าปัจจุบัน) เป็นคำสั่งเดียว (undo ทีเดียว) refresh หน้าจอครั้งเดียว
+        if not paths: return []
+        placed = self.images_data.free_slots(len(paths), self.current_page * self.slots_per_page)
+        self.current_page = placed[-1] // self.slots_per_page
+        self.edit(label or f"Add {len(paths)} image(s)", dict(zip(placed, paths)), group=group)
+        return placed
+
+    def queue_image(self, path):
+        # รูปจาก import มาทีละใบ: รวมเป็น batch แล้ววางพร้อมกันทุก 100ms
+        self.pending_images.append(path)
+        if len(self.pending_images) == 1:
+            QTimer.singleShot(100, self.flush_pending_images)
+
+    def flush_pending_images(self):
+        paths, self.pending_images = self.pending_images, []
+        self.add_images(paths, "Import deck", group=self.import_group)
 
     def update_single_slot(self, slot_idx_on_page, path):
-        global_idx = (self.current_page * 9) + slot_idx_on_page
-        if path is None:
-            if global_idx in self.images_data: del self.images_data[global_idx]
-        else:
-            self.images_data[global_idx] = path
-        self.preview_area.refresh_content()
+        global_idx = (self.current_page * self.slots_per_page) + slot_idx_on_page
+        self.edit("Delete image" if path is None else "Set image", {global_idx: path})
 
     # --- SWAP LOGIC (NEW) ---
     def swap_slots(self, source_slot_idx, target_slot_idx):
         if source_slot_idx == target_slot_idx: return
         
         # คำนวณ Global Index (รวมหน้าปัจจุบันเข้าไปด้วย)
-        page_offset = self.current_page * 9
+        page_offset = self.current_page * self.slots_per_page
         global_src = page_offset + source_slot_idx
         global_dest = page_offset + target_slot_idx
         
-        # ดึงข้อมูลรูป (ถ้าไม่มีจะได้ None)
-        src_img = self.images_data.get(global_src)
-        dest_img = self.images_data.get(global_dest)
-        
-        # สลับข้อมูล
-        if src_img: self.images_data[global_dest] = src_img
-        elif global_dest in self.images_data: del self.images_data[global_dest]
-            
-        if dest_img: self.images_data[global_src] = dest_img
-        elif global_src in self.images_data: del self.images_data[global_src]
-            
-        # รีเฟรชหน้าจอ
+        # สลับข้อมูล (ช่องว่างได้ None = ลบ)
+        self.edit("Swap cards", {global_dest: self.images_data.get(global_src),
+                                 global_src: self.images_data.get(global_dest)})
+
+    # --- Edit commands (undo/redo + ช่องที่เลือก) ---
+    # ทุกการแก้ images_data จากผู้ใช้ผ่าน edit(): changes ชุดเดียว = undo ครั้งเดียว = วาดหน้าจอครั้งเดียว
+    def edit(self, label, changes, select=None, group=None):
+        diff = self.images_data.apply(changes)
+        if not diff: return diff
+        self.history.record(label, diff, group)
+        if select is not None: self.selection = set(select)
+        self.after_edit()
+        return diff
+
+    def after_edit(self):
+        self.update_ui_state()
         self.preview_area.refresh_content()
 
+    def undo(self):
+        self.step_history(self.history.undo)
+
+    def redo(self):
+        self.step_history(self.history.redo)
+
+    def step_history(self, step):
+        done = step(self.images_data)
+        if not done: return
+        # ไปหน้าที่มีช่องที่เปลี่ยน ถ้าหน้าปัจจุบันไม่มีเลย
+        per_page = self.slots_per_page
+        pages = {idx // per_page for idx in done[1]}
+        if self.current_page not in pages: self.current_page = min(pages)
+        self.selection.clear()
+        self.after_edit()
+
+    def selected_slots(self, fallback=None):
+        # ช่องที่เลือก หรือช่องที่คลิกขวาถ้ามันไม่ได้อยู่ในกลุ่มที่เลือก
+        if fallback is not None and fallback not in self.selection: return [fallback]
+        return sorted(self.selection)
+
+    def select_slot(self, idx, modifiers=Qt.KeyboardModifier.NoModifier):
+        if modifiers & Qt.KeyboardModifier.ShiftModifier and self.selection_anchor is not None:
+            lo, hi = sorted((self.selection_anchor, idx))
+            self.selection |= set(range(lo, hi + 1))
+        elif modifiers & Qt.KeyboardModifier.ControlModifier:
+            self.selection ^= {idx}
+            self.selection_anchor = idx
+        else:
+            # คลิกช่องที่อยู่ในกลุ่มที่เลือกไว้แล้ว: ไม่ล้างกลุ่ม (จะลากทั้งกลุ่ม)
+            if idx not in self.selection: self.selection = {idx}
+            self.selection_anchor = idx
+        self.selection_changed()
+
+    def select_all(self):
+        self.selection = set(self.images_data.keys())
+        self.selection_changed()
+
+    def clear_selection(self):
+        if not self.selection: return
+        self.selection.clear()
+        self.selection_changed()
+
+    def selection_changed(self):
+        for slot in self.preview_area.slots: slot.update()
+        self.update_ui_state()
+
+    def delete_selection(self, fallback=None):
+        indices = self.selected_slots(fallback)
+        self.edit(f"Delete {len(indices)} card(s)", self.images_data.plan_delete(indices), select=())
+
+    def duplicate_selection(self, fallback=None):
+        changes = self.images_data.plan_duplicate(self.selected_slots(fallback))
+        if not changes: return
+        self.current_page = max(changes) // self.slots_per_page # ไปหน้าที่มีสำเนาชุดสุดท้าย
+        self.edit(f"Duplicate {len(changes)} card(s)", changes, select=changes)
+
+    def move_selection(self, target):
+        # ย้ายกลุ่มที่เลือกไปเริ่มที่ช่อง target (global index) ช่องอื่นเลื่อนตาม
+        indices = sorted(self.selection)
+        if not indices: return
+        self.edit(f"Move {len(indices)} card(s)", self.images_data.plan_move(indices, target),
+                  select=range(target, target + len(indices)))
+        self.selection_anchor = target
+
+    def fill_copies(self, idx):
+        path = self.images_data.get(idx)
+        if not path: return
+        count, ok = QInputDialog.getInt(self, "Fill copies", "Number of extra copies:", 1, 1, 999)
+        if not ok: return
+        changes = self.images_data.plan_fill(path, count, idx + 1)
+        self.edit(f"Fill {count} copies", changes, select=[idx, *changes])
+
     def bulk_upload(self):
-        files, _ = QFileDialog.getOpenFileNames(self, "Select Images", "", "Images (*.png *.jpg *.jpeg)")
+        files, _ = QFileDialog.getOpenFileNames(self, "Select Images", "", "Images (*.png *.jpg *.jpeg *.webp *.bmp)")
         if files:
-            for f in files:
-                self.add_image_to_next_free_slot(f)
-            self.update_ui_state()
+            self.ingest_images(files)
+
+    # --- Ingest (รูปจากผู้ใช้ ตรวจใน background ก่อนวาง) ---
+    def ingest_images(self, paths, target=None):
+        # target = global index ที่จะวาง หรือ None = ช่องว่างถัดไป
+        future = self.run_task(run_ingest, list(paths), on_done=partial(self.on_ingest_finished, target))
+        self.ingest_futures.add(future)
+        self.btn_upload.setText("⏳ Checking images...")
+
+    def on_ingest_finished(self, target, future):
+        self.ingest_futures.discard(future)
+        if not self.ingest_futures: self.btn_upload.setText("🖼️ Bulk Images")
+        if future.cancelled(): return
+        if future.exception():
+            instrument.error('ingest', future.exception())
+            QMessageBox.warning(self, "Skipped images", f"Could not check images: {future.exception()}")
+            return
+        results = future.result()
+        accepted, rejected = [], []
+        for path, info, error in results:
+            if info:
+                self.image_meta[path] = info
+                accepted.append(path)
+            else:
+                rejected.append(f"{os.path.basename(path)}: {error}")
+        if target is None:
+            self.add_images(accepted)
+        elif accepted:
+            self.edit("Set image", {target: accepted[0]})
+        if rejected:
+            more = f"\n... and {len(rejected) - 10} more" if len(rejected) > 10 else ""
+            QMessageBox.warning(self, "Skipped images", "\n".join(rejected[:10]) + more)
+
+    def preview_source(self, path):
+        info = self.image_meta.get(path)
+        return info['proxy'] if info else path
+
+    def thumb_source(self, path):
+        # รูปสำหรับรูปย่อหน้า: proxy ของ ingest หรือรูปเล็กใน cache ของการ์ดที่มีรูปเต็มแล้ว (เรียกจาก executor)
+        info = self.image_meta.get(path)
+        if info: return info['proxy']
+        found = self.image_cache.variant_of(path)
+        if found and found[1] != PREVIEW_VARIANT: return self.image_cache.get(found[0], PREVIEW_VARIANT) or path
+        return path
+
+    def refresh_overview(self):
+        self.page_view.setIconSize(self.page_overview.thumb_size())
+        self.page_overview.refresh(self.max_page_reached + 1)
+        index = self.page_overview.index(self.current_page)
+        if self.page_view.currentIndex() != index:
+            self.page_view.setCurrentIndex(index)
+            self.page_view.scrollTo(index)
+
+    # --- Duplicate images (ดู asset_index.py) ---
+    def start_duplicate_scan(self):
+        if self.duplicate_token: self.duplicate_token.cancel()
+        self.duplicate_token = token = CancelToken()
+        self.run_task(self.asset_index.canonical, set(self.images_data.values()), token, token=token,
+                      on_done=self.on_duplicates_found)
+
+    def on_duplicates_found(self, future):
+        if future.cancelled() or future.exception(): return
+        self.asset_groups = future.result()
+        groups = Counter(self.asset_groups.get(p, p) for p in self.images_data.values())
+        self.duplicate_counts = {p: groups[self.asset_groups.get(p, p)] for p in set(self.images_data.values())}
+        for slot in self.preview_area.slots: slot.update()
+        self.update_task_counters()
+
+    def duplicate_count(self, path):
+        return self.duplicate_counts.get(path, 1)
+
+    def jump_to_page(self, page):
+        if page < 0 or page == self.current_page: return
+        self.current_page = page
+        self.update_ui_state()
+        self.preview_area.refresh_content()
 
     def add_new_page(self):
         self.max_page_reached += 1
@@ -747,88 +1533,120 @@ class CardPrinterApp(QMainWindow):
             self.preview_area.refresh_content()
 
     def update_ui_state(self):
-        real_max_page = 0
-        if self.images_data:
-            real_max_page = max(self.images_data.keys()) // 9
+        real_max_page = self.last_page()
         if real_max_page > self.max_page_reached:
             self.max_page_reached = real_max_page
 
-        self.lbl_page.setText(f"Page {self.current_page + 1}")
+        selected = f" · {len(self.selection)} selected" if self.selection else ""
+        self.lbl_page.setText(f"Page {self.current_page + 1}{selected}")
         self.btn_prev.setEnabled(self.current_page > 0)
         self.btn_next.setEnabled(self.current_page < self.max_page_reached)
 
+        undo, redo = self.history.undo_label(), self.history.redo_label()
+        for widgets, label, name in [((self.btn_undo, self.action_undo), undo, "Undo"),
+                                     ((self.btn_redo, self.action_redo), redo, "Redo")]:
+            for w in widgets:
+                w.setEnabled(label is not None)
+                w.setToolTip(f"{name} {label.lower()}" if label else name)
+
     def generate_pdf(self):
+        if self.export_future and not self.export_future.done():
+            self.cancel_export()
+            return
         if not self.images_data:
             QMessageBox.warning(self, "Empty", "No images placed.")
             return
 
-        temp_pdf_dir = tempfile.mkdtemp()
-        try:
-            pw = self.config['paper_w']
-            ph = self.config['paper_h']
-            
-            pdf = FPDF('P', 'mm', (pw, ph))
-            pdf.set_auto_page_break(False)
-            pdf.set_compression(False)
-
-            max_idx = max(self.images_data.keys())
-            total_pdf_pages = (max_idx // 9) + 1
-
-            for p in range(total_pdf_pages):
-                pdf.add_page()
-                for s in range(9):
-                    g_idx = (p * 9) + s
-                    pos = self.calculate_pos(s)
-                    
-                    if g_idx in self.images_data:
-                        path = self.images_data[g_idx]
-                        hq_path = self.process_image(path, temp_pdf_dir, g_idx)
-                        if hq_path:
-                            pdf.image(hq_path, x=pos['x'], y=pos['y'], w=self.config['card_w'], h=self.config['card_h'])
-                    
-                    pdf.set_line_width(0.1)
-                    pdf.set_draw_color(200, 200, 200)
-                    pdf.rect(pos['x'], pos['y'], self.config['card_w'], self.config['card_h'])
-
-            save_path, _ = QFileDialog.getSaveFileName(self, "Save PDF", "Deck.pdf", "PDF (*.pdf)")
-            if save_path:
-                pdf.output(save_path)
-                QMessageBox.information(self, "Done", "PDF Exported Successfully!")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-        finally:
-            shutil.rmtree(temp_pdf_dir, ignore_errors=True)
+        # ถามที่เซฟก่อน แล้วเขียน PDF ลงไฟล์ทีละหน้าใน background
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save PDF", "Deck.pdf", "PDF (*.pdf)")
+        if not save_path: return
+
+        # ทำงานกับสำเนา ผู้ใช้แก้ layout ต่อได้ระหว่าง export
+        self.export_token = token = CancelToken()
+        on_progress = self.bridge.wrap(self.on_export_progress)
+        prepare = None
+        if any(self.asset_tier(p) == 'preview' for p in self.images_data.values()):
+            # ยังมีรูป preview: export โหลดรูปเต็มที่เหลือเอง (ผู้ใช้รออยู่ ได้คิวก่อนงาน background)
+            self.cancel_full_res()
+            prepare = partial(self.fetch_full_res, on_progress=on_progress, token=token)
+        self.export_future = self.run_task(run_export, dict(self.images_data), dict(self.config), save_path,
+                                           self.profile_combo.currentText(), self.export_cache, on_progress, token,
+                                           prepare, self.asset_index, on_done=self.on_export_done)
+        self.btn_export.setText("✖ Cancel Export")
+        self.export_pbar.setValue(0)
+        self.export_pbar.setFormat("Preparing...")
+        self.export_pbar.show()
+
+    def fetch_full_res(self, images_data, on_progress, token):
+        # รันใน executor (ไม่แตะ widget): คืน images_data ที่ทุกช่องเป็นรูปเต็ม
+        failed = []
+        upgraded = upgrade_images(images_data.values(), self.image_cache, self.card_index,
+                                  on_upgrade=self.bridge.wrap(self.queue_upgrade),
+                                  on_progress=lambda done, total: on_progress('download', done, total),
+                                  on_failed=lambda cid, reason: failed.append(f"{cid}: {reason}"),
+                                  is_cancelled=token, pool=self.tasks.lane(INTERACTIVE, token))
+        if token.cancelled: raise export_engine.ExportCancelled()
+        if failed:
+            more = f"\n... and {len(failed) - 10} more" if len(failed) > 10 else ""
+            raise RuntimeError(f"{len(failed)} card(s) have no full-resolution image:\n" + "\n".join(failed[:10]) + more)
+        return {idx: upgraded.get(path, path) for idx, path in images_data.items()}
+
+    def cancel_export(self):
+        self.export_token.cancel()
+        self.btn_export.setEnabled(False)
+        self.export_pbar.setFormat("Cancelling...")
+
+    def on_export_progress(self, stage, done, total):
+        self.export_pbar.setValue(int((done / total) * 100))
+        label = {'download': "Downloading full-res", 'cards': "Processing cards"}.get(stage, "Writing pages")
+        self.export_pbar.setFormat(f"{label}... {done}/{total}")
+
+    def reset_export_ui(self):
+        self.btn_export.setEnabled(True)
+        self.btn_export.setText("📄 Export PDF")
+        self.export_pbar.hide()
+
+    def on_export_done(self, future):
+        if future.cancelled() or isinstance(future.exception(), export_engine.ExportCancelled):
+            self.on_export_cancelled()
+        elif future.exception():
+            self.on_export_failed(str(future.exception()))
+        else:
+            self.on_export_finished(future.result())
 
-    def process_image(self, path, temp_dir, idx):
-        try:
-            img = Image.open(path)
-            if img.mode != 'RGB': img = img.convert('RGB')
-            w_px = int((self.config['card_w']/25.4)*300)
-            h_px = int((self.config['card_h']/25.4)*300)
-            img = img.resize((w_px, h_px), Image.Resampling.LANCZOS)
-            out = os.path.join(temp_dir, f"{idx}.jpg")
-            img.save(out, quality=100, subsampling=0)
-            return out
-        except: return None
+    def on_export_finished(self, path):
+        self.reset_export_ui()
+        QMessageBox.information(self, "Done", "PDF Exported Successfully!")
+
+    def on_export_failed(self, error_msg):
+        self.reset_export_ui()
+        QMessageBox.critical(self, "Error", error_msg)
+
+    def on_export_cancelled(self):
+        self.reset_export_ui()
 
     def calculate_pos(self, slot_idx):
-        c = slot_idx % 3
-        r = slot_idx // 3
-        return {
-            'x': self.config['margin_left'] + (c * (self.config['card_w'] + self.config['gap'])),
-            'y': self.config['margin_top'] + (r * (self.config['card_h'] + self.config['gap']))
-        }
+        return layout_engine.slot_position(self.config, self.grid, slot_idx)
 
 class PreviewWidget(QWidget):
     def __init__(self, app):
         super().__init__()
         self.app = app
         self.setStyleSheet("background-color: #111;")
-        self.slots = [CardSlot(i, self) for i in range(9)]
+        self.slots = []
+        self.rebuild_slots()
+
+    def rebuild_slots(self):
+        for slot in self.slots:
+            slot.hide()
+            slot.deleteLater()
+        self.slots = [CardSlot(i, self) for i in range(self.app.slots_per_page)]
+        for slot in self.slots: slot.show()
 
     def resizeEvent(self, event):
         self.refresh_layout()
 
+    @instrument.timed('ui.refresh_layout')
     def refresh_layout(self):
         w, h = self.width(), self.height()
         if w == 0 or h == 0: return
@@ -852,26 +1670,26 @@ class PreviewWidget(QWidget):
         start_y = (h - paper_pixel_h) / 2
         
         for i, slot in enumerate(self.slots):
-            c = i % 3
-            r = i // 3
-            mm_x = cfg['margin_left'] + (c * (cfg['card_w'] + cfg['gap']))
-            mm_y = cfg['margin_top'] + (r * (cfg['card_h'] + cfg['gap']))
+            pos = self.app.calculate_pos(i)
             
             slot.setGeometry(
-                int(start_x + (mm_x * scale)), 
-                int(start_y + (mm_y * scale)), 
-                int(cfg['card_w'] * scale), 
-                int(cfg['card_h'] * scale)
+                int(start_x + (pos['x'] * scale)), 
+                int(start_y + (pos['y'] * scale)), 
+                int(pos['w'] * scale), 
+                int(pos['h'] * scale)
             )
             
         self.draw_params = {'x': start_x, 'y': start_y, 'w': paper_pixel_w, 'h': paper_pixel_h}
         self.update()
 
+    @instrument.timed('ui.refresh_content')
     def refresh_content(self):
-        base_idx = self.app.current_page * 9
+        base_idx = self.app.current_page * self.app.slots_per_page
         for i, slot in enumerate(self.slots):
             slot.update_image(self.app.images_data.get(base_idx + i))
             slot.update()
+        self.app.refresh_overview()
+        self.app.duplicate_timer.start()
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -881,8 +1699,39 @@ class PreviewWidget(QWidget):
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawRect(QRectF(p['x'], p['y'], p['w'], p['h']))
 
+# ================= STARTUP PROBE =================
+# CARD_PRINT_STARTUP_PROBE=<ไฟล์.json> : จับเวลาถึงตอนวาดหน้า preview ครั้งแรก เขียนผลลงไฟล์แล้วปิดโปรแกรม
+# (เขียนลงไฟล์ เพราะ .exe แบบ --noconsole ไม่มี stdout) ใช้กับ benchmarks/bench_startup.py
+class StartupProbe(QObject):
+    def __init__(self, window, path, marks):
+        super().__init__(window)
+        self.path, self.marks = path, marks
+        window.preview_area.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and 'first_paint' not in self.marks:
+            self.marks['first_paint'] = time.perf_counter() - _T0
+            obj.removeEventFilter(self)
+            QTimer.singleShot(0, self.finish)
+        return False
+
+    def finish(self):
+        import json
+        data = {k: round(v * 1000, 1) for k, v in self.marks.items()}
+        data['frozen'] = bool(getattr(sys, 'frozen', False))
+        tmp = f"{self.path}.{os.getpid()}.part"
+        with open(tmp, 'w') as f: json.dump(data, f)
+        os.replace(tmp, self.path)
+        QApplication.instance().quit()
+
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # จำเป็นสำหรับ process pool ตอน build เป็น .exe
+    marks = {'imports': time.perf_counter() - _T0}
     app = QApplication(sys.argv)
     window = CardPrinterApp()
+    marks['window'] = time.perf_counter() - _T0
     window.show()
+    probe = os.environ.get("CARD_PRINT_STARTUP_PROBE")
+    if probe: StartupProbe(window, probe, marks)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,207 @@
+import time
+_T0 = time.perf_counter()
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# ================= COMMAND LINE / BATCH MODE =================
+# ห้าม import PyQt6 ในไฟล์นี้ ใช้ได้บน server ที่ไม่มีหน้าจอ
+#   python card_printer.py deck.ydk -o deck.pdf
+#   python card_printer.py decks/ -o out/ --jobs 4      (ทุก .ydk ในโฟลเดอร์)
+#   python card_printer.py images/ --paper A3 -o sheet.pdf
+
+import export_engine
+import layout_engine
+import http_scheduler
+import instrument
+from image_cache import CardImageCache
+from export_cache import ExportCache
+from asset_index import AssetIndex
+from card_index import CardIndex
+from deck_import import parse_ydk, download_deck
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+CARD_ALIASES = {'ygo': (59, 86), 'vanguard': (59, 86), 'pokemon': (63, 88), 'mtg': (63, 88)}
+
+
+def parse_size(text, presets):
+    key = text.strip()
+    for name, size in presets.items():
+        if name.lower() == key.lower(): return size
+    try:
+        w, h = key.lower().split('x')
+        return float(w), float(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(presets)} or WxH in mm, got '{text}'")
+
+
+def load_manifest(path, failed=None):
+    # บรรทัดละรูป: "path" หรือ "3 path" / "3x path" = 3 ใบ, '#' = comment
+    # หรือ JSON: ["a.jpg", {"path": "b.jpg", "count": 3}]
+    # ไฟล์ที่ไม่มีอยู่ไม่ถูกนับเป็นการ์ด แต่ถูกใส่ลง failed
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            entries = [(e, 1) if isinstance(e, str) else (e['path'], int(e.get('count', 1))) for e in json.load(f)]
+        else:
+            entries = []
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'): continue
+                count, _, rest = line.partition(' ')
+                if count.lower().rstrip('x').isdigit() and rest:
+                    entries.append((rest.strip(), int(count.lower().rstrip('x'))))
+                else:
+                    entries.append((line, 1))
+    paths = []
+    for p, count in entries:
+        full = os.path.join(base, p)
+        if not os.path.isfile(full):
+            if failed is not None: failed.append(f"{p}: file not found ({count} card(s))")
+            continue
+        paths.extend([full] * count)
+    return paths
+
+
+def expand_inputs(inputs):
+    # โฟลเดอร์ที่มีไฟล์ .ydk = โฟลเดอร์ของ deck, ไม่งั้นถือเป็นโฟลเดอร์รูป
+    decks = []
+    for item in inputs:
+        if os.path.isdir(item):
+            ydks = sorted(os.path.join(item, n) for n in os.listdir(item) if n.lower().endswith('.ydk'))
+            decks.extend(ydks or [item])
+        else:
+            decks.append(item)
+    return decks
+
+
+def collect_images(source, cache, index, failed=None):
+    if os.path.isdir(source):
+        return [os.path.join(source, n) for n in sorted(os.listdir(source)) if n.lower().endswith(IMAGE_EXTS)]
+    if source.lower().endswith('.ydk'):
+        on_failed = (lambda cid, reason: failed.append(f"{cid}: {reason}")) if failed is not None else None
+        return [p for p in download_deck(parse_ydk(source), cache, index, on_failed=on_failed) if p]
+    return load_manifest(source, failed)
+
+
+def render_deck(source, output, config, workers=None, profile=export_engine.DEFAULT_PROFILE):
+    t0 = time.perf_counter()
+    cache = CardImageCache()
+    failed = []
+    paths = collect_images(source, cache, CardIndex.open_default(), failed)
+    t_fetch = time.perf_counter() - t0
+    if not paths:
+        return {'input': source, 'error': 'no images found', 'failed': failed}
+
+    images_data = {i: p for i, p in enumerate(paths)}
+    unreadable = []
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        export_engine.export_pdf(images_data, config, output, temp_dir, profile, workers=workers, cache=ExportCache(),
+                                 assets=AssetIndex(cache), on_failed=unreadable.append)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    # รูปที่เปิดไม่ได้เป็นช่องว่างใน PDF: ไม่นับเป็นการ์ด
+    unreadable = set(unreadable)
+    dropped = sum(1 for p in paths if p in unreadable)
+    failed.extend(f"{p}: unreadable image" for p in sorted(unreadable))
+    return {'input': source, 'output': output, 'cards': len(paths) - dropped, 'failed': failed,
+            'pages': layout_engine.page_count(images_data, layout_engine.compute_grid(config)),
+            'fetch_s': round(t_fetch, 2), 'total_s': round(time.perf_counter() - t0, 2)}
+
+
+def _render_job(job):
+    try:
+        return render_deck(*job)
+    except Exception as e:
+        return {'input': job[0], 'error': str(e)}
+
+
+def _traced_render_job(job):
+    # ใน worker process: ส่ง span/counter ของ deck นี้กลับไปพร้อมผลลัพธ์
+    instrument.reset()
+    result = _render_job(job)
+    result['trace'] = instrument.collect()
+    return result
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="card_printer", description="Render .ydk decks, image folders or manifests to print-ready PDFs.")
+    ap.add_argument("inputs", nargs='+', help=".ydk file, image folder, manifest (.txt/.json) or folder of .ydk decks")
+    ap.add_argument("-o", "--output", help="output PDF (single input) or folder (several decks)")
+    ap.add_argument("--paper", default="A4", type=lambda t: parse_size(t, export_engine.PAPER_PRESETS), help="A4, A3, Letter or WxH mm")
+    ap.add_argument("--card", default="ygo", type=lambda t: parse_size(t, CARD_ALIASES), help="ygo, pokemon, mtg or WxH mm")
+    ap.add_argument("--margin-top", type=float, default=export_engine.DEFAULT_CONFIG['margin_top'])
+    ap.add_argument("--margin-left", type=float, default=export_engine.DEFAULT_CONFIG['margin_left'])
+    ap.add_argument("--gap", type=float, default=export_engine.DEFAULT_CONFIG['gap'])
+    ap.add_argument("--profile", default=export_engine.DEFAULT_PROFILE, choices=export_engine.EXPORT_PROFILES,
+                    help="draft (150 DPI), standard (300 DPI) or print (300 DPI, max JPEG quality)")
+    ap.add_argument("--rotate", action="store_true", help="allow rotating cards 90° when more fit per page")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="decks rendered in parallel")
+    ap.add_argument("--json", action="store_true", help="print one JSON line per deck")
+    ap.add_argument("--trace", metavar="PATH", help="record timings; write a Chrome trace to PATH and a summary to stderr")
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = dict(export_engine.DEFAULT_CONFIG)
+    config.update(paper_w=args.paper[0], paper_h=args.paper[1], card_w=args.card[0], card_h=args.card[1],
+                  margin_top=args.margin_top, margin_left=args.margin_left, gap=args.gap, rotate=args.rotate)
+    startup = time.perf_counter() - _T0
+    if args.trace:
+        os.environ[instrument.TRACE_ENV] = args.trace # worker process เปิดตามตอน import
+        instrument.enable()
+
+    decks = expand_inputs(args.inputs)
+    if len(decks) == 1 and not (args.output and os.path.isdir(args.output)):
+        output = args.output or os.path.splitext(os.path.basename(decks[0].rstrip('/\\')))[0] + ".pdf"
+        jobs = [(decks[0], output, config, None, args.profile)]
+    else:
+        out_dir = args.output or "."
+        jobs = [(d, os.path.join(out_dir, os.path.splitext(os.path.basename(d.rstrip('/\\')))[0] + ".pdf"), config, 1, args.profile)
+                for d in decks]
+
+    t0 = time.perf_counter()
+    if len(jobs) > 1 and args.jobs > 1:
+        # หลาย deck: ขนานระดับ deck แต่ละ deck ประมวลผลรูปแบบ serial (กัน process ซ้อน process)
+        # ทุก process แบ่ง rate limit ของ YGOPRODeck กัน
+        workers = min(args.jobs, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=http_scheduler.configure,
+                                 initargs=(http_scheduler.RATE_LIMIT / workers,)) as pool:
+            results = list(pool.map(_traced_render_job if args.trace else _render_job, jobs))
+        for r in results: instrument.merge(r.pop('trace', None))
+    else:
+        results = [_render_job(job) for job in jobs]
+    elapsed = time.perf_counter() - t0
+
+    failed = 0
+    for r in results:
+        if args.json:
+            print(json.dumps(r))
+        elif 'error' in r:
+            print(f"FAILED {r['input']}: {r['error']}", file=sys.stderr)
+        else:
+            print(f"{r['output']}: {r['cards']} cards, {r['pages']} pages in {r['total_s']:.2f}s (fetch {r['fetch_s']:.2f}s)")
+        if not args.json:
+            for item in r.get('failed', []): print(f"  failed {item}", file=sys.stderr)
+        # การ์ดที่หายไปจาก PDF (ดาวน์โหลด/เปิดไม่ได้) = ไม่สำเร็จ
+        failed += 'error' in r or bool(r.get('failed'))
+    if not args.json:
+        print(f"startup {startup * 1000:.0f} ms, {len(results)} deck(s) in {elapsed:.2f}s"
+              f" ({elapsed / max(1, len(results)):.2f}s/deck)")
+    if args.trace:
+        instrument.dump_trace(args.trace)
+        print(instrument.report(), file=sys.stderr)
+        print(f"trace written to {args.trace}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# -*- mode: python ; coding: utf-8 -*-
+# build แบบโฟลเดอร์ (onedir) สำหรับเปิดโปรแกรมให้เร็วที่สุด:
+#   - ไม่ต้องแตกไฟล์ลง temp ทุกครั้งที่เปิดแบบ --onefile
+#   - ไม่ใช้ UPX (ต้อง decompress ทุก DLL ตอนโหลด)
+#   - ตัด module ที่โปรแกรมไม่ใช้ออก
+# pyinstaller card_printer_onedir.spec  ->  dist/card_printer/card_printer.exe
+
+
+a = Analysis(
+    ['card_printer.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter', 'unittest', 'pydoc', 'doctest', 'test', 'pypdf', 'numpy',
+              'PyQt6.QtNetwork', 'PyQt6.QtQml', 'PyQt6.QtQuick', 'PyQt6.QtWebEngineCore', 'PyQt6.QtMultimedia'],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='card_printer',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['icon\\icon.ico'],
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='card_printer',
+)
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ygo_api
+import http_scheduler
+from image_cache import fetch_image
+import instrument
+
+# ================= DECK IMPORT (ไม่มี Qt ใช้ได้ทั้ง GUI และ command line) =================
+
+PREVIEW_VARIANT = 'small' # รูปที่ import มาแสดงก่อน (เล็กพอกับช่องบนจอ) รูปเต็มค่อยตามมา
+
+
+def parse_ydk(path):
+    ids = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.isdigit():
+                ids.append(line)
+    return ids
+
+
+@instrument.timed('deck.download')
+def download_deck(id_list, cache, index=None, on_image=None, on_progress=None, on_failed=None, http=None,
+                  is_cancelled=None, pool=None, variant='full'):
+    # คืน path ตามลำดับในเด็ค (None = ใบที่โหลดไม่ได้)
+    # on_image / on_progress ถูกเรียกตามลำดับเด็คเท่านั้น ใบที่โหลดเสร็จก่อนต้องรอใบก่อนหน้า
+    # on_failed(card_id, reason) ถูกเรียกครั้งเดียวต่อ id ที่โหลดไม่ได้
+    # is_cancelled() เป็นจริง = หยุด คืนเฉพาะส่วนที่ได้แล้ว / pool = executor ที่ใช้โหลดรูป (None = สร้างเอง)
+    # variant = 'small' : โหลดรูปเล็กไว้แสดงก่อน (PREVIEW_VARIANT) แล้วค่อย upgrade_images ทีหลัง
+    total = len(id_list)
+    unique = list(dict.fromkeys(id_list))
+    paths = {cid: cache.get(cid, variant) for cid in unique}
+    missing = [cid for cid in unique if not paths[cid]]
+
+    resolved = set(cid for cid in unique if paths[cid])
+    ordered = []
+    def flush():
+        while len(ordered) < total and id_list[len(ordered)] in resolved:
+            path = paths[id_list[len(ordered)]]
+            ordered.append(path)
+            if path and on_image: on_image(path)
+            if on_progress: on_progress(len(ordered), total)
+    flush()
+
+    def failed(cid, reason):
+        if on_failed: on_failed(cid, reason)
+
+    if missing:
+        http = http or http_scheduler.default()
+        # ถ้ามี index ในเครื่อง หา URL รูปได้เลยไม่ต้องถาม API
+        info = {}
+        if index:
+            for cid in missing:
+                card = index.card(cid)
+                if card: info[cid] = card
+        unknown = [cid for cid in missing if cid not in info]
+        info_error, info_errors = None, {}
+        if unknown:
+            try:
+                with instrument.span('deck.card_info', cards=len(unknown)):
+                    info.update(ygo_api.fetch_card_info(http, unknown, errors=info_errors))
+            except Exception as e:
+                info_error = f"card info failed: {e}"
+        own_pool = pool is None
+        if own_pool: pool = ThreadPoolExecutor(max_workers=ygo_api.MAX_CONNECTIONS)
+        futures = {}
+        try:
+            for cid in missing:
+                url = ygo_api.image_url(info[cid], cid, variant) if cid in info else None
+                if url:
+                    futures[pool.submit(fetch_image, cache, cid, variant, url, 10, http)] = cid
+                else:
+                    failed(cid, info_errors.get(cid) or info_error or ("no image" if cid in info else "unknown card id"))
+                    resolved.add(cid)
+            flush()
+            for fut in as_completed(futures):
+                if is_cancelled and is_cancelled(): break
+                cid = futures[fut]
+                try: paths[cid] = fut.result()
+                except Exception as e: failed(cid, str(e))
+                resolved.add(cid)
+                flush()
+        finally:
+            for fut in futures: fut.cancel()
+            if own_pool: pool.shutdown()
+    return ordered
+
+
+def upgrade_images(paths, cache, index=None, on_upgrade=None, on_progress=None, on_failed=None, http=None,
+                   is_cancelled=None, pool=None):
+    # รูป preview ใน cache -> รูปเต็มของการ์ดใบเดียวกัน คืน {path รูปเล็ก: path รูปเต็ม} เฉพาะใบที่ได้
+    # on_upgrade(path รูปเล็ก, path รูปเต็ม) ถูกเรียกทันทีที่แต่ละใบพร้อม (path อื่นที่ไม่ใช่ preview ถูกข้าม)
+    previews = {}
+    for path in dict.fromkeys(paths):
+        found = cache.variant_of(path) if path else None
+        if found and found[1] == PREVIEW_VARIANT: previews[found[0]] = path
+    upgraded = {}
+    def on_image(full):
+        small = previews[cache.variant_of(full)[0]]
+        upgraded[small] = full
+        if on_upgrade: on_upgrade(small, full)
+    if previews:
+        download_deck(list(previews), cache, index, on_image=on_image, on_progress=on_progress, on_failed=on_failed,
+                      http=http, is_cancelled=is_cancelled, pool=pool)
+    return upgraded
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import hashlib
+
+from image_cache import default_cache_dir, STALE_PART_SECONDS
+from ingest import file_sha1
+import instrument
+
+# ================= INCREMENTAL EXPORT CACHE =================
+# ใช้ข้ามการ export (และข้าม session) เพื่อให้ export ซ้ำหลังแก้การ์ดใบเดียว ทำใหม่แค่หน้าที่เปลี่ยน
+#   <root>/processed/<key>.jpg : รูปที่ resize/encode แล้ว key = sha1(เนื้อไฟล์ต้นฉบับ + ขนาดพิกเซล + หมุน + คุณภาพ)
+#   <root>/pages/<key>.bin     : content stream ของหน้า key = sha1(config + profile + รูปในแต่ละช่อง)
+# ชื่อ XObject ของรูปมาจาก key ของรูป (ไม่ใช่ลำดับที่ฝัง) content stream เก่าจึงใช้กับไฟล์ใหม่ได้ตรงๆ
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+FOLDERS = ('processed', 'pages')
+
+
+def default_export_cache_dir():
+    return os.path.join(default_cache_dir(), "export")
+
+
+class ExportCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_export_cache_dir()
+        self.max_bytes = max_bytes
+        self._hashes = {} # (path, size, mtime_ns) -> sha1 ของเนื้อไฟล์
+        self.stats = {}
+        for folder in FOLDERS: os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'images_hit': 0, 'images_miss': 0, 'pages_hit': 0, 'pages_miss': 0}
+
+    def content_hash(self, path):
+        # hash ไฟล์ต้นฉบับครั้งเดียวต่อ (size, mtime) ไม่ต้องอ่านไฟล์ใหม่ทุกครั้งที่ export
+        try: st = os.stat(path)
+        except OSError: return None
+        memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if memo not in self._hashes:
+            self._hashes[memo] = file_sha1(path)
+        return self._hashes[memo]
+
+    def image_key(self, path, size, rotate, profile):
+        sha = self.content_hash(path)
+        if sha is None: return None
+        raw = f"{sha}|{size[0]}x{size[1]}|{'r' if rotate else 'u'}|q{profile['quality']}s{profile['subsampling']}"
+        return hashlib.sha1(raw.encode('ascii')).hexdigest()
+
+    def page_key(self, config, profile, slot_names):
+        raw = json.dumps([sorted(config.items()), sorted(profile.items()), slot_names], default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    # --- processed images ---
+    def processed_path(self, key):
+        return os.path.join(self.root, 'processed', f"{key}.jpg")
+
+    def get_processed(self, key):
+        return self._hit(self.processed_path(key), 'images')
+
+    def partial_path(self, key):
+        return f"{self.processed_path(key)}.{os.getpid()}.part"
+
+    def commit_processed(self, key, partial):
+        path = self.processed_path(key)
+        os.replace(partial, path)
+        return path
+
+    # --- page content streams ---
+    def get_page(self, key):
+        path = self._hit(os.path.join(self.root, 'pages', f"{key}.bin"), 'pages')
+        if not path: return None
+        with open(path, 'rb') as f: return f.read()
+
+    def put_page(self, key, data):
+        path = os.path.join(self.root, 'pages', f"{key}.bin")
+        tmp = f"{path}.{os.getpid()}.part"
+        with open(tmp, 'wb') as f: f.write(data)
+        os.replace(tmp, path)
+
+    def _hit(self, path, kind):
+        try:
+            os.utime(path) # LRU ตาม mtime เหมือน CardImageCache
+            self.stats[f'{kind}_hit'] += 1
+            instrument.count(f"export_cache.{kind}_hit")
+            return path
+        except OSError:
+            self.stats[f'{kind}_miss'] += 1
+            instrument.count(f"export_cache.{kind}_miss")
+            return None
+
+    def prune(self):
+        # เรียกหลัง export: ลบไฟล์ที่ไม่ได้ใช้นานสุดจนรวมไม่เกิน max_bytes
+        entries, total, now = [], 0, time.time()
+        for folder in FOLDERS:
+            folder = os.path.join(self.root, folder)
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                try: st = os.stat(path)
+                except OSError: continue
+                if name.endswith('.part'):
+                    if now - st.st_mtime > STALE_PART_SECONDS:
+                        try: os.remove(path)
+                        except OSError: pass
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            try: os.remove(path)
+            except OSError: continue
+            total -= size
@@ -0,0 +1,234 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pdf_writer import StreamingPDFWriter, jpeg_sof
+import layout_engine
+import instrument
+
+# ================= EXPORT ENGINE =================
+# ไฟล์นี้ห้าม import PyQt6 เพราะถูกโหลดใน worker process ของ ProcessPoolExecutor
+# PIL import ตอนใช้งานจริง (GUI โหลดไฟล์นี้ตอนเปิดโปรแกรมเพื่อเอาแค่ค่าคงที่)
+
+EXPORT_DPI = 300
+MIN_POOL_JOBS = 4  # งานน้อยกว่านี้ทำเองเร็วกว่าเปิด process pool
+
+# dpi / คุณภาพ JPEG (subsampling 0 = 4:4:4, 2 = 4:2:0) / บีบ content stream ของหน้า
+EXPORT_PROFILES = {
+    'draft':    {'dpi': 150, 'quality': 75, 'subsampling': 2, 'compress': True},
+    'standard': {'dpi': 300, 'quality': 90, 'subsampling': 2, 'compress': True},
+    'print':    {'dpi': 300, 'quality': 100, 'subsampling': 0, 'compress': False},
+}
+DEFAULT_PROFILE = 'standard'
+# JPEG ต้นฉบับที่ขนาดพิกเซลอยู่ในช่วงนี้ของขนาดเป้าหมาย ฝังลง PDF ตรงๆ ไม่ decode / encode ใหม่
+# (รูปเต็มจาก YGOPRODeck 813x1185 = ~350 DPI ที่ 59x86mm)
+PASSTHROUGH_SCALE = (0.9, 1.25)
+PASSTHROUGH_ASPECT = 0.02
+PASSTHROUGH_SOF = (0xC0, 0xC1, 0xC2) # baseline / extended / progressive Huffman
+
+PAPER_PRESETS = {"A4": (210, 297), "A3": (297, 420), "Letter": (215.9, 279.4)}
+CARD_PRESETS = {"Vanguard/YGO (59x86)": (59, 86), "Pokemon/MTG (63x88)": (63, 88)}
+DEFAULT_CONFIG = {
+    'card_w': 59, 'card_h': 86, 'gap': 4,
+    'margin_top': 15, 'margin_left': 12,
+    'paper_w': 210, 'paper_h': 297,
+    'rotate': False
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def card_pixel_size(config, dpi=EXPORT_DPI):
+    return (int((config['card_w'] / 25.4) * dpi), int((config['card_h'] / 25.4) * dpi))
+
+
+def get_profile(profile):
+    return EXPORT_PROFILES[profile] if isinstance(profile, str) else profile
+
+
+def can_passthrough(path, size):
+    try: marker, precision, width, height, comps = jpeg_sof(path)
+    except (OSError, ValueError): return False
+    if marker not in PASSTHROUGH_SOF or precision != 8 or comps not in (1, 3): return False
+    sx, sy = width / size[0], height / size[1]
+    lo, hi = PASSTHROUGH_SCALE
+    return lo <= sx <= hi and lo <= sy <= hi and abs(sx / sy - 1) <= PASSTHROUGH_ASPECT
+
+
+def process_image(path, out_path, size, rotate=False, quality=100, subsampling=0, passthrough=False):
+    # คืน path ที่จะฝังลง PDF: ต้นฉบับเอง (passthrough) หรือ out_path ที่ encode ใหม่, None ถ้าเปิดรูปไม่ได้
+    if passthrough and not rotate and can_passthrough(path, size):
+        instrument.count('export.passthrough')
+        return path
+    from PIL import Image
+    try:
+        with instrument.span('export.decode'):
+            img = Image.open(path)
+            img.load()
+            if img.mode != 'RGB': img = img.convert('RGB')
+        with instrument.span('export.resize'):
+            img = img.resize(size, Image.Resampling.LANCZOS)
+            if rotate: img = img.transpose(Image.Transpose.ROTATE_270) # หมุนตามเข็ม 90° ให้ตรงกับ preview
+        with instrument.span('export.encode'):
+            img.save(out_path, 'JPEG', quality=quality, subsampling=subsampling)
+        return out_path
+    except Exception as e:
+        instrument.error('export.process_image', e)
+        return None
+
+
+def _process_job(job):
+    return process_image(*job)
+
+
+def _traced_job(job):
+    # worker process ตอนเปิด instrument: ส่ง span ของใบนี้กลับไปพร้อมผลลัพธ์ (reset ทิ้งของที่ติดมาตอน fork)
+    instrument.reset()
+    instrument.enable()
+    return _process_job(job), instrument.collect()
+
+
+def plan_jobs(images_data, size, temp_dir, rotate=False, profile=DEFAULT_PROFILE):
+    # รูปเดียวกันที่วางหลายช่อง (เช่นการ์ด 3 ใบ) ประมวลผลแค่ครั้งเดียว
+    prof = get_profile(profile)
+    outputs = {}
+    for path in images_data.values():
+        if path in outputs: continue
+        key = f"{os.path.abspath(path)}|{size[0]}x{size[1]}|{'r' if rotate else 'u'}|q{prof['quality']}s{prof['subsampling']}"
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        outputs[path] = os.path.join(temp_dir, f"{name}.jpg")
+    return [(src, out, size, rotate, prof['quality'], prof['subsampling'], True) for src, out in outputs.items()]
+
+
+def process_unique_images(images_data, config, temp_dir, profile=DEFAULT_PROFILE, workers=None,
+                          on_progress=None, is_cancelled=None, cache=None):
+    # คืน {source: path ที่จะฝัง} ถ้า path == source แปลว่าฝังต้นฉบับตรงๆ (passthrough)
+    # cache (ExportCache): รูปที่เคยประมวลผลด้วยค่าเดียวกันไม่ต้องทำใหม่ รูปใหม่เขียนลง cache แทน temp_dir
+    rotate = layout_engine.compute_grid(config).rotated
+    prof = get_profile(profile)
+    size = card_pixel_size(config, prof['dpi'])
+    jobs = plan_jobs(images_data, size, temp_dir, rotate, prof)
+    results, keys = {}, {}
+    same = {} # src ที่ประมวลผลจริง -> src อื่นที่เนื้อไฟล์เหมือนกัน (key เดียวกัน) ใช้ผลเดียวกัน
+    if cache:
+        pending, first = [], {}
+        for job in jobs:
+            src = job[0]
+            if not rotate and can_passthrough(src, size):
+                results[src] = src
+                continue
+            key = cache.image_key(src, size, rotate, prof)
+            hit = cache.get_processed(key) if key else None
+            if hit:
+                results[src] = hit
+                continue
+            if key:
+                # ไฟล์เนื้อเดียวกันคนละ path: ประมวลผลครั้งเดียว (ไม่งั้นสอง worker เขียน partial ไฟล์เดียวกัน)
+                if key in first:
+                    same.setdefault(first[key], []).append(src)
+                    continue
+                first[key] = src
+                keys[src] = key
+                job = (src, cache.partial_path(key)) + job[2:]
+            pending.append(job)
+        jobs = pending
+    total = len(results) + len(jobs) + sum(map(len, same.values()))
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    def done(src, out):
+        if out and out != src and src in keys: out = cache.commit_processed(keys[src], out)
+        results[src] = out
+        for other in same.get(src, ()): results[other] = out
+        if on_progress: on_progress('cards', len(results), total)
+        if is_cancelled and is_cancelled(): raise ExportCancelled()
+
+    if not jobs:
+        if on_progress and total: on_progress('cards', total, total)
+    elif workers <= 1 or len(jobs) < MIN_POOL_JOBS:
+        for job in jobs: done(job[0], _process_job(job))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        traced = instrument.enabled()
+        try:
+            futures = {pool.submit(_traced_job if traced else _process_job, job): job[0] for job in jobs}
+            for fut in as_completed(futures):
+                out = fut.result()
+                if traced:
+                    out, data = out
+                    instrument.merge(data)
+                done(futures[fut], out)
+        finally:
+            # ถูกยกเลิก: ทิ้งงานที่ยังไม่เริ่ม รอเฉพาะรูปที่กำลังทำอยู่
+            pool.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+@instrument.timed('export.pdf')
+def export_pdf(images_data, config, output, temp_dir, profile=DEFAULT_PROFILE, workers=None,
+               on_progress=None, is_cancelled=None, cache=None, assets=None, on_failed=None):
+    # เขียนทีละหน้าลงไฟล์ (RAM คงที่ไม่ว่ากี่หน้า) รูปแต่ละใบฝังครั้งเดียวแล้วลบไฟล์ชั่วคราวทิ้งทันที
+    # on_progress(stage, done, total): stage = 'cards' ตอนประมวลผลรูป, 'pages' ตอนเขียน PDF
+    # is_cancelled() คืน True เมื่อต้องการหยุด -> ExportCancelled และไม่มีไฟล์ output ค้าง
+    # profile: ชื่อใน EXPORT_PROFILES หรือ dict แบบเดียวกัน
+    # cache (ExportCache): export ซ้ำใช้รูปและ content stream ของหน้าที่ไม่เปลี่ยนจาก cache
+    # assets (asset_index.AssetIndex): รูปที่ซ้ำกันคนละ path ประมวลผลและฝังครั้งเดียว
+    # on_failed(path): รูปที่เปิด/ประมวลผลไม่ได้ (ช่องนั้นเป็นช่องว่างใน PDF)
+    prof = get_profile(profile)
+    if assets: images_data = assets.dedupe(images_data, is_cancelled)
+    if cache: cache.reset_stats()
+    with instrument.span('export.images'):
+        processed = process_unique_images(images_data, config, temp_dir, prof, workers, on_progress, is_cancelled, cache)
+    temp_outputs = {p for src, p in processed.items() if p and p != src and p.startswith(os.path.join(temp_dir, ''))}
+    if on_failed:
+        for src, p in processed.items():
+            if not p: on_failed(src)
+    partial = output + ".part"
+    grid = layout_engine.compute_grid(config)
+    slots = layout_engine.per_page(grid)
+    total_pages = layout_engine.page_count(images_data, grid)
+    xobject_names = {}
+    if cache:
+        # ชื่อ XObject จากเนื้อรูป + ค่าประมวลผล -> content stream ของหน้าเดิมใช้ได้ทุกครั้งที่ export
+        size = card_pixel_size(config, prof['dpi'])
+        for src in processed:
+            key = cache.image_key(src, size, grid.rotated, prof)
+            if key: xobject_names[src] = f"Im{key[:16]}"
+    try:
+        with StreamingPDFWriter(partial, config['paper_w'], config['paper_h'], prof['compress']) as pdf:
+            for p in range(total_pages):
+                if is_cancelled and is_cancelled(): raise ExportCancelled()
+                with instrument.span('export.page', page=p + 1) as page_span:
+                    names = []
+                    for s in range(slots):
+                        src = images_data.get((p * slots) + s)
+                        hq_path = processed.get(src)
+                        name = None
+                        if hq_path:
+                            # ฝังครั้งเดียวต่อชื่อ XObject (ไฟล์เนื้อเดียวกันคนละ path ได้ชื่อเดียวกัน) ไม่มีชื่อ = ต่อไฟล์
+                            name = xobject_names.get(src)
+                            name = pdf.add_jpeg(name or hq_path, hq_path, name)
+                            if hq_path in temp_outputs:
+                                temp_outputs.discard(hq_path)
+                                os.remove(hq_path)
+                        names.append(name)
+
+                    page_key = cache.page_key(config, prof, names) if cache else None
+                    content = cache.get_page(page_key) if cache else None
+                    page_span.set(cached=content is not None)
+                    if content is not None:
+                        pdf.add_page(content, {n for n in names if n})
+                    else:
+                        pdf.begin_page()
+                        for s, name in enumerate(names):
+                            pos = layout_engine.slot_position(config, grid, s)
+                            if name: pdf.draw_image(name, pos['x'], pos['y'], pos['w'], pos['h'])
+                            pdf.rect(pos['x'], pos['y'], pos['w'], pos['h'])
+                        content = pdf.end_page()
+                        if cache: cache.put_page(page_key, content)
+                if on_progress: on_progress('pages', p + 1, total_pages)
+        os.replace(partial, output)
+    finally:
+        if os.path.exists(partial): os.remove(partial)
+        if cache: cache.prune()
+    return output
@@ -0,0 +1,156 @@
+import time
+import random
+import threading
+from collections import deque
+
+import ygo_api
+import instrument
+
+# ================= HTTP SCHEDULER =================
+# ทุก request ไป YGOPRODeck (API + รูป) ผ่านตัวนี้ตัวเดียว:
+#   - token bucket คุมจำนวน request/วินาที ให้ใกล้ cap ของเว็บที่สุดแต่ไม่เกิน (เกิน = โดนแบนชั่วคราว)
+#   - connection pool ร่วมกันทุก thread (requests.Session)
+#   - 5xx / 429 / timeout / ต่อไม่ติด / body ขาดกลางทาง -> retry แบบ exponential backoff + jitter, 429 หยุดทั้ง bucket ตาม Retry-After
+#   - deadline ต่อ request (รวมเวลารอ token + retry ทั้งหมด)
+#   - ใบที่ล้มเหลวจริงถูกเก็บไว้ใน failed_items() ไม่หายเงียบ
+# get() เรียกแบบเดียวกับ requests.Session.get จึงส่งแทน session ให้โค้ดเดิมได้
+
+RATE_LIMIT = 18.0 # YGOPRODeck: 20 requests/วินาที เว้นไว้นิดหน่อย
+BURST = 1 # server นับเป็นหน้าต่าง 1 วินาที ปล่อย burst ใหญ่จะเกิน cap ง่าย
+RETRIES = 3
+BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+DEADLINE = 30.0
+MAX_FAILURES = 500
+
+
+class FetchError(Exception):
+    def __init__(self, url, reason):
+        super().__init__(f"{reason} ({url})")
+        self.url, self.reason = url, reason
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = rate, capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline):
+        # รอจนได้ token คืน False ถ้าเลย deadline ก่อน
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if now + wait > deadline: return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # server บอกว่าเร็วเกิน (429): หยุดทุก thread แล้วเริ่มใหม่จาก bucket ว่าง
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class HttpScheduler:
+    def __init__(self, rate=RATE_LIMIT, burst=BURST, pool_size=ygo_api.MAX_CONNECTIONS,
+                 retries=RETRIES, backoff=BACKOFF, deadline=DEADLINE):
+        self.session = ygo_api.make_session(pool_size)
+        self.bucket = TokenBucket(rate, burst)
+        self.retries, self.backoff, self.deadline = retries, backoff, deadline
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'failed': 0}
+        self._failures = deque(maxlen=MAX_FAILURES)
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=10, deadline=None, label=None, headers=None, stream=False):
+        # คืน Response (รวม 4xx ให้ผู้เรียกตัดสินใจเอง) หรือ raise FetchError เมื่อ retry ครบ / เลย deadline
+        # stream=True: retry เฉพาะตอนขอ (status/header) การอ่าน body เป็นหน้าที่ผู้เรียก (ดู image_cache.download)
+        import requests # โหลดไปแล้วตอนสร้าง session (make_session)
+        # stream=False อ่าน body ใน session.get: ขาดกลางทาง = ChunkedEncodingError / ContentDecodingError
+        transient = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                     requests.exceptions.ContentDecodingError)
+        end = time.monotonic() + (deadline or self.deadline)
+        attempt, reason = 0, "deadline exceeded"
+        while True:
+            with instrument.span('http.rate_wait'):
+                if not self.bucket.acquire(end): break
+            self._count('requests')
+            retry_after = None
+            try:
+                with instrument.span('http.request', label=label or url, attempt=attempt) as sp:
+                    r = self.session.get(url, params=params, headers=headers, stream=stream,
+                                         timeout=max(0.1, min(timeout, end - time.monotonic())))
+                    sp.set(status=r.status_code)
+            except transient as e:
+                reason = type(e).__name__
+            else:
+                if r.status_code == 429:
+                    r.close()
+                    self._count('throttled')
+                    retry_after = _retry_after(r)
+                    reason = "HTTP 429"
+                elif r.status_code >= 500:
+                    r.close()
+                    reason = f"HTTP {r.status_code}"
+                else:
+                    if not stream: instrument.count('http.bytes', len(r.content))
+                    return r
+            if attempt >= self.retries: break
+            delay = min(MAX_BACKOFF, self.backoff * (2 ** attempt))
+            delay = retry_after if retry_after is not None else delay / 2 + random.uniform(0, delay / 2)
+            if retry_after is not None: self.bucket.pause(delay)
+            if time.monotonic() + delay > end:
+                reason += ", deadline exceeded"
+                break
+            attempt += 1
+            self._count('retries')
+            time.sleep(delay)
+        self.record_failure(label or url, reason, url)
+        raise FetchError(url, reason)
+
+    def record_failure(self, label, reason, url=None):
+        with self._lock:
+            self.stats['failed'] += 1
+            self._failures.append({'label': label, 'reason': reason, 'url': url, 'time': time.time()})
+
+    def failed_items(self, since=0.0):
+        with self._lock: return [f for f in self._failures if f['time'] >= since]
+
+    def _count(self, key):
+        with self._lock: self.stats[key] += 1
+        instrument.count(f"http.{key}")
+
+    def close(self):
+        self.session.close()
+
+
+def _retry_after(response):
+    try: return min(MAX_BACKOFF * 4, max(0.0, float(response.headers.get('Retry-After', ''))))
+    except ValueError: return None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default():
+    # scheduler ตัวเดียวต่อ process ทุกส่วนของโปรแกรมแชร์ rate limit เดียวกัน
+    global _default
+    with _default_lock:
+        if _default is None: _default = HttpScheduler()
+        return _default
+
+
+def configure(rate=RATE_LIMIT, **kwargs):
+    # ใช้ตอนเริ่ม process (เช่น worker ของ command line ที่รันหลาย deck พร้อมกัน แบ่ง rate กัน)
+    global _default
+    with _default_lock:
+        _default = HttpScheduler(rate, **kwargs)
+        return _default
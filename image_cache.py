@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import time
+import threading
+
+import http_scheduler
+import instrument
+
+# ================= PERSISTENT CARD IMAGE CACHE =================
+# เก็บรูปการ์ดไว้ข้าม session: <root>/<variant>/<card_id>.jpg
+# LRU ใช้ mtime ของไฟล์ (ถูก touch ทุกครั้งที่ใช้งาน) เพราะ atime เชื่อถือไม่ได้บนหลายระบบ
+# รูปจากเน็ต stream ลง <card_id>.jpg.<pid>.<thread>.part ทีละ chunk ตรวจว่าครบแล้วค่อย rename เข้า cache
+# โหลดไม่จบ: เก็บส่วนที่ได้ไว้เป็น <card_id>.jpg.part ครั้งหน้าขอต่อด้วย Range (ไม่มีไฟล์ .jpg ครึ่งๆ ใน cache เลย)
+
+VARIANTS = ('full', 'small', 'cropped')
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+STALE_PART_SECONDS = 3600
+CHUNK_SIZE = 64 * 1024
+STREAM_ATTEMPTS = 3 # สายหลุดกลาง body (retry ตอนขอ request อยู่ใน http_scheduler แล้ว)
+
+
+def default_cache_dir():
+    override = os.environ.get("CARD_PRINT_CACHE_DIR")
+    if override: return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "CardPrintPromax", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "card_print_promax")
+
+
+class CardImageCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = {}  # path -> (size, mtime)
+        self._total = 0
+        for variant in VARIANTS:
+            folder = os.path.join(self.root, variant)
+            os.makedirs(folder, exist_ok=True)
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                if name.endswith(".part"):
+                    # ไฟล์ที่ดาวน์โหลดค้างจาก session ก่อน (ไฟล์ใหม่อาจเป็นของ process อื่นที่กำลังเขียนอยู่)
+                    try:
+                        if time.time() - os.path.getmtime(path) > STALE_PART_SECONDS: os.remove(path)
+                    except OSError: pass
+                    continue
+                try: st = os.stat(path)
+                except OSError: continue
+                self._entries[path] = (st.st_size, st.st_mtime)
+                self._total += st.st_size
+
+    def path_for(self, card_id, variant='full'):
+        if variant not in VARIANTS: raise ValueError(f"Unknown image variant: {variant}")
+        return os.path.join(self.root, variant, f"{card_id}.jpg")
+
+    def variant_of(self, path):
+        # path ของรูปใน cache -> (card_id, variant) / None ถ้าไม่ใช่ไฟล์ใน cache นี้
+        folder, name = os.path.split(os.path.abspath(path))
+        variant = os.path.basename(folder)
+        if variant not in VARIANTS or not name.endswith(".jpg"): return None
+        if os.path.dirname(folder) != os.path.abspath(self.root): return None
+        return name[:-4], variant
+
+    def get(self, card_id, variant='full'):
+        path = self.path_for(card_id, variant)
+        with self._lock:
+            if path not in self._entries:
+                # อาจถูกเขียนโดย process อื่น (เช่น command line ที่รันหลาย deck พร้อมกัน)
+                try: self._entries[path] = (os.path.getsize(path), 0)
+                except OSError:
+                    instrument.count(f"image_cache.{variant}_miss")
+                    return None
+                self._total += self._entries[path][0]
+            try:
+                os.utime(path)
+            except OSError:
+                # ถูกลบจากภายนอก
+                size, _ = self._entries.pop(path)
+                self._total -= size
+                instrument.count(f"image_cache.{variant}_miss")
+                return None
+            self._entries[path] = (self._entries[path][0], os.path.getmtime(path))
+        instrument.count(f"image_cache.{variant}_hit")
+        return path
+
+    def put(self, card_id, variant, data):
+        path = self.path_for(card_id, variant)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp, 'wb') as f: f.write(data)
+        return self._commit(tmp, path)
+
+    def _commit(self, tmp, path):
+        os.replace(tmp, path)  # atomic: ไม่มีไฟล์ครึ่งๆ กลางๆ ใน cache
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._entries.get(path)
+            if old: self._total -= old[0]
+            self._entries[path] = (size, os.path.getmtime(path))
+            self._total += size
+            self._evict(keep=path)
+        return path
+
+    def download(self, card_id, variant, url, http, timeout=10, keep_data=False):
+        # คืน (path, bytes ที่โหลดมา ถ้า keep_data) raise FetchError ถ้าได้ไฟล์ไม่ครบ
+        with instrument.span('image.download', card=card_id, variant=variant) as sp:
+            return self._download(card_id, variant, url, http, timeout, keep_data, sp)
+
+    def _download(self, card_id, variant, url, http, timeout, keep_data, sp):
+        import requests
+        path = self.path_for(card_id, variant)
+        resume = f"{path}.part"
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try: os.replace(resume, tmp) # ยึดไฟล์ค้างมาต่อ (rename สำเร็จได้ที่เดียว ไม่มีสองที่เขียนไฟล์เดียวกัน)
+        except OSError: pass
+        label = f"image {card_id} ({variant})"
+        reason = "incomplete download"
+        buf = io.BytesIO() if keep_data else None
+        received = 0
+        try:
+            for _ in range(STREAM_ATTEMPTS):
+                have = os.path.getsize(tmp) if os.path.exists(tmp) else 0
+                r = http.get(url, timeout=timeout, label=label, stream=True,
+                             headers={'Range': f"bytes={have}-"} if have else None)
+                with r:
+                    if r.status_code == 416: # ไฟล์ค้างใช้ไม่ได้ (รูปบน server เปลี่ยน) เริ่มใหม่
+                        os.remove(tmp)
+                        continue
+                    r.raise_for_status()
+                    expected = _expected_size(r, have)
+                    if r.status_code != 206: have = 0 # server ไม่รองรับ Range: ส่งมาทั้งไฟล์
+                    if buf is not None:
+                        buf.seek(0)
+                        buf.truncate()
+                        if have:
+                            with open(tmp, 'rb') as f: buf.write(f.read())
+                    try:
+                        with open(tmp, 'ab' if have else 'wb') as f:
+                            for chunk in r.iter_content(CHUNK_SIZE):
+                                f.write(chunk)
+                                received += len(chunk)
+                                if buf is not None: buf.write(chunk)
+                    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                        reason = f"{type(e).__name__} after {os.path.getsize(tmp)} bytes"
+                        continue
+                size = os.path.getsize(tmp)
+                if expected is not None and size != expected:
+                    reason = f"got {size} of {expected} bytes"
+                    if size > expected: os.remove(tmp)
+                    continue
+                if not _complete_jpeg(tmp):
+                    reason = "truncated image"
+                    os.remove(tmp)
+                    continue
+                sp.set(bytes=received, resumed=have > 0)
+                return self._commit(tmp, path), buf.getvalue() if buf is not None else None
+        except BaseException:
+            _release(tmp, resume)
+            raise
+        finally:
+            instrument.count('http.bytes', received)
+        _release(tmp, resume)
+        if hasattr(http, 'record_failure'): http.record_failure(label, reason, url)
+        from http_scheduler import FetchError
+        raise FetchError(url, reason)
+
+    def _evict(self, keep=None):
+        if self._total <= self.max_bytes: return
+        for path, (size, _) in sorted(self._entries.items(), key=lambda kv: kv[1][1]):
+            if self._total <= self.max_bytes: break
+            if path == keep: continue
+            try: os.remove(path)
+            except OSError: pass
+            del self._entries[path]
+            self._total -= size
+
+    def total_bytes(self):
+        return self._total
+
+    def clear(self):
+        with self._lock:
+            for path in list(self._entries):
+                try: os.remove(path)
+                except OSError: pass
+            self._entries.clear()
+            self._total = 0
+
+
+def _expected_size(response, have):
+    # ขนาดไฟล์เต็มจาก header (None = ไม่รู้ เช่น chunked / บีบอัด)
+    if response.headers.get('Content-Encoding', 'identity') != 'identity': return None
+    if response.status_code == 206:
+        # Content-Range: bytes <start>-<end>/<total>
+        span, _, total = response.headers.get('Content-Range', '').partition('/')
+        start = span.replace('bytes', '').strip().split('-')[0]
+        if not start.isdigit() or int(start) != have or not total.isdigit(): return None
+        return int(total)
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def _complete_jpeg(path):
+    # JPEG ที่ถูกตัดกลางทางไม่มี marker EOI (FFD9) ท้ายไฟล์ -> วาดออกมาเป็นขยะ
+    with open(path, 'rb') as f:
+        head = f.read(2)
+        if head != b'\xff\xd8': return True # ไม่ใช่ JPEG ตรวจแค่ขนาด
+        f.seek(-2, os.SEEK_END)
+        return f.read(2) == b'\xff\xd9'
+
+
+def _release(tmp, resume):
+    # เก็บส่วนที่โหลดได้ไว้ต่อครั้งหน้า
+    try:
+        if os.path.getsize(tmp) > 0: os.replace(tmp, resume)
+        else: os.remove(tmp)
+    except OSError: pass
+
+
+def fetch_image(cache, card_id, variant, url, timeout=10, http=None):
+    # ดู cache ก่อนเสมอ ถ้ามีแล้วไม่ต้องออกเน็ต
+    path = cache.get(card_id, variant)
+    if path: return path
+    return cache.download(card_id, variant, url, http or http_scheduler.default(), timeout)[0]
+
+
+def fetch_image_data(cache, card_id, variant, url, timeout=10, http=None):
+    # เหมือน fetch_image แต่คืน (path, bytes) -> รูปที่จะแสดงทันที decode จาก memory ไม่ต้องอ่านไฟล์ซ้ำ
+    # bytes = None ถ้ามีใน cache อยู่แล้ว
+    path = cache.get(card_id, variant)
+    if path: return path, None
+    return cache.download(card_id, variant, url, http or http_scheduler.default(), timeout, keep_data=True)
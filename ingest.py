@@ -0,0 +1,81 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from image_cache import default_cache_dir
+import instrument
+
+# ================= IMAGE INGEST =================
+# ตรวจรูปจากผู้ใช้ (bulk upload / drag & drop / paste) ก่อนวางลงช่อง ทำใน worker process:
+#   - เปิด header + decode จริงหนึ่งครั้ง (แบบย่อด้วย draft) -> ไฟล์เสีย/ไม่ครบ ถูกปฏิเสธตั้งแต่ตอนนี้
+#   - ปฏิเสธรูปที่ใหญ่เกิน MAX_PIXELS (กัน 8000px scan ทำเครื่องค้าง / decompression bomb)
+#   - สร้าง proxy ขนาดเล็กไว้ให้ preview ใช้ เก็บแบบ content-addressed (sha1 ของไฟล์) ใช้ซ้ำข้าม session ได้
+
+MAX_PIXELS = 60_000_000
+PROXY_SIZE = (500, 720) # สูงเท่า PixmapCache.SOURCE_MAX_H
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'BMP')
+MIN_POOL_JOBS = 4
+
+
+class IngestError(Exception):
+    pass
+
+
+def default_proxy_dir():
+    return os.path.join(default_cache_dir(), "proxies")
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ingest_image(path, proxy_dir):
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            fmt, (width, height), mode = img.format, img.size, img.mode
+            if fmt not in ALLOWED_FORMATS:
+                raise IngestError(f"unsupported format {fmt}")
+            if width * height > MAX_PIXELS:
+                raise IngestError(f"image too large ({width}x{height})")
+            sha1 = file_sha1(path)
+            proxy = os.path.join(proxy_dir, f"{sha1}.jpg")
+            if not os.path.exists(proxy):
+                img.draft('RGB', PROXY_SIZE) # JPEG: decode แบบย่อตั้งแต่ขั้น DCT
+                img.load() # ไฟล์ไม่ครบจะ error ตรงนี้
+                small = img.convert('RGB')
+                small.thumbnail(PROXY_SIZE, Image.Resampling.LANCZOS)
+                tmp = f"{proxy}.{os.getpid()}.part"
+                small.save(tmp, 'JPEG', quality=85)
+                os.replace(tmp, proxy)
+    except IngestError:
+        raise
+    except Exception as e:
+        raise IngestError(str(e) or type(e).__name__)
+    return {'path': path, 'format': fmt, 'width': width, 'height': height, 'mode': mode,
+            'size': os.path.getsize(path), 'sha1': sha1, 'proxy': proxy}
+
+
+def _ingest_job(job):
+    path, proxy_dir = job
+    try:
+        return path, ingest_image(path, proxy_dir), None
+    except IngestError as e:
+        return path, None, str(e)
+
+
+@instrument.timed('ingest.batch')
+def ingest_many(paths, proxy_dir=None, workers=None):
+    # คืน [(path, info หรือ None, error หรือ None)] ตามลำดับเดิม
+    proxy_dir = proxy_dir or default_proxy_dir()
+    os.makedirs(proxy_dir, exist_ok=True)
+    jobs = [(p, proxy_dir) for p in paths]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1 or len(jobs) < MIN_POOL_JOBS:
+        return [_ingest_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_ingest_job, jobs))
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import threading
+import functools
+
+# ================= INSTRUMENTATION =================
+# span (ช่วงเวลา) + counter ตามจุดที่อาจช้า: เน็ต, cache, decode/resize/encode ต่อใบ, เขียน PDF ต่อหน้า, paint
+# ปิดอยู่เป็นค่าเริ่มต้น: span() คืน object ว่างตัวเดียวกันทุกครั้ง (ไม่จับเวลา ไม่สร้าง object) count() คืนทันที
+# เปิด: CARD_PRINT_TRACE=<ไฟล์.json> ตอนเปิดโปรแกรม, enable() ระหว่างรัน (GUI: Ctrl+Shift+P), CLI: --trace
+# report() สรุปเป็นข้อความ / dump_trace(path) เขียน JSON แบบ Chrome trace (เปิดใน chrome://tracing หรือ ui.perfetto.dev)
+# process pool: worker เรียก collect() ส่ง event กลับมาพร้อมผลลัพธ์ แล้ว parent merge()
+
+TRACE_ENV = "CARD_PRINT_TRACE"
+MAX_EVENTS = 200_000 # กันหน่วยความจำโตไม่จำกัดถ้าลืมปิด (event เกินนี้นับเฉพาะสถิติ)
+
+_enabled = bool(os.environ.get(TRACE_ENV))
+_lock = threading.Lock()
+_events = [] # (name, start, duration, pid, tid, args) เวลาเป็นวินาทีจาก perf_counter
+_stats = {} # name -> [count, total, max, [durations]]
+_counters = {}
+_threads = {} # (pid, tid) -> ชื่อ thread
+_dropped = 0
+_started = time.perf_counter()
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name, self.args = name, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None: self.args['error'] = exc_type.__name__
+        _record(self.name, self.start, end - self.start, self.args)
+        return False
+
+    def set(self, **args):
+        # เพิ่มข้อมูลที่รู้ตอนจบ เช่น จำนวนไบต์ / status
+        self.args.update(args)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled, _started
+    if on and not _enabled: _started = time.perf_counter()
+    _enabled = on
+
+
+def span(name, **args):
+    if not _enabled: return _NO_SPAN
+    return _Span(name, args)
+
+
+def timed(name):
+    # decorator: ทั้งฟังก์ชันเป็น span เดียว
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled: return fn(*args, **kwargs)
+            with _Span(name, {}): return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def count(name, n=1):
+    if not _enabled: return
+    with _lock: _counters[name] = _counters.get(name, 0) + n
+
+
+def error(where, exc):
+    # จุดที่จับ exception แล้วไปต่อ: นับไว้ (ไม่หายเงียบ) และเก็บชนิดไว้ใน trace
+    if not _enabled: return
+    count(f"errors.{where}")
+    _record(f"error.{where}", time.perf_counter(), 0.0, {'error': f"{type(exc).__name__}: {exc}"})
+
+
+def _record(name, start, duration, args, pid=None, tid=None):
+    global _dropped
+    if pid is None:
+        pid, tid = os.getpid(), threading.get_ident()
+        if (pid, tid) not in _threads: _threads[(pid, tid)] = threading.current_thread().name
+    with _lock:
+        st = _stats.get(name)
+        if st is None: st = _stats[name] = [0, 0.0, 0.0, []]
+        st[0] += 1
+        st[1] += duration
+        if duration > st[2]: st[2] = duration
+        if len(_events) < MAX_EVENTS:
+            st[3].append(duration)
+            _events.append((name, start, duration, pid, tid, args))
+        else:
+            _dropped += 1
+
+
+def reset():
+    global _dropped, _started
+    with _lock:
+        _events.clear()
+        _stats.clear()
+        _counters.clear()
+        _dropped = 0
+        _started = time.perf_counter()
+
+
+def collect():
+    # ใน worker process: เอา event / counter ที่สะสมไว้ออกไปส่งให้ parent แล้วล้าง
+    with _lock:
+        data = {'events': list(_events), 'counters': dict(_counters),
+                'threads': {f"{pid}:{tid}": n for (pid, tid), n in _threads.items()}}
+        _events.clear()
+        _stats.clear()
+        _counters.clear()
+    return data
+
+
+def merge(data):
+    if not data or not _enabled: return
+    for key, name in data['threads'].items():
+        pid, tid = (int(x) for x in key.split(":"))
+        _threads.setdefault((pid, tid), name)
+    for name, start, duration, pid, tid, args in data['events']:
+        _record(name, start, duration, args, pid, tid)
+    for name, n in data['counters'].items(): count(name, n)
+
+
+def snapshot():
+    # สถิติต่อชื่อ span: count / total / mean / p50 / p95 / max (วินาที) + counters
+    with _lock:
+        spans = {}
+        for name, (n, total, peak, durations) in _stats.items():
+            ordered = sorted(durations) or [0.0]
+            spans[name] = {'count': n, 'total': total, 'mean': total / n if n else 0.0,
+                           'p50': ordered[len(ordered) // 2], 'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                           'max': peak}
+        return {'spans': spans, 'counters': dict(_counters), 'elapsed': time.perf_counter() - _started,
+                'dropped': _dropped}
+
+
+def report():
+    snap = snapshot()
+    lines = [f"Profile: {snap['elapsed']:.2f} s recorded"]
+    if snap['spans']:
+        width = max(28, max(len(n) for n in snap['spans']))
+        lines.append(f"{'span':<{width}} {'count':>7} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for name, s in sorted(snap['spans'].items(), key=lambda kv: -kv[1]['total']):
+            lines.append(f"{name:<{width}} {s['count']:>7} {s['total'] * 1000:>10.1f} {s['mean'] * 1000:>9.2f} "
+                         f"{s['p95'] * 1000:>9.2f} {s['max'] * 1000:>9.2f}")
+    if snap['counters']:
+        lines.append("counters:")
+        for name, n in sorted(snap['counters'].items()):
+            lines.append(f"  {name:<40} {n:>14,.0f}")
+    if snap['dropped']: lines.append(f"({snap['dropped']} events over MAX_EVENTS were counted but not kept)")
+    return "\n".join(lines)
+
+
+def dump_trace(path):
+    # Chrome trace event format: ph 'X' = ช่วงเวลา, ph 'M' = ชื่อ thread, ts/dur เป็นไมโครวินาที
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+        counters = dict(_counters)
+    t0 = min((e[1] for e in events), default=0.0)
+    trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+             for (pid, tid), name in threads.items()]
+    for name, start, duration, pid, tid, args in events:
+        trace.append({'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'ts': round((start - t0) * 1e6, 1),
+                      'dur': round(duration * 1e6, 1), 'pid': pid, 'tid': tid, 'args': args})
+    tmp = f"{path}.{os.getpid()}.part"
+    with open(tmp, 'w') as f:
+        json.dump({'traceEvents': trace, 'otherData': {'counters': counters}}, f, default=str)
+    os.replace(tmp, path)
+    return path
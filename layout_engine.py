@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+# ================= GRID LAYOUT ENGINE =================
+# หาจำนวนแถว x คอลัมน์ที่มากที่สุดที่ใส่ได้ในกระดาษ นับจาก margin ซ้าย/บน ไปจนถึงขอบกระดาษ
+# ถ้า config['rotate'] เปิดอยู่ จะลองวางการ์ดแนวนอน (หมุน 90°) แล้วเลือกแบบที่ได้จำนวนใบมากกว่า
+
+Grid = namedtuple('Grid', 'cols rows rotated')
+
+
+def _fit(available, size, gap):
+    if size <= 0: return 1
+    return max(1, int((available + gap) // (size + gap)))
+
+
+def compute_grid(config):
+    avail_w = config['paper_w'] - config['margin_left']
+    avail_h = config['paper_h'] - config['margin_top']
+    gap = config['gap']
+    upright = Grid(_fit(avail_w, config['card_w'], gap), _fit(avail_h, config['card_h'], gap), False)
+    if not config.get('rotate'): return upright
+    rotated = Grid(_fit(avail_w, config['card_h'], gap), _fit(avail_h, config['card_w'], gap), True)
+    return rotated if rotated.cols * rotated.rows > upright.cols * upright.rows else upright
+
+
+def per_page(grid):
+    return grid.cols * grid.rows
+
+
+def footprint(config, grid):
+    # ขนาดที่การ์ดกินบนกระดาษ (mm) หลังหมุนแล้ว
+    if grid.rotated: return config['card_h'], config['card_w']
+    return config['card_w'], config['card_h']
+
+
+def slot_position(config, grid, slot_idx):
+    w, h = footprint(config, grid)
+    c = slot_idx % grid.cols
+    r = slot_idx // grid.cols
+    return {
+        'x': config['margin_left'] + (c * (w + config['gap'])),
+        'y': config['margin_top'] + (r * (h + config['gap'])),
+        'w': w, 'h': h
+    }
+
+
+def page_count(images_data, grid):
+    if not images_data: return 0
+    return (max(images_data.keys()) // per_page(grid)) + 1
@@ -0,0 +1,235 @@
+from bisect import bisect_left, insort
+from collections import deque
+
+# ================= LAYOUT MODEL (images_data) =================
+# ใช้แทน dict {global index: path} เดิม (อ่าน/เขียนแบบ dict ได้เหมือนเดิม) แต่มี index ช่วย:
+#   _holes : ช่องว่างที่อยู่ก่อน index สุดท้าย (เรียงจากน้อยไปมาก) -> หาช่องว่างถัดไปด้วย bisect
+#   _max   : index สุดท้ายที่มีรูป (cache ไว้ ไม่ต้อง max(keys) ทุกครั้ง)
+# การแก้ทีละหลายช่อง: plan_*() คำนวณ changes {index: path ใหม่ หรือ None} โดยไม่แก้ model แล้ว apply() ทีเดียว
+# apply() คืน diff {index: (เดิม, ใหม่)} เฉพาะช่องที่เปลี่ยนจริง -> EditHistory เก็บ diff นี้ทำ undo/redo
+
+
+class CardLayout:
+    def __init__(self, items=None):
+        self._slots = {}
+        self._holes = []
+        self._max = -1
+        if items:
+            for idx, path in dict(items).items(): self[idx] = path
+
+    # --- dict interface ---
+    def __getitem__(self, idx):
+        return self._slots[idx]
+
+    def get(self, idx, default=None):
+        return self._slots.get(idx, default)
+
+    def __contains__(self, idx):
+        return idx in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __bool__(self):
+        return bool(self._slots)
+
+    def keys(self):
+        return self._slots.keys()
+
+    def values(self):
+        return self._slots.values()
+
+    def items(self):
+        return self._slots.items()
+
+    def __setitem__(self, idx, path):
+        if idx < 0: raise IndexError(f"Slot index must be >= 0, got {idx}")
+        if idx in self._slots:
+            self._slots[idx] = path
+            return
+        if idx > self._max:
+            # ช่องระหว่าง max เดิมกับ idx ใหม่กลายเป็นช่องว่าง
+            self._holes.extend(range(self._max + 1, idx))
+            self._max = idx
+        else:
+            del self._holes[bisect_left(self._holes, idx)]
+        self._slots[idx] = path
+
+    def __delitem__(self, idx):
+        del self._slots[idx]
+        if idx < self._max:
+            insort(self._holes, idx)
+            return
+        # ลบตัวสุดท้าย: ตัด hole ท้ายๆ ออกจนเจอช่องที่มีรูป
+        self._max = idx - 1
+        while self._holes and self._holes[-1] == self._max:
+            self._holes.pop()
+            self._max -= 1
+
+    def pop(self, idx, default=None):
+        if idx not in self._slots: return default
+        path = self._slots[idx]
+        del self[idx]
+        return path
+
+    def clear(self):
+        self._slots.clear()
+        self._holes.clear()
+        self._max = -1
+
+    def copy(self):
+        return dict(self._slots)
+
+    # --- index queries ---
+    def max_index(self):
+        return self._max
+
+    def page_count(self, per_page):
+        return (self._max // per_page) + 1 if self._max >= 0 else 0
+
+    def next_free(self, start=0):
+        i = bisect_left(self._holes, start)
+        if i < len(self._holes): return self._holes[i]
+        return max(start, self._max + 1)
+
+    def replace_paths(self, mapping):
+        # เปลี่ยน path เดิมเป็น path ใหม่ทุกช่องที่ใช้อยู่ (เช่น รูป preview -> รูปเต็ม) คืน index ที่เปลี่ยน
+        changed = [idx for idx, path in self._slots.items() if path in mapping]
+        for idx in changed: self._slots[idx] = mapping[self._slots[idx]]
+        return changed
+
+    def free_slots(self, count, start=0):
+        # ช่องว่าง count ช่องแรกตั้งแต่ start (ไม่แก้ model)
+        out = []
+        i = bisect_left(self._holes, start)
+        while len(out) < count and i < len(self._holes):
+            out.append(self._holes[i])
+            i += 1
+        nxt = max(start, self._max + 1)
+        while len(out) < count:
+            out.append(nxt)
+            nxt += 1
+        return out
+
+    def apply(self, changes):
+        # changes = {index: path หรือ None (ลบ)} คืน diff {index: (เดิม, ใหม่)} เฉพาะช่องที่เปลี่ยนจริง
+        diff = {}
+        for idx, path in changes.items():
+            old = self._slots.get(idx)
+            if old == path: continue
+            diff[idx] = (old, path)
+            if path is None: del self[idx]
+            else: self[idx] = path
+        return diff
+
+    # --- batch edits (คืน changes สำหรับ apply) ---
+    def plan_delete(self, indices):
+        return {idx: None for idx in indices if idx in self._slots}
+
+    def plan_move(self, indices, target):
+        # ย้ายช่องที่เลือก (ตามลำดับ index) ไปเริ่มที่ target ช่องอื่นในช่วงนั้นเลื่อนตามแบบแทรกใน list
+        # ช่องว่างที่เลือกไว้ก็ย้ายไปด้วย (เลือก 1-9 ย้ายไปหน้าอื่น ได้ layout หน้าเดิมทั้งหน้า)
+        selected = sorted(set(indices))
+        if not selected or target < 0: return {}
+        lo = min(selected[0], target)
+        hi = max(selected[-1], target + len(selected) - 1)
+        chosen = set(selected)
+        others = [self._slots.get(i) for i in range(lo, hi + 1) if i not in chosen]
+        k = target - lo
+        order = others[:k] + [self._slots.get(i) for i in selected] + others[k:]
+        return {lo + j: path for j, path in enumerate(order) if self._slots.get(lo + j) != path}
+
+    def plan_duplicate(self, indices):
+        # สำเนาของช่องที่เลือก (เฉพาะที่มีรูป) ลงช่องว่างถัดจากช่องสุดท้ายที่เลือก
+        selected = sorted(i for i in set(indices) if i in self._slots)
+        if not selected: return {}
+        return dict(zip(self.free_slots(len(selected), selected[-1] + 1), (self._slots[i] for i in selected)))
+
+    def plan_fill(self, path, copies, start=0):
+        return dict.fromkeys(self.free_slots(copies, start), path) if path and copies > 0 else {}
+
+    def insert_many(self, paths, start=0):
+        # วางหลายรูปลงช่องว่างถัดจาก start ตามลำดับ คืน index ที่ใช้
+        placed = []
+        for path in paths:
+            idx = self.next_free(start)
+            self[idx] = path
+            placed.append(idx)
+            start = idx + 1
+        return placed
+
+
+# ================= EDIT HISTORY (UNDO / REDO) =================
+# เก็บเฉพาะ diff ของช่องที่เปลี่ยนในแต่ละคำสั่ง (ไม่ใช่สำเนา images_data ทั้งก้อน) path เป็น string ตัวเดิมที่ใช้ร่วมกัน
+# แก้หลายพันครั้งก็ใช้หน่วยความจำตามจำนวนช่องที่เปลี่ยนจริงเท่านั้น
+
+MAX_STEPS = 10_000
+
+
+class EditHistory:
+    def __init__(self, max_steps=MAX_STEPS):
+        self._undo = deque(maxlen=max_steps) # (label, diff)
+        self._redo = []
+        self._group = None # group ของคำสั่งล่าสุดใน _undo ที่ยังต่อเพิ่มได้
+
+    def record(self, label, diff, group=None):
+        # group เดียวกับคำสั่งล่าสุด (เช่น import เด็คที่วางเป็นหลาย batch) = รวมเป็นคำสั่งเดียว undo ทีเดียว
+        if not diff: return
+        self._redo.clear()
+        if group is not None and group == self._group and self._undo:
+            merged = self._undo[-1][1]
+            for idx, (old, new) in diff.items():
+                old = merged[idx][0] if idx in merged else old
+                if old == new: merged.pop(idx, None)
+                else: merged[idx] = (old, new)
+            return
+        self._undo.append((label, diff))
+        self._group = group
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        return self._undo[-1][0] if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else None
+
+    def undo(self, layout):
+        # คืน (label, diff) ของคำสั่งที่ย้อน หรือ None
+        if not self._undo: return None
+        self._group = None
+        label, diff = self._undo.pop()
+        layout.apply({idx: old for idx, (old, new) in diff.items()})
+        self._redo.append((label, diff))
+        return label, diff
+
+    def redo(self, layout):
+        if not self._redo: return None
+        self._group = None
+        label, diff = self._redo.pop()
+        layout.apply({idx: new for idx, (old, new) in diff.items()})
+        self._undo.append((label, diff))
+        return label, diff
+
+    def replace_paths(self, mapping):
+        # path ถูกเปลี่ยนนอก history (รูป preview -> รูปเต็ม): ย้อนกลับแล้วต้องได้รูปเต็ม ไม่ใช่ preview
+        for stack in (self._undo, self._redo):
+            for _, diff in stack:
+                for idx, (old, new) in diff.items():
+                    if old in mapping or new in mapping:
+                        diff[idx] = (mapping.get(old, old), mapping.get(new, new))
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._group = None
+
+    def __len__(self):
+        return len(self._undo)
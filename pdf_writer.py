@@ -0,0 +1,148 @@
+import zlib
+
+# ================= STREAMING PDF WRITER =================
+# เขียน PDF ลงไฟล์ทีละหน้า ไม่เก็บทั้งเอกสารไว้ใน RAM แบบ FPDF
+# - รูป JPEG ถูกฝังเป็น XObject ครั้งเดียว (DCTDecode, copy byte ตรงจากไฟล์ทีละ chunk)
+#   การ์ดใบเดียวกันกี่ช่องกี่หน้าก็อ้างถึง object เดิม
+# - object ของ catalog / page tree ถูกจองเลขไว้ก่อนแล้วค่อยเขียนตอน close()
+
+MM = 72 / 25.4
+CHUNK = 256 * 1024
+COLOR_SPACES = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}
+
+
+def jpeg_sof(path):
+    # อ่านแค่ header หา SOF marker: (marker, precision, width, height, components)
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8': raise ValueError(f"Not a JPEG file: {path}")
+        while True:
+            byte = f.read(1)
+            while byte and byte != b'\xff': byte = f.read(1)
+            while byte == b'\xff': byte = f.read(1)
+            if not byte: raise ValueError(f"No SOF marker in {path}")
+            marker = byte[0]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7: continue
+            length = int.from_bytes(f.read(2), 'big')
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                data = f.read(length - 2)
+                return marker, data[0], int.from_bytes(data[3:5], 'big'), int.from_bytes(data[1:3], 'big'), data[5]
+            f.seek(length - 2, 1)
+
+
+def jpeg_info(path):
+    # (width, height, components)
+    return jpeg_sof(path)[2:]
+
+
+def _num(value):
+    text = f"{value:.3f}".rstrip('0').rstrip('.')
+    return text if text not in ('', '-0') else '0'
+
+
+class StreamingPDFWriter:
+    def __init__(self, path, page_w_mm, page_h_mm, compress=False):
+        self.f = open(path, 'wb')
+        self.page_w, self.page_h = page_w_mm * MM, page_h_mm * MM
+        self.compress = compress
+        self.offsets = {}
+        self.next_id = 3 # 1 = catalog, 2 = page tree
+        self.images = {} # key -> (name, object id)
+        self.page_ids = []
+        self._ops = None
+        self._page_images = None
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type: self.f.close()
+        else: self.close()
+
+    # --- low level ---
+    def _new_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _begin_obj(self, obj_id):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(f"{obj_id} 0 obj\n".encode('ascii'))
+
+    def _write_obj(self, obj_id, body):
+        self._begin_obj(obj_id)
+        self.f.write(body.encode('latin-1') + b"\nendobj\n")
+
+    def _write_stream(self, obj_id, data, extra=""):
+        if self.compress:
+            data = zlib.compress(data)
+            extra += " /Filter /FlateDecode"
+        self._begin_obj(obj_id)
+        self.f.write(f"<< /Length {len(data)}{extra} >>\nstream\n".encode('latin-1'))
+        self.f.write(data)
+        self.f.write(b"\nendstream\nendobj\n")
+
+    # --- images ---
+    def add_jpeg(self, key, path, name=None):
+        # ฝังรูปครั้งเดียวต่อ key แล้วคืนชื่อ XObject (/Im1, /Im2, ... หรือ name ที่ส่งมา)
+        if key in self.images: return self.images[key][0]
+        width, height, comps = jpeg_info(path)
+        obj_id = self._new_id()
+        name = name or f"Im{len(self.images) + 1}"
+        decode = " /Decode [1 0 1 0 1 0 1 0]" if comps == 4 else "" # Adobe CMYK JPEG เก็บค่ากลับด้าน
+        with open(path, 'rb') as src:
+            src.seek(0, 2)
+            length = src.tell()
+            src.seek(0)
+            self._begin_obj(obj_id)
+            self.f.write((f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                          f"/ColorSpace {COLOR_SPACES.get(comps, '/DeviceRGB')} /BitsPerComponent 8{decode} "
+                          f"/Filter /DCTDecode /Length {length} >>\nstream\n").encode('latin-1'))
+            while True:
+                chunk = src.read(CHUNK)
+                if not chunk: break
+                self.f.write(chunk)
+            self.f.write(b"\nendstream\nendobj\n")
+        self.images[key] = (name, obj_id)
+        return name
+
+    # --- pages ---
+    def begin_page(self):
+        self._ops = []
+        self._page_images = set()
+
+    def draw_image(self, name, x, y, w, h):
+        self._page_images.add(name)
+        self._ops.append(f"q {_num(w * MM)} 0 0 {_num(h * MM)} {_num(x * MM)} {_num(self.page_h - (y + h) * MM)} cm /{name} Do Q")
+
+    def rect(self, x, y, w, h, line_width=0.1, gray=(200, 200, 200)):
+        r, g, b = (_num(c / 255) for c in gray)
+        self._ops.append(f"q {_num(line_width * MM)} w {r} {g} {b} RG "
+                         f"{_num(x * MM)} {_num(self.page_h - (y + h) * MM)} {_num(w * MM)} {_num(h * MM)} re S Q")
+
+    def end_page(self):
+        # คืน content stream (ก่อนบีบอัด) ให้ผู้เรียกเก็บไว้ใช้ซ้ำกับ add_page ได้
+        content = "\n".join(self._ops).encode('latin-1')
+        self.add_page(content, self._page_images)
+        self._ops = self._page_images = None
+        return content
+
+    def add_page(self, content, image_names):
+        # เขียนหน้าจาก content stream ที่สร้างไว้แล้ว รูปใน image_names ต้อง add_jpeg ก่อน
+        content_id, page_id = self._new_id(), self._new_id()
+        self._write_stream(content_id, content)
+        xobjects = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in self.images.values() if name in image_names)
+        self._write_obj(page_id, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(self.page_w)} {_num(self.page_h)}] "
+                                  f"/Resources << /XObject << {xobjects} >> >> /Contents {content_id} 0 R >>"))
+        self.page_ids.append(page_id)
+        self.f.flush()
+
+    def close(self):
+        kids = " ".join(f"{pid} 0 R" for pid in self.page_ids)
+        self._write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>")
+        self._write_obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.f.tell()
+        self.f.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode('ascii'))
+        for obj_id in range(1, self.next_id):
+            self.f.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode('ascii'))
+        self.f.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('ascii'))
+        self.f.close()
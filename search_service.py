@@ -0,0 +1,108 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import ygo_api
+import http_scheduler
+from card_index import normalize
+import instrument
+
+# ================= CARD SEARCH SERVICE =================
+# ค้นหาการ์ดจาก index ในเครื่องก่อน ไม่เจอค่อยถาม API (fname=...) แล้วเก็บผลทั้งหมดไว้:
+#   - cache แบบ LRU + TTL : ค้นคำเดิมซ้ำได้ผลจาก memory ทันที ไม่ออกเน็ต
+#   - คำค้นเดียวกันที่กำลังรออยู่ ใช้ Future เดียวกัน (ไม่ยิง request ซ้ำ)
+#   - cancel(): ถ้าไม่มีใครรอแล้วและยังไม่เริ่ม จะถูกถอดออกจากคิว
+# ไฟล์นี้ไม่ใช้ PyQt6 ผลลัพธ์เป็น concurrent.futures.Future
+
+CACHE_TTL = 600
+CACHE_ENTRIES = 128
+MAX_RESULTS = 500
+PAGE_SIZE = 30
+WORKERS = 2
+
+
+class SearchService:
+    def __init__(self, index=None, http=None, ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, timeout=10, pool=None):
+        self.index = index
+        self.http = http # None = http_scheduler.default() ตอนถาม API ครั้งแรก
+        self.ttl, self.max_entries, self.timeout = ttl, max_entries, timeout
+        self._cache = OrderedDict() # key -> (expires_at, cards)
+        self._inflight = {} # key -> [future, จำนวนผู้รอ]
+        self._lock = threading.Lock()
+        # pool = executor ของโปรแกรม (task_executor.Lane) หรือ None = สร้าง thread pool ของตัวเอง
+        self._pool = pool or ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="search")
+
+    @staticmethod
+    def key(query):
+        query = query.strip()
+        return query if query.isdigit() else normalize(query)
+
+    def cached(self, query):
+        key = self.key(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None: return None
+            if entry[0] < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def search(self, query):
+        # คืน Future ของผลทั้งหมด (list ของ card dict เรียงตามความใกล้เคียง)
+        key = self.key(query)
+        cards = self.cached(query)
+        if cards is not None or not key:
+            done = Future()
+            done.set_result(cards or [])
+            return done
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if waiting:
+                waiting[1] += 1
+                return waiting[0]
+            future = self._pool.submit(self._fetch, query.strip())
+            self._inflight[key] = [future, 1]
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return future
+
+    def cancel(self, query, future):
+        # ผู้เรียกไม่สนใจผลนี้แล้ว (มีคำค้นใหม่มาแทน)
+        key = self.key(query)
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if not waiting or waiting[0] is not future: return
+            waiting[1] -= 1
+            if waiting[1] > 0 or future.running() or future.done(): return
+            del self._inflight[key]
+        # นอก lock: future.cancel() เรียก _finish (ซึ่งเอา lock) ทันทีใน thread นี้
+        future.cancel()
+
+    def _finish(self, key, future):
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if waiting and waiting[0] is future: del self._inflight[key]
+            if future.cancelled() or future.exception(): return
+            self._cache[key] = (time.monotonic() + self.ttl, future.result())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries: self._cache.popitem(last=False)
+
+    def _fetch(self, query):
+        if self.index:
+            with instrument.span('search.index', query=query):
+                cards = self.index.search(query, MAX_RESULTS)
+            if cards: return cards
+        param = "id" if query.isdigit() else "fname"
+        with instrument.span('search.api', query=query):
+            r = (self.http or http_scheduler.default()).get(ygo_api.API_URL, params={param: query}, timeout=self.timeout, label=f"search '{query}'")
+        if r.status_code == 400: return [] # API ตอบ 400 เมื่อไม่พบการ์ด
+        r.raise_for_status()
+        return r.json().get("data", [])[:MAX_RESULTS]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def page(cards, number, page_size=PAGE_SIZE):
+    return cards[number * page_size:(number + 1) * page_size]
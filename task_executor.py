@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+
+# ================= SHARED TASK EXECUTOR =================
+# thread pool ตัวเดียวของทั้งโปรแกรม (แทน QThread ที่สร้างใหม่ทุกครั้งแล้วไม่เคยเก็บกวาด):
+#   - จำนวน thread มีเพดาน thread สร้างเมื่อมีงาน และจบเองเมื่อว่างนานเกิน IDLE_SECONDS
+#   - คิวเรียงตาม priority: INTERACTIVE (ผู้ใช้กดรออยู่) > NORMAL > BULK (import ทั้งเด็ค)
+#     งาน BULK ใช้ได้ไม่เกิน bulk_limit thread (ครึ่งหนึ่ง) ที่เหลือเผื่อให้งาน interactive ไม่ต้องรอ
+#   - CancelToken: งานที่ยังอยู่ในคิวถูกทิ้ง งานที่รันอยู่เช็ค token เอง (token เรียกแทน is_cancelled ได้)
+#   - stats() : จำนวนงานที่รอ / กำลังรัน / เสร็จ / ล้มเหลว / ถูกยกเลิก
+# ไฟล์นี้ไม่ใช้ PyQt6 ผลลัพธ์เป็น concurrent.futures.Future
+
+INTERACTIVE, NORMAL, BULK = 0, 1, 2
+WORKERS = 8
+IDLE_SECONDS = 30.0
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def __call__(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set(): raise TaskCancelled()
+
+
+class Lane:
+    # หน้าตาแบบ concurrent.futures.Executor (submit / shutdown) ที่ priority + token คงที่
+    # ส่งให้โค้ดที่รับ pool ได้ตรงๆ เช่น download_deck(pool=...) และ SearchService(pool=...)
+    def __init__(self, executor, priority, token=None):
+        self.executor, self.priority = executor, priority
+        self.token = token or CancelToken()
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, priority=self.priority, token=self.token, **kwargs)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures: self.token.cancel()
+
+
+class TaskExecutor:
+    def __init__(self, workers=WORKERS, bulk_limit=None, idle_seconds=IDLE_SECONDS, name="task"):
+        self.workers, self.idle_seconds, self.name = workers, idle_seconds, name
+        self.bulk_limit = bulk_limit or max(1, workers // 2)
+        self._queue = [] # heap ของ (priority, ลำดับ, future, token, fn, args, kwargs)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = set()
+        self._idle = 0
+        self._running = {INTERACTIVE: 0, NORMAL: 0, BULK: 0}
+        self._counts = {'completed': 0, 'failed': 0, 'cancelled': 0}
+        self._closed = False
+
+    def submit(self, fn, *args, priority=NORMAL, token=None, **kwargs):
+        future = Future()
+        with self._cond:
+            if self._closed: raise RuntimeError("executor is shut down")
+            heapq.heappush(self._queue, (priority, next(self._seq), future, token, fn, args, kwargs))
+            # thread ที่ว่างอยู่ไม่พอกับงานในคิว -> เพิ่ม thread (ไม่เกินเพดาน)
+            if self._idle < len(self._queue) and len(self._threads) < self.workers:
+                t = threading.Thread(target=self._work, name=f"{self.name}-{next(self._seq)}", daemon=True)
+                self._threads.add(t)
+                t.start()
+            else:
+                self._cond.notify()
+        return future
+
+    def lane(self, priority, token=None):
+        return Lane(self, priority, token)
+
+    def stats(self):
+        with self._cond:
+            queued = sum(1 for item in self._queue if not item[2].cancelled() and not (item[3] and item[3].cancelled))
+            return {'queued': queued, 'running': sum(self._running.values()), **self._counts,
+                    'threads': len(self._threads)}
+
+    def shutdown(self, cancel_pending=True):
+        # ไม่รองานที่รันอยู่ (thread เป็น daemon) ผู้เรียกรอ future ที่สำคัญเอง
+        with self._cond:
+            self._closed = True
+            if cancel_pending:
+                while self._queue:
+                    self._drop(heapq.heappop(self._queue))
+            self._cond.notify_all()
+
+    def _drop(self, item):
+        # cancel() อย่างเดียว future ค้างที่ CANCELLED: concurrent.futures.wait() ยังไม่ถือว่าจบ
+        item[2].cancel()
+        item[2].set_running_or_notify_cancel()
+        self._counts['cancelled'] += 1
+
+    def _take(self):
+        # เรียกขณะถือ lock: งานถัดไปที่รันได้ หรือ None
+        while self._queue:
+            item = self._queue[0]
+            priority, _, future, token = item[:4]
+            if future.cancelled() or (token and token.cancelled):
+                self._drop(heapq.heappop(self._queue))
+                continue
+            if priority == BULK and self._running[BULK] >= self.bulk_limit: return None
+            heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                self._counts['cancelled'] += 1
+                continue
+            self._running[priority] += 1
+            return item
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                item = self._take()
+                while item is None and not (self._closed and not self._queue):
+                    self._idle += 1
+                    notified = self._cond.wait(self.idle_seconds)
+                    self._idle -= 1
+                    item = self._take()
+                    if item is None and not notified and not self._queue: break
+                if item is None:
+                    self._threads.discard(threading.current_thread())
+                    return
+            priority, _, future, token, fn, args, kwargs = item
+            outcome = 'completed'
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                outcome = 'cancelled' if isinstance(e, TaskCancelled) else 'failed'
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                # ไม่ถืออ้างอิงข้อมูลของงานที่จบแล้วไว้ระหว่างรองานใหม่
+                item = future = fn = args = kwargs = result = None
+            with self._cond:
+                self._running[priority] -= 1
+                self._counts[outcome] += 1
+                self._cond.notify()
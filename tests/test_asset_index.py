@@ -0,0 +1,60 @@
+import os
+import random
+
+from PIL import Image, ImageDraw
+
+from asset_index import AssetIndex
+from image_cache import CardImageCache
+
+
+def make_card(path, text, size=(813, 1185), seed=7, quality=92):
+    # ภาพ + กรอบเดียวกัน ต่างกันแค่ชื่อ/ข้อความในกล่องล่าง
+    rnd = random.Random(seed)
+    img = Image.new('RGB', size, (150, 110, 60))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rnd.randrange(90, 700), rnd.randrange(200, 760)
+        draw.ellipse((x, y, x + 90, y + 90), fill=(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)))
+    draw.rectangle((60, 850, 753, 1120), fill=(235, 225, 200))
+    draw.text((70, 60), text, fill=(0, 0, 0))
+    for line in range(8):
+        draw.text((80, 870 + line * 28), f"{text} effect line {line}", fill=(0, 0, 0))
+    img.save(path, quality=quality)
+    return path
+
+
+def test_cards_differing_only_in_text_are_not_merged_for_export(tmp_path):
+    a = make_card(tmp_path / "a.jpg", "Card A")
+    b = make_card(tmp_path / "b.jpg", "Other card B")
+    assets = AssetIndex()
+    data = {0: str(a), 1: str(b)}
+    assert assets.dedupe(data) == data
+
+
+def test_exact_copies_are_merged(tmp_path):
+    a = make_card(tmp_path / "a.jpg", "Card A")
+    copy = tmp_path / "copy.jpg"
+    copy.write_bytes(a.read_bytes())
+    merged = AssetIndex().dedupe({0: str(a), 1: str(copy)})
+    assert merged[0] == merged[1]
+
+
+def test_preview_and_full_of_same_card_id_are_merged(tmp_path):
+    cache = CardImageCache(str(tmp_path / "cache"))
+    full, small = cache.path_for("46986414", 'full'), cache.path_for("46986414", 'small')
+    for path in (full, small): os.makedirs(os.path.dirname(path), exist_ok=True)
+    make_card(full, "Card A")
+    with Image.open(full) as img: img.resize((168, 246)).save(small)
+    # รูปที่หน้าตาเหมือนกันแต่ไม่ใช่การ์ด id เดียวกันใน cache: ไม่แทนกันตอน export
+    lookalike = make_card(tmp_path / "lookalike.jpg", "Card A", quality=80)
+    merged = AssetIndex(cache).dedupe({0: small, 1: full, 2: str(lookalike)})
+    assert merged == {0: full, 1: full, 2: str(lookalike)}
+
+
+def test_duplicate_count_matches_export_grouping(tmp_path):
+    # ป้าย ×N ใน GUI นับจาก canonical() ค่าเริ่มต้น ต้องตรงกับที่ export รวมจริง
+    a = make_card(tmp_path / "a.jpg", "Card A")
+    b = make_card(tmp_path / "b.jpg", "Other card B")
+    assets = AssetIndex()
+    assert assets.canonical([str(a), str(b)]) == {str(a): str(a), str(b): str(b)}
+    assert assets.canonical([str(a), str(b)], near=True)[str(b)] == assets.canonical([str(a), str(b)], near=True)[str(a)]
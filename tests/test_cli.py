@@ -0,0 +1,44 @@
+import json
+
+from PIL import Image
+import pytest
+
+import card_printer_cli
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("CARD_PRINT_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def run(argv, capsys):
+    code = card_printer_cli.main(argv + ["--json"])
+    return code, json.loads(capsys.readouterr().out.strip().splitlines()[0])
+
+
+def test_manifest_missing_and_unreadable_files_are_reported(tmp_path, capsys):
+    Image.new('RGB', (300, 440), (200, 30, 30)).save(tmp_path / "good.png")
+    (tmp_path / "broken.jpg").write_bytes(b"not an image")
+    (tmp_path / "deck.txt").write_text("3x good.png\n2x missing.png\nbroken.jpg\n", encoding='utf-8')
+    code, result = run([str(tmp_path / "deck.txt"), "-o", str(tmp_path / "deck.pdf")], capsys)
+    assert code == 1
+    assert result['cards'] == 3
+    assert len(result['failed']) == 2
+    assert "missing.png" in result['failed'][0] and "broken.jpg" in result['failed'][1]
+
+
+def test_folder_with_unreadable_image_fails(tmp_path, capsys):
+    images = tmp_path / "images"
+    images.mkdir()
+    Image.new('RGB', (300, 440), (30, 30, 200)).save(images / "a.png")
+    (images / "b.png").write_bytes(b"\x89PNG truncated")
+    code, result = run([str(images), "-o", str(tmp_path / "out.pdf")], capsys)
+    assert code == 1
+    assert result['cards'] == 1 and len(result['failed']) == 1
+
+
+def test_complete_manifest_succeeds(tmp_path, capsys):
+    Image.new('RGB', (300, 440), (200, 30, 30)).save(tmp_path / "good.png")
+    (tmp_path / "deck.txt").write_text("2 good.png\n", encoding='utf-8')
+    code, result = run([str(tmp_path / "deck.txt"), "-o", str(tmp_path / "deck.pdf")], capsys)
+    assert code == 0 and result['cards'] == 2 and result['failed'] == []
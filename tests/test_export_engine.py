@@ -0,0 +1,45 @@
+import os
+
+from PIL import Image
+from pypdf import PdfReader
+
+import export_engine
+from export_cache import ExportCache
+
+
+def test_identical_files_at_different_paths_embed_once(tmp_path):
+    # รูปขนาดพอดีช่อง -> ฝังต้นฉบับตรงๆ (passthrough) path ที่ฝังคือ path ต้นฉบับคนละไฟล์
+    config = dict(export_engine.DEFAULT_CONFIG)
+    size = export_engine.card_pixel_size(config, export_engine.get_profile(export_engine.DEFAULT_PROFILE)['dpi'])
+    a, b = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    Image.new('RGB', size, (30, 120, 200)).save(a, quality=90)
+    b.write_bytes(a.read_bytes())
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    output = tmp_path / "out.pdf"
+    export_engine.export_pdf({0: str(a), 1: str(b)}, config, str(output), str(temp_dir),
+                             workers=1, cache=ExportCache(str(tmp_path / "cache")))
+    reader = PdfReader(str(output), strict=True)
+    xobjects = reader.pages[0]['/Resources']['/XObject']
+    assert len(xobjects) == 1
+    assert reader.pages[0].extract_text() == "" # content stream อ่านได้
+    assert not os.listdir(temp_dir)
+
+
+def test_identical_files_processed_in_parallel_with_cache(tmp_path):
+    # รูปที่ต้อง resize (PNG) เนื้อเดียวกัน 8 path: ต้องประมวลผลครั้งเดียว ไม่ชนกันที่ partial ไฟล์ของ cache
+    src = tmp_path / "src.png"
+    Image.new('RGB', (400, 580), (200, 60, 30)).save(src)
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"copy_{i}.png"
+        path.write_bytes(src.read_bytes())
+        paths.append(str(path))
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    output = tmp_path / "out.pdf"
+    export_engine.export_pdf(dict(enumerate(paths)), dict(export_engine.DEFAULT_CONFIG), str(output), str(temp_dir),
+                             workers=4, cache=ExportCache(str(tmp_path / "cache")))
+    reader = PdfReader(str(output), strict=True)
+    assert len(reader.pages[0]['/Resources']['/XObject']) == 1
+    assert len(os.listdir(tmp_path / "cache" / "processed")) == 1
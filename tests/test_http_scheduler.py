@@ -0,0 +1,49 @@
+import pytest
+import requests
+
+from http_scheduler import HttpScheduler, FetchError
+
+
+class FakeResponse:
+    status_code = 200
+    content = b"{}"
+    headers = {}
+
+    def close(self):
+        pass
+
+
+class FlakySession:
+    # ยก exception ตามลำดับที่กำหนด แล้วตอบ 200
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        if self.errors: raise self.errors.pop(0)
+        return FakeResponse()
+
+
+def scheduler(session, retries=3):
+    http = HttpScheduler(rate=1000, burst=10, retries=retries, backoff=0.001)
+    http.session = session
+    return http
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.ChunkedEncodingError("truncated"),
+                                   requests.exceptions.ContentDecodingError("bad gzip")])
+def test_truncated_body_is_retried(error):
+    session = FlakySession([error])
+    http = scheduler(session)
+    assert http.get("http://example.invalid/x").status_code == 200
+    assert session.calls == 2 and http.stats['retries'] == 1
+
+
+def test_truncated_body_failure_is_recorded():
+    session = FlakySession([requests.exceptions.ChunkedEncodingError("truncated")] * 3)
+    http = scheduler(session, retries=2)
+    with pytest.raises(FetchError) as info:
+        http.get("http://example.invalid/x", label="card info")
+    assert info.value.reason == "ChunkedEncodingError"
+    assert [f['label'] for f in http.failed_items()] == ["card info"]
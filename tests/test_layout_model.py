@@ -0,0 +1,26 @@
+from layout_model import CardLayout, EditHistory
+
+
+def test_batches_of_one_group_undo_as_one_step():
+    layout, history = CardLayout(), EditHistory()
+    group = object()
+    for start in (0, 2, 4):
+        changes = {start: f"{start}.jpg", start + 1: f"{start + 1}.jpg"}
+        history.record("Import deck", layout.apply(changes), group)
+    assert len(history) == 1 and history.undo_label() == "Import deck"
+    history.undo(layout)
+    assert not any(layout.values())
+    history.redo(layout)
+    assert sorted(layout.values()) == [f"{i}.jpg" for i in range(6)]
+
+
+def test_other_edit_ends_the_group():
+    layout, history = CardLayout(), EditHistory()
+    group = object()
+    history.record("Import deck", layout.apply({0: "a.jpg"}), group)
+    history.record("Delete image", layout.apply({0: None}))
+    history.record("Import deck", layout.apply({1: "b.jpg"}), group)
+    assert len(history) == 3
+    history.undo(layout)
+    history.record("Import deck", layout.apply({2: "c.jpg"}), group) # หลัง undo ไม่ต่อเข้าคำสั่งที่ย้อนไปแล้ว
+    assert len(history) == 3 and not history.can_redo()
@@ -0,0 +1,40 @@
+import threading
+
+from search_service import SearchService
+from task_executor import TaskExecutor
+
+
+class FakeIndex:
+    def search(self, query, limit):
+        return [{'id': 1, 'name': query}]
+
+
+def test_cancel_queued_search_does_not_deadlock():
+    executor = TaskExecutor(workers=1)
+    release = threading.Event()
+    executor.submit(release.wait, 10) # thread เดียวไม่ว่าง -> งานค้นหารอในคิว
+    service = SearchService(index=FakeIndex(), pool=executor)
+    future = service.search("dark magician")
+    done = threading.Thread(target=service.cancel, args=("dark magician", future), daemon=True)
+    done.start()
+    done.join(5)
+    release.set()
+    assert not done.is_alive()
+    assert future.cancelled()
+    # ค้นคำเดิมอีกครั้งได้ผลจริง (ไม่ค้างอยู่ใน inflight)
+    assert service.search("dark magician").result(5)[0]['name'] == "dark magician"
+    executor.shutdown()
+
+
+def test_cancel_keeps_search_shared_with_other_callers():
+    executor = TaskExecutor(workers=1)
+    release = threading.Event()
+    executor.submit(release.wait, 10)
+    service = SearchService(index=FakeIndex(), pool=executor)
+    first = service.search("blue-eyes")
+    second = service.search("blue-eyes")
+    assert first is second
+    service.cancel("blue-eyes", first)
+    release.set()
+    assert second.result(5)[0]['name'] == "blue-eyes"
+    executor.shutdown()
@@ -0,0 +1,28 @@
+import threading
+from concurrent.futures import wait
+
+from task_executor import TaskExecutor, CancelToken
+
+
+def test_wait_returns_for_tasks_dropped_at_shutdown():
+    executor = TaskExecutor(workers=1)
+    release = threading.Event()
+    executor.submit(release.wait, 10)
+    queued = executor.submit(sum, [1, 2])
+    executor.shutdown()
+    done, not_done = wait([queued], timeout=5)
+    release.set()
+    assert queued in done and queued.cancelled()
+
+
+def test_wait_returns_for_tasks_dropped_by_token():
+    executor = TaskExecutor(workers=1)
+    release = threading.Event()
+    executor.submit(release.wait, 10)
+    token = CancelToken()
+    queued = executor.submit(sum, [1, 2], token=token)
+    token.cancel()
+    release.set()
+    done, _ = wait([queued], timeout=5)
+    assert queued in done and queued.cancelled()
+    executor.shutdown()
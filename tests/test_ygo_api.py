@@ -0,0 +1,41 @@
+import ygo_api
+from http_scheduler import FetchError
+
+
+class FakeResponse:
+    def __init__(self, status_code, cards=()):
+        self.status_code = status_code
+        self.cards = list(cards)
+
+    def json(self):
+        return {'data': self.cards}
+
+
+class FakeHttp:
+    # batch ที่มี id ที่ไม่รู้จักตอบ 400 / มี id ใน fail_ids ล้มเหลวทั้ง batch (เหมือน retry ครบแล้ว)
+    def __init__(self, fail_ids=(), unknown_ids=()):
+        self.fail_ids, self.unknown_ids = set(fail_ids), set(unknown_ids)
+
+    def get(self, url, params=None, **kwargs):
+        ids = params['id'].split(',')
+        if self.unknown_ids & set(ids): return FakeResponse(400)
+        if self.fail_ids & set(ids): raise FetchError(url, "HTTP 503")
+        return FakeResponse(200, [{'id': int(i), 'card_images': []} for i in ids])
+
+
+def test_failed_batch_keeps_cards_from_other_batches():
+    ids = [str(i) for i in range(1, 121)] # 3 batch (50 + 50 + 20)
+    errors = {}
+    found = ygo_api.fetch_card_info(FakeHttp(fail_ids={"77"}), ids, errors=errors)
+    failed_chunk = set(ids[50:100])
+    assert set(found) == set(ids) - failed_chunk
+    assert set(errors) == failed_chunk
+    assert errors["77"] == "card info failed: HTTP 503"
+
+
+def test_unknown_ids_fall_back_to_single_requests():
+    errors = {}
+    found = ygo_api.fetch_card_info(FakeHttp(fail_ids={"3"}, unknown_ids={"2"}), ["1", "2", "3"], errors=errors)
+    # batch ตอบ 400 เพราะ id 2 -> ถามทีละใบ: 1 ได้, 2 ไม่รู้จัก (ไม่ใช่ error), 3 ล้มเหลว
+    assert set(found) == {"1"}
+    assert errors == {"3": "card info failed: HTTP 503"}
@@ -0,0 +1,59 @@
+import os
+
+# ================= YGOPRODECK API HELPERS =================
+
+# YGOPRODECK_API_URL: ชี้ไป server จำลองในเครื่อง (benchmarks/fake_ygoprodeck.py)
+API_URL = os.environ.get("YGOPRODECK_API_URL", "https://db.ygoprodeck.com/api/v7/cardinfo.php")
+ID_BATCH_SIZE = 50      # กัน URL ยาวเกินเวลาขอหลายใบใน request เดียว
+MAX_CONNECTIONS = 8
+
+IMAGE_FIELDS = {'full': 'image_url', 'small': 'image_url_small', 'cropped': 'image_url_cropped'}
+
+
+def make_session(pool_size=MAX_CONNECTIONS):
+    # keep-alive + connection pool ใช้ร่วมกันทุก thread ที่ดาวน์โหลด
+    import requests # โหลดตอนออกเน็ตครั้งแรก ไม่ใช่ตอนเปิดโปรแกรม
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _index_cards(cards, out):
+    # map ทั้ง id หลักและ id ของ alternate art ไปที่การ์ดใบเดียวกัน
+    for card in cards:
+        out[str(card.get("id"))] = card
+        for img in card.get("card_images", []):
+            out.setdefault(str(img.get("id")), card)
+
+
+def fetch_card_info(http, ids, timeout=10, errors=None):
+    # http = HttpScheduler (rate limit + retry)
+    # batch ที่ล้มเหลวไม่ทิ้งผลของ batch อื่น: id ใน batch นั้นถูกใส่ errors {id: เหตุผล} (ถ้าส่งมา)
+    from http_scheduler import FetchError
+    ids = [str(i) for i in dict.fromkeys(ids)]
+    found = {}
+    def ask(chunk, label):
+        try: r = http.get(API_URL, params={"id": ",".join(chunk)}, timeout=timeout, label=label)
+        except FetchError as e:
+            if errors is not None: errors.update(dict.fromkeys(chunk, f"card info failed: {e.reason}"))
+            return None
+        if r.status_code == 200: _index_cards(r.json().get("data", []), found)
+        elif r.status_code != 400 and errors is not None:
+            errors.update(dict.fromkeys(chunk, f"card info failed: HTTP {r.status_code}"))
+        return r.status_code
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        chunk = ids[start:start + ID_BATCH_SIZE]
+        if ask(chunk, f"card info ({len(chunk)} ids)") == 400 and len(chunk) > 1:
+            # API ตอบ 400 ทั้ง batch ถ้ามี id ที่ไม่รู้จักปนอยู่ -> ถามทีละใบ
+            for cid in chunk: ask([cid], f"card info {cid}")
+    return {cid: found[cid] for cid in ids if cid in found}
+
+
+def image_url(card, card_id=None, variant='full'):
+    images = card.get("card_images", [])
+    if not images: return None
+    chosen = next((img for img in images if str(img.get("id")) == str(card_id)), images[0])
+    return chosen.get(IMAGE_FIELDS[variant])